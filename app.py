@@ -2,9 +2,7 @@
 Streamlit UI for RAG Chatbot with conversation history support
 """
 
-import os
 import time 
-import tempfile
 import streamlit as st
 from rag_chatbot import RAGChatbot
 
@@ -168,19 +166,12 @@ def process_uploaded_files(uploaded_files):
         return
     
     with st.spinner("Processing documents..."):
-        temp_dir = tempfile.mkdtemp()
-        file_paths = []
-        
-        # Save uploaded files to temporary directory
-        for uploaded_file in uploaded_files:
-            file_path = os.path.join(temp_dir, uploaded_file.name)
-            with open(file_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
-            file_paths.append(file_path)
+        # Uploads are processed straight from memory, without temp files
+        uploads = [(uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files]
         
         # Load documents into the chatbot
         try:
-            num_chunks = st.session_state.chatbot.load_documents(file_paths=file_paths)
+            num_chunks = st.session_state.chatbot.load_uploaded_files(uploads).num_chunks
             st.session_state.documents_loaded = True
             st.success(f"Successfully processed {len(uploaded_files)} documents with {num_chunks} chunks.")
         except Exception as e:
@@ -233,8 +224,8 @@ with st.sidebar:
     st.markdown(get_upload_header_html(), unsafe_allow_html=True)
         
     uploaded_files = st.file_uploader(
-        "Upload PDF, Word, or Excel files",
-        type=["pdf", "docx", "xlsx", "xls"],
+        "Upload PDF, Word, or Excel files (or zip archives of them)",
+        type=["pdf", "docx", "xlsx", "xls", "zip"],
         accept_multiple_files=True
     )
     
@@ -0,0 +1,141 @@
+"""
+Benchmark script for reduced-dimension embeddings
+
+Indexes the same chunks in Chroma at 256, 512, 1024 and 1536 dimensions and
+reports, for each length:
+- memory: raw float32 vector size, and the collection's size on disk (vectors
+  plus the HNSW graph)
+- latency: median and 95th percentile of Chroma queries for the 10 nearest chunks
+- recall@k: how often a query's source chunk is among the k nearest chunks that
+  Chroma's HNSW index returns, and with exact search ("exact R@10"), which
+  separates what the shorter vectors lose from what the approximate index loses
+- overlap@10: the share of the 10 nearest chunks that the longest vectors find too
+
+Queries are generated as in bench_embedding_providers.py. For openai and
+sentence-transformers, chunks are embedded once at full length and truncated and
+renormalized to each length, which for text-embedding-3 models gives the same
+vectors as requesting fewer dimensions from the API. The hashing provider has
+no full-length vector to truncate, so it embeds the chunks again at each length.
+
+Usage:
+    python benchmarks/bench_embedding_dimensions.py [path/to/documents] [num_queries] [provider]
+
+provider defaults to openai when OPENAI_API_KEY is set and to hashing otherwise.
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import statistics
+
+import chromadb
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.embedding_providers import create_embeddings, truncate_embedding
+from bench_embedding_providers import create_sample_chunks, load_chunks, create_queries
+
+DIMENSIONS = [256, 512, 1024, 1536]
+
+def directory_size(path):
+    """Total size of the files under a directory, in bytes"""
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+def embed_all(embeddings, texts, batch_size=256):
+    """Embed texts in batches"""
+    vectors = []
+    for i in range(0, len(texts), batch_size):
+        vectors.extend(embeddings.embed_documents(texts[i:i + batch_size]))
+    return vectors
+
+def vectors_by_dimensions(provider, chunks, queries):
+    """Return {dimensions: (chunk vectors, query vectors)} for each length the provider supports"""
+    api_key = os.environ.get("OPENAI_API_KEY")
+    query_texts = [query for query, _ in queries]
+    
+    if provider == "hashing":
+        result = {}
+        for dimensions in DIMENSIONS:
+            embeddings = create_embeddings("hashing", dimensions=dimensions)
+            result[dimensions] = (embed_all(embeddings, chunks), embed_all(embeddings, query_texts))
+        return result
+    
+    embeddings = create_embeddings(provider, openai_api_key=api_key)
+    chunk_vectors = embed_all(embeddings, chunks)
+    query_vectors = embed_all(embeddings, query_texts)
+    return {
+        dimensions: ([truncate_embedding(vector, dimensions) for vector in chunk_vectors],
+                     [truncate_embedding(vector, dimensions) for vector in query_vectors])
+        for dimensions in DIMENSIONS if dimensions <= len(chunk_vectors[0])
+    }
+
+def bench_dimensions(chunk_vectors, query_vectors, queries, ks=(1, 5, 10)):
+    """Index vectors in a temporary Chroma collection and measure it"""
+    persist_directory = tempfile.mkdtemp()
+    try:
+        client = chromadb.PersistentClient(path=persist_directory)
+        collection = client.create_collection("bench")
+        ids = [str(i) for i in range(len(chunk_vectors))]
+        batch_size = client.get_max_batch_size()
+        for i in range(0, len(ids), batch_size):
+            collection.add(ids=ids[i:i + batch_size], embeddings=chunk_vectors[i:i + batch_size])
+        
+        latencies = []
+        rankings = []
+        for vector in query_vectors:
+            start = time.perf_counter()
+            result = collection.query(query_embeddings=[vector], n_results=max(ks), include=[])
+            latencies.append(time.perf_counter() - start)
+            rankings.append([int(chunk_id) for chunk_id in result["ids"][0]])
+        disk_bytes = directory_size(persist_directory)
+    finally:
+        shutil.rmtree(persist_directory)
+    
+    matrix = np.array(chunk_vectors, dtype=np.float32)
+    exact_hits = 0
+    for vector, (_, expected) in zip(query_vectors, queries):
+        distances = np.linalg.norm(matrix - np.array(vector, dtype=np.float32), axis=1)
+        exact_hits += expected in np.argpartition(distances, max(ks))[:max(ks)]
+    
+    latencies.sort()
+    return {
+        "vector_mb": len(chunk_vectors) * len(chunk_vectors[0]) * 4 / 1e6,
+        "disk_mb": disk_bytes / 1e6,
+        "latency_p50_ms": statistics.median(latencies) * 1000,
+        "latency_p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        "recall": {k: sum(expected in ranking[:k] for (_, expected), ranking in zip(queries, rankings)) / len(queries)
+                   for k in ks},
+        "exact_recall": exact_hits / len(queries),
+        "rankings": rankings
+    }
+
+def bench_embedding_dimensions(directory_path=None, num_queries=200, provider=None):
+    """Compare index memory, query latency and recall across embedding lengths"""
+    provider = provider or ("openai" if os.environ.get("OPENAI_API_KEY") else "hashing")
+    chunks = load_chunks(directory_path) if directory_path else create_sample_chunks(num_chunks=10000)
+    queries = create_queries(chunks, num_queries)
+    print(f"{len(chunks)} chunks, {len(queries)} queries, provider: {provider}")
+    
+    results = {dimensions: bench_dimensions(chunk_vectors, query_vectors, queries)
+               for dimensions, (chunk_vectors, query_vectors) in vectors_by_dimensions(provider, chunks, queries).items()}
+    reference = results[max(results)]["rankings"]
+    
+    print(f"\n{'dims':>6} {'vector MB':>10} {'disk MB':>9} {'p50 ms':>8} {'p95 ms':>8} {'R@1':>6} {'R@5':>6} {'R@10':>6} {'exact R@10':>11} {'overlap@10':>11}")
+    for dimensions, result in results.items():
+        overlap = statistics.mean(len(set(ranking) & set(full)) / len(full)
+                                  for ranking, full in zip(result["rankings"], reference))
+        recall = result["recall"]
+        print(f"{dimensions:>6} {result['vector_mb']:>10.1f} {result['disk_mb']:>9.1f} "
+              f"{result['latency_p50_ms']:>8.2f} {result['latency_p95_ms']:>8.2f} "
+              f"{recall[1]:>6.2f} {recall[5]:>6.2f} {recall[10]:>6.2f} {result['exact_recall']:>11.2f} {overlap:>11.2f}")
+
+if __name__ == "__main__":
+    bench_embedding_dimensions(
+        sys.argv[1] if len(sys.argv) > 1 and sys.argv[1] else None,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+        sys.argv[3] if len(sys.argv) > 3 else None
+    )
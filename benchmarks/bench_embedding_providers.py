@@ -0,0 +1,126 @@
+"""
+Benchmark script for the embedding providers
+
+Embeds the same chunks and queries with each provider and reports:
+- throughput: chunks embedded per second with embed_documents
+- latency: median and 95th percentile of single embed_query calls
+- recall@k: how often a query's source chunk is among the k chunks with the
+  most similar embeddings (exact cosine search, no index)
+
+Each query is a window of words taken from a random chunk, with a quarter of the
+words dropped, so the chunk it came from is the one that should be retrieved.
+
+Usage:
+    python benchmarks/bench_embedding_providers.py [path/to/documents] [num_queries] [providers]
+
+Without a path, a synthetic corpus is generated. providers is a comma-separated
+list; by default hashing is always run, sentence-transformers when it is installed
+and openai when OPENAI_API_KEY is set.
+"""
+
+import os
+import sys
+import time
+import random
+import statistics
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.document_processor import DocumentProcessor
+from utils.embedding_providers import create_embeddings, SentenceTransformer
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "pra", "gen", "dor", "lin", "mas", "ter", "qui"]
+
+def create_sample_chunks(num_chunks=2000, chunk_words=150):
+    """Create chunks of pseudo-words drawn from a Zipf-distributed vocabulary"""
+    rng = random.Random(0)
+    vocabulary = sorted({"".join(rng.choices(SYLLABLES, k=rng.randint(1, 4))) for _ in range(20000)})
+    rng.shuffle(vocabulary)
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    return [" ".join(rng.choices(vocabulary, weights=weights, k=chunk_words)) for _ in range(num_chunks)]
+
+def load_chunks(directory_path):
+    """Split the documents in a directory into chunks with the default settings"""
+    processor = DocumentProcessor()
+    chunks = [chunk for file_chunks in processor.process_directory(directory_path).values() for chunk in file_chunks]
+    return [chunk for chunk in chunks if len(chunk.split()) >= 20]
+
+def create_queries(chunks, num_queries):
+    """Return (query, chunk index) pairs drawn from random chunks"""
+    rng = random.Random(1)
+    queries = []
+    for _ in range(num_queries):
+        index = rng.randrange(len(chunks))
+        words = chunks[index].split()
+        length = min(len(words), rng.randint(8, 16))
+        start = rng.randrange(len(words) - length + 1)
+        window = [word for word in words[start:start + length] if rng.random() >= 0.25]
+        queries.append((" ".join(window or words[start:start + length]), index))
+    return queries
+
+def default_providers():
+    """Providers that can run in this environment"""
+    providers = ["hashing"]
+    if SentenceTransformer is not None:
+        providers.append("sentence-transformers")
+    if os.environ.get("OPENAI_API_KEY"):
+        providers.append("openai")
+    return providers
+
+def bench_provider(provider, chunks, queries, ks=(1, 5, 10), batch_size=64):
+    """Measure one provider's throughput, query latency and recall@k"""
+    embeddings = create_embeddings(provider, openai_api_key=os.environ.get("OPENAI_API_KEY"))
+    
+    start = time.perf_counter()
+    vectors = []
+    for i in range(0, len(chunks), batch_size):
+        vectors.extend(embeddings.embed_documents(chunks[i:i + batch_size]))
+    index_seconds = time.perf_counter() - start
+    
+    matrix = np.array(vectors, dtype=np.float32)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    
+    latencies = []
+    hits = {k: 0 for k in ks}
+    for query, expected in queries:
+        start = time.perf_counter()
+        vector = np.array(embeddings.embed_query(query), dtype=np.float32)
+        latencies.append(time.perf_counter() - start)
+        
+        scores = matrix @ (vector / max(np.linalg.norm(vector), 1e-12))
+        ranking = np.argsort(-scores)[:max(ks)]
+        for k in ks:
+            hits[k] += expected in ranking[:k]
+    
+    latencies.sort()
+    return {
+        "chunks_per_second": len(chunks) / index_seconds,
+        "latency_p50_ms": statistics.median(latencies) * 1000,
+        "latency_p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        "recall": {k: hits[k] / len(queries) for k in ks},
+        "dimensions": matrix.shape[1]
+    }
+
+def bench_embedding_providers(directory_path=None, num_queries=200, providers=None):
+    """Compare embedding providers on the same chunks and queries"""
+    chunks = load_chunks(directory_path) if directory_path else create_sample_chunks()
+    queries = create_queries(chunks, num_queries)
+    providers = providers or default_providers()
+    print(f"{len(chunks)} chunks, {len(queries)} queries, providers: {', '.join(providers)}")
+    
+    print(f"\n{'provider':<22} {'dims':>6} {'chunks/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'R@1':>6} {'R@5':>6} {'R@10':>6}")
+    for provider in providers:
+        result = bench_provider(provider, chunks, queries)
+        recall = result["recall"]
+        print(f"{provider:<22} {result['dimensions']:>6} {result['chunks_per_second']:>10.0f} "
+              f"{result['latency_p50_ms']:>8.1f} {result['latency_p95_ms']:>8.1f} "
+              f"{recall[1]:>6.2f} {recall[5]:>6.2f} {recall[10]:>6.2f}")
+
+if __name__ == "__main__":
+    bench_embedding_providers(
+        sys.argv[1] if len(sys.argv) > 1 and sys.argv[1] else None,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+        sys.argv[3].split(",") if len(sys.argv) > 3 else None
+    )
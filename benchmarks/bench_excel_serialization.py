@@ -0,0 +1,85 @@
+"""
+Benchmark script for Excel table serialization formats
+
+Reports characters and tokens per spreadsheet row for each DocumentProcessor
+table_format, so the cost of the padded to_string() output can be compared with
+the compact formats.
+
+Usage:
+    python benchmarks/bench_excel_serialization.py [path/to/workbook.xlsx]
+
+Without a path, a synthetic wide workbook with sparse and empty columns is generated.
+"""
+
+import os
+import sys
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.document_processor import DocumentProcessor
+
+def count_tokens(text):
+    """Count tokens with tiktoken when available, otherwise estimate from characters"""
+    try:
+        import tiktoken
+        return len(tiktoken.get_encoding("cl100k_base").encode(text))
+    except Exception:
+        # tiktoken missing, or its encoding files cannot be downloaded
+        return len(text) // DocumentProcessor.CHARS_PER_TOKEN
+
+def create_sample_workbook(num_rows=500, num_columns=20):
+    """Create a synthetic wide workbook with numeric, text, sparse and empty columns"""
+    from openpyxl import Workbook
+    
+    random.seed(0)
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "Export"
+    
+    header = [f"Column {i}" for i in range(num_columns)]
+    sheet.append(header)
+    for row in range(num_rows):
+        values = []
+        for i in range(num_columns):
+            if i % 5 == 0:
+                values.append(row * 10 + i)
+            elif i % 5 == 1:
+                values.append(round(random.uniform(0, 10000), 2))
+            elif i % 5 == 2:
+                values.append(random.choice(["North", "South", "East", "West region office"]))
+            elif i % 5 == 3:
+                values.append(random.choice([None, None, "n/a", 3.5]))
+            else:
+                values.append(None)
+        sheet.append(values)
+    
+    path = os.path.join(tempfile.mkdtemp(), "sample_export.xlsx")
+    workbook.save(path)
+    return path, num_rows
+
+def bench_excel_serialization(file_path=None):
+    """Compare tokens per row across table formats"""
+    if file_path:
+        num_rows = None
+    else:
+        file_path, num_rows = create_sample_workbook()
+        print(f"Generated sample workbook at {file_path}")
+    
+    baseline_tokens = None
+    print(f"\n{'format':<10} {'chars':>10} {'tokens':>10} {'tokens/row':>12} {'saved':>8}")
+    for table_format in DocumentProcessor.TABLE_FORMATS:
+        processor = DocumentProcessor(table_format=table_format, excel_mode="windows")
+        documents = processor._load_excel(file_path)
+        text = "".join(doc.page_content for doc in documents)
+        rows = num_rows or sum(doc.metadata["row_count"] for doc in documents)
+        tokens = count_tokens(text)
+        
+        if baseline_tokens is None:
+            baseline_tokens = tokens
+        saved = 1 - tokens / baseline_tokens if baseline_tokens else 0
+        print(f"{table_format:<10} {len(text):>10} {tokens:>10} {tokens / rows:>12.1f} {saved:>8.1%}")
+
+if __name__ == "__main__":
+    bench_excel_serialization(sys.argv[1] if len(sys.argv) > 1 else None)
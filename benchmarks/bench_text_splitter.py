@@ -0,0 +1,82 @@
+"""
+Benchmark script for the text splitter implementations
+
+Splits the same text with LangChain's RecursiveCharacterTextSplitter and with
+FastRecursiveSplitter, checks that both produce identical chunks, and reports
+throughput for each.
+
+Usage:
+    python benchmarks/bench_text_splitter.py [path/to/text_file] [chunk_size] [chunk_overlap]
+
+Without a path, a synthetic corpus (prose paragraphs, long unbroken lines and runs
+without spaces) of a few MB is generated.
+"""
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from utils.text_splitter import FastRecursiveSplitter
+
+WORDS = ["the", "report", "revenue", "quarter", "growth", "customer", "analysis", "market",
+         "increased", "region", "product", "forecast", "of", "and", "in", "a", "to", "for"]
+
+def create_sample_text(num_chars=4_000_000):
+    """Create a synthetic corpus mixing paragraphs, long lines and space-free runs"""
+    random.seed(0)
+    parts = []
+    size = 0
+    while size < num_chars:
+        kind = random.random()
+        if kind < 0.8:
+            sentences = [" ".join(random.choices(WORDS, k=random.randint(5, 25))).capitalize() + "."
+                         for _ in range(random.randint(2, 8))]
+            part = " ".join(sentences) + "\n\n"
+        elif kind < 0.95:
+            part = " ".join(random.choices(WORDS, k=random.randint(200, 800))) + "\n"
+        else:
+            part = "".join(random.choices("abcdef0123456789", k=random.randint(500, 3000))) + "\n"
+        parts.append(part)
+        size += len(part)
+    return "".join(parts)
+
+def time_split(splitter, text):
+    """Split text and return (chunks, seconds)"""
+    start = time.perf_counter()
+    chunks = splitter.split_text(text)
+    return chunks, time.perf_counter() - start
+
+def bench_text_splitter(file_path=None, chunk_size=1000, chunk_overlap=200):
+    """Compare splitter throughput and check that the outputs match"""
+    if file_path:
+        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+    else:
+        text = create_sample_text()
+    megabytes = len(text.encode("utf-8")) / 1_000_000
+    print(f"Text: {len(text):,} characters ({megabytes:.1f} MB), chunk_size={chunk_size}, chunk_overlap={chunk_overlap}")
+    
+    results = {}
+    print(f"\n{'splitter':<12} {'chunks':>10} {'seconds':>10} {'MB/s':>10}")
+    for name, splitter_class in [("langchain", RecursiveCharacterTextSplitter), ("fast", FastRecursiveSplitter)]:
+        splitter = splitter_class(chunk_size=chunk_size, chunk_overlap=chunk_overlap, length_function=len)
+        chunks, seconds = time_split(splitter, text)
+        results[name] = (chunks, seconds)
+        print(f"{name:<12} {len(chunks):>10} {seconds:>10.2f} {megabytes / seconds:>10.1f}")
+    
+    identical = results["fast"][0] == results["langchain"][0]
+    print(f"\nIdentical chunks: {identical}")
+    print(f"Speedup: {results['langchain'][1] / results['fast'][1]:.1f}x")
+    if not identical:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    bench_text_splitter(
+        sys.argv[1] if len(sys.argv) > 1 else None,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 1000,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    )
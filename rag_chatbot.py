@@ -5,7 +5,8 @@ Integrates document processing, vector database, and OpenAI API for question ans
 
 import os
 import time 
-from typing import List, Dict, Any, Optional, Tuple
+import threading
+from typing import List, Dict, Any, Optional, Tuple, Union, BinaryIO
 
 # LangChain components
 from langchain_openai import ChatOpenAI
@@ -19,7 +20,12 @@ from langchain_core.callbacks import BaseCallbackHandler
 
 # Local modules
 from utils.document_processor import DocumentProcessor
-from utils.vector_store import VectorStore
+from utils.vector_store import VectorStore, DEFAULT_RESULTS_NUM
+from utils.ingestion_manifest import IngestionManifest
+from utils.ingestion_pipeline import IngestionPipeline
+from utils.ingestion_report import IngestionReport
+from utils.ingestion_estimator import IngestionEstimator
+from utils.quarantine import Quarantine
 from utils.prompt_loader import load_prompt
 
 class StreamingCallbackHandler(BaseCallbackHandler):
@@ -47,7 +53,20 @@ class RAGChatbot:
                  model_name: str = "gpt-4o-mini-2024-07-18",
                  temperature: float = 0.0,
                  chunk_size: int = 1000,
-                 chunk_overlap: int = 200):
+                 chunk_overlap: int = 200,
+                 length_unit: str = "chars",
+                 excel_mode: str = "small_whole",
+                 table_format: str = "text",
+                 text_cache_dir: Optional[str] = None,
+                 dedupe: bool = False,
+                 file_timeout: Optional[float] = None,
+                 max_memory_mb: Optional[int] = None,
+                 report_path: Optional[str] = None,
+                 embedding_cache_mb: Optional[float] = 1024,
+                 query_cache_on_disk: bool = False,
+                 embedding_provider: Optional[str] = None,
+                 embedding_model: Optional[str] = None,
+                 embedding_dimensions: Optional[int] = None):
         """
         Initialize the RAG chatbot.
         
@@ -58,6 +77,33 @@ class RAGChatbot:
             temperature: Temperature parameter for chat completion
             chunk_size: Size of text chunks for document processing
             chunk_overlap: Overlap between consecutive chunks
+            length_unit: Unit of chunk_size and chunk_overlap, "chars" or "tokens"
+                (see DocumentProcessor.LENGTH_UNITS)
+            excel_mode: How Excel sheets are represented (see DocumentProcessor.EXCEL_MODES)
+            table_format: How Excel rows are serialized (see DocumentProcessor.TABLE_FORMATS)
+            text_cache_dir: Directory for caching extracted document text across runs
+                (None disables the cache)
+            dedupe: Drop repeated page boilerplate and near-duplicate chunks before embedding
+            file_timeout: Seconds a single file may take to parse before it is abandoned
+                (None for no limit)
+            max_memory_mb: Memory limit, in MB, for the worker process parsing a file
+                (None for no limit)
+            report_path: JSON lines file each ingestion run's IngestionReport is
+                appended to (None to only return the reports)
+            embedding_cache_mb: Size limit, in MB, of the cache of chunk embeddings kept
+                in persist_directory, which lets re-ingested text skip the embedding API
+                (None disables the cache)
+            query_cache_on_disk: Share query embeddings with other processes through the
+                embedding cache, in addition to the in-memory query cache
+            embedding_provider: Embedding provider of the collection ("openai",
+                "sentence-transformers" or "hashing"; see VectorStore), defaulting to
+                the one the collection was created with
+            embedding_model: Embedding model of the collection, defaulting likewise
+            embedding_dimensions: Length of the collection's vectors, defaulting likewise
+                (or to the model's full length), e.g. 512 for text-embedding-3-small
+        
+        Files that fail to parse are quarantined (quarantine.json in persist_directory)
+        and skipped on later runs until they are modified.
         """
         self.openai_api_key = openai_api_key or os.environ.get("OPENAI_API_KEY")
         
@@ -68,13 +114,31 @@ class RAGChatbot:
         # Initialize document processor
         self.document_processor = DocumentProcessor(
             chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap
+            chunk_overlap=chunk_overlap,
+            length_unit=length_unit,
+            excel_mode=excel_mode,
+            table_format=table_format,
+            cache_dir=text_cache_dir,
+            dedupe=dedupe,
+            file_timeout=file_timeout,
+            max_memory_mb=max_memory_mb,
+            quarantine_path=os.path.join(persist_directory, Quarantine.FILENAME)
         )
         
         # Initialize vector store
         self.vector_store = VectorStore(
             persist_directory=persist_directory,
-            openai_api_key=self.openai_api_key
+            openai_api_key=self.openai_api_key,
+            embedding_cache_mb=embedding_cache_mb,
+            query_cache_on_disk=query_cache_on_disk,
+            embedding_provider=embedding_provider,
+            embedding_model=embedding_model,
+            embedding_dimensions=embedding_dimensions
+        )
+        
+        # Track ingested files so unchanged files are not re-embedded
+        self.manifest = IngestionManifest(
+            os.path.join(persist_directory, IngestionManifest.FILENAME)
         )
         
         # Initialize OpenAI chat model with streaming enabled
@@ -88,6 +152,14 @@ class RAGChatbot:
         # Create the retriever
         self.retriever = None
         
+        self.report_path = report_path
+        
+        # Serializes ingestion runs, e.g. a folder watcher and a manual load_documents
+        self._ingest_lock = threading.RLock()
+        
+        # Optional Chroma where-filter restricting retrieval (e.g. to a sheet or page range)
+        self.retrieval_filter = None
+        
         # Conversation history
         self.conversation_history = []
         
@@ -99,68 +171,296 @@ class RAGChatbot:
         self.qa_chain = None
         self.rewriter_chain = None
     
-    def load_documents(self, file_paths: List[str] = None, directory_path: str = None):
+    def estimate_documents(self, file_paths: List[str] = None, directory_path: str = None,
+                           sample_files: int = 20, max_workers: Optional[int] = 1) -> Dict[str, Any]:
+        """
+        Estimate what load_documents would cost, without embedding or storing anything (dry run).
+        
+        A random sample of each file type is parsed and split with the current
+        document processing settings, and the chunk and token counts are scaled up
+        to the size of all files (see IngestionEstimator).
+        
+        Args:
+            file_paths: List of file paths to include
+            directory_path: Directory path containing documents to include
+            sample_files: Maximum number of files of each type to process
+            max_workers: Number of worker processes ingestion would parse files with
+                (None uses one per CPU)
+        
+        Returns:
+            Estimate with per-type and total chunks, tokens, cost_usd and hours
+        """
+        estimator = IngestionEstimator(
+            self.document_processor,
+            sample_files=sample_files,
+            embedding_model=self.vector_store.embeddings.model,
+            # Local embedding providers cost nothing per token
+            price_per_million_tokens=None if self.vector_store.embedding_provider == "openai" else 0.0,
+            max_workers=max_workers
+        )
+        estimate = estimator.estimate(directory_path=directory_path, file_paths=file_paths)
+        print(IngestionEstimator.summary(estimate))
+        return estimate
+    
+    def load_documents(self, file_paths: List[str] = None, directory_path: str = None,
+                       max_workers: Optional[int] = 1):
         """
         Load and process documents from files or a directory.
         
+        Ingestion is incremental: files whose size/mtime or content hash match the
+        ingestion manifest are skipped, changed files have their old chunks replaced,
+        and files that have disappeared from directory_path have their chunks purged.
+        
+        Ingestion is also resumable: each file is checkpointed in the manifest as soon
+        as its chunks are written, so if a run is interrupted, calling load_documents
+        again continues with the files that were not finished. Chunks already written
+        for a partially ingested file are not re-embedded either, since they keep
+        their content-addressed IDs.
+        
         Args:
             file_paths: List of file paths to process
             directory_path: Directory path containing documents to process
+            max_workers: Number of worker processes used to parse files
+                (None uses one per CPU)
                 
         Returns:
-            Number of documents loaded
+            IngestionReport for the run; its num_chunks is the number of chunks added
+            to the vector store
         """
-        processed_chunks = []
-        metadatas = []
+        # Map each candidate file to the source name stored in chunk metadata
+        sources = {}
         
-        # Process individual files
         if file_paths:
             for file_path in file_paths:
-                try:
-                    chunks = self.document_processor.process_file(file_path)
-                    file_name = os.path.basename(file_path)
-                    
-                    # Create metadata for each chunk
-                    file_metadatas = [{"source": file_name, "file_path": file_path} for _ in chunks]
-                    
-                    processed_chunks.extend(chunks)
-                    metadatas.extend(file_metadatas)
-                    
-                    print(f"Processed {file_name}: {len(chunks)} chunks extracted")
-                except Exception as e:
-                    print(f"Error processing {file_path}: {str(e)}")
-        
-        # Process all files in directory and subdirectories
+                sources[file_path] = os.path.basename(file_path)
+        
+        # Collect all files in directory and subdirectories
         if directory_path:
             try:
-                processed_files = self.document_processor.process_directory(directory_path)
-                
-                for rel_path, chunks in processed_files.items():
-                    # Construct full file path
-                    file_path = os.path.join(directory_path, rel_path)
-                    
-                    # Create metadata for each chunk
-                    file_metadatas = [{"source": rel_path, "file_path": file_path} for _ in chunks]
-                    
-                    processed_chunks.extend(chunks)
-                    metadatas.extend(file_metadatas)
-                    
-                    print(f"Processed {rel_path}: {len(chunks)} chunks extracted")
+                for file_path in self.document_processor.find_supported_files(directory_path):
+                    sources[file_path] = os.path.relpath(file_path, directory_path)
+                with self._ingest_lock:
+                    self._purge_deleted_files(directory_path)
             except Exception as e:
                 print(f"Error processing directory {directory_path}: {str(e)}")
         
-        # Add processed chunks to vector store
-        if processed_chunks:
-            self.vector_store.add_texts(processed_chunks, metadatas)
-            print(f"Added {len(processed_chunks)} chunks to vector store")
+        return self._ingest(sources, max_workers)
+    
+    def update_documents(self, directory_path: str, changed_paths: List[str],
+                         max_workers: Optional[int] = 1):
+        """
+        Re-ingest only the given paths under a directory that was loaded with load_documents.
+        
+        Added or modified files are ingested, and paths that no longer exist (files or
+        whole subdirectories) have their chunks purged. Chunk sources are relative to
+        directory_path, as in load_documents, so the two can be mixed freely.
+        
+        Args:
+            directory_path: Directory the paths belong to
+            changed_paths: Paths of files or directories that were added, modified or removed
+            max_workers: Number of worker processes used to parse files
+                (None uses one per CPU)
+                
+        Returns:
+            IngestionReport for the run; its num_chunks is the number of chunks added
+            to the vector store
+        """
+        sources = {}
+        
+        for path in changed_paths:
+            if os.path.isdir(path):
+                file_paths = self.document_processor.find_supported_files(path)
+            elif os.path.exists(path):
+                file_paths = [path] if os.path.splitext(path)[1].lower() in self.document_processor.SUPPORTED_EXTENSIONS else []
+            else:
+                with self._ingest_lock:
+                    self._purge_deleted_files(path)
+                continue
             
-            # Create retriever
-            self.retriever = self.vector_store.get_retriever()
+            for file_path in file_paths:
+                sources[file_path] = os.path.relpath(file_path, directory_path)
+        
+        return self._ingest(sources, max_workers)
+    
+    def load_uploaded_files(self, uploads: List[Tuple[str, Union[bytes, BinaryIO]]]) -> IngestionReport:
+        """
+        Load and process in-memory files, such as web uploads, without writing them to disk.
+        
+        Zip archives are expanded in memory. Re-uploading a file with the same name
+        replaces its previous chunks; unchanged chunks are not re-embedded.
+        
+        Args:
+            uploads: List of (file_name, data) pairs, where data is bytes or a binary
+                file-like object and the extension of file_name gives its type
+                
+        Returns:
+            IngestionReport for the run; its num_chunks is the number of chunks added
+            to the vector store
+        """
+        def on_file_done(name: str, new_ids: List[str], error: Optional[str]):
+            if error:
+                print(error)
+                return
             
-            # Create QA chain
-            self._create_qa_chain()
+            kept_ids = set(new_ids)
+            # Uploads have no manifest entry; find the previous upload's chunks by source,
+            # leaving alone any file on disk that happens to have the same name
+            previous_ids = self.vector_store.get_ids({"$and": [{"source": name}, {"origin": "upload"}]})
+            self.vector_store.delete([chunk_id for chunk_id in previous_ids if chunk_id not in kept_ids])
+            print(f"Processed {name}: {len(new_ids)} chunks extracted")
+        
+        pipeline = IngestionPipeline(self.document_processor, self.vector_store)
+        report = IngestionReport()
+        with self._ingest_lock:
+            num_chunks = pipeline.run_uploads(uploads, on_file_done=on_file_done, report=report)
         
-        return len(processed_chunks)
+        if num_chunks:
+            print(f"Added {num_chunks} chunks to vector store")
+        self._emit_report(report)
+        
+        self._create_retriever()
+        
+        return report
+    
+    def _ingest(self, sources: Dict[str, str], max_workers: Optional[int] = 1) -> IngestionReport:
+        """
+        Ingest the changed files among sources, a mapping of file path to chunk source name.
+        
+        Returns:
+            IngestionReport for the run
+        """
+        with self._ingest_lock:
+            report = self._ingest_locked(sources, max_workers)
+        
+        # Create retriever and QA chain over everything in the store, including skipped files
+        self._create_retriever()
+        
+        return report
+    
+    def _ingestion_settings(self) -> str:
+        """Identify the processing and embedding settings files are ingested with, for the manifest."""
+        embedding_settings = [str(self.vector_store.collection_metadata.get(key)) for key in VectorStore.EMBEDDING_SETTINGS]
+        return ":".join([self.document_processor.settings_signature()] + embedding_settings)
+    
+    def _emit_report(self, report: IngestionReport):
+        """Print an ingestion report's summary and append it to report_path if one is set."""
+        if report.files:
+            print(report.summary())
+            if self.vector_store.embedding_cache is not None:
+                print(self.vector_store.embedding_cache.summary())
+        if self.report_path:
+            report.write_jsonl(self.report_path)
+    
+    def _ingest_locked(self, sources: Dict[str, str], max_workers: Optional[int]) -> IngestionReport:
+        """Ingest files while holding the ingestion lock."""
+        if self.manifest.recovered:
+            print(f"Resuming interrupted ingestion: recovered {self.manifest.recovered} file checkpoints")
+        
+        report = IngestionReport()
+        settings = self._ingestion_settings()
+        
+        # Skip quarantined files, and files that have not changed since they were last
+        # ingested with these settings
+        pending = {}
+        for file_path, source in sources.items():
+            reason = self.document_processor.quarantine_reason(file_path)
+            if reason:
+                print(f"Skipped {source}: {reason}")
+                report.skip_file(file_path, reason)
+                continue
+            
+            try:
+                changed, file_info = self.manifest.check(file_path, settings)
+            except OSError as e:
+                print(f"Error processing {file_path}: {str(e)}")
+                report.finish_file(file_path, 0, str(e))
+                continue
+            
+            if changed:
+                pending[file_path] = file_info
+            else:
+                print(f"Skipped {source}: unchanged since last ingestion")
+                report.skip_file(file_path, "unchanged since last ingestion")
+        
+        progress = {"done": 0, "total": len(pending)}
+        
+        def on_file_done(file_path: str, new_ids: List[str], error: Optional[str]):
+            progress["done"] += 1
+            old_ids = self.manifest.get_chunk_ids(file_path)
+            kept_ids = set(old_ids)
+            
+            if error:
+                # Drop whatever the failed file wrote, keeping its previously ingested chunks
+                self.vector_store.delete([chunk_id for chunk_id in new_ids if chunk_id not in kept_ids])
+                print(error)
+                return
+            
+            # The new chunks are already written, so the file never drops out of the index;
+            # unchanged chunks keep their content-addressed ID and were not re-embedded
+            kept_ids = set(new_ids)
+            self.vector_store.delete([chunk_id for chunk_id in old_ids if chunk_id not in kept_ids])
+            
+            # Checkpoint the file so an interrupted run does not redo it
+            self.manifest.record(file_path, pending[file_path], new_ids, settings)
+            print(f"Processed {sources[file_path]}: {len(new_ids)} chunks extracted "
+                  f"({progress['done']}/{progress['total']} files)")
+        
+        # Extract, embed and write in overlapping stages so only a few batches are held in memory
+        dedup_before = self.document_processor.dedup_report()
+        pipeline = IngestionPipeline(
+            self.document_processor, self.vector_store, max_workers=max_workers
+        )
+        try:
+            num_chunks = pipeline.run(list(pending), sources=sources, on_file_done=on_file_done, report=report)
+        finally:
+            # Fold the checkpoints into the manifest, even if the run was interrupted
+            self.manifest.save()
+        
+        if self.document_processor.dedupe:
+            dedup_after = self.document_processor.dedup_report()
+            chunks_saved = dedup_after["chunks_saved"] - dedup_before["chunks_saved"]
+            tokens_saved = dedup_after["tokens_saved"] - dedup_before["tokens_saved"]
+            print(f"Deduplication saved {chunks_saved} chunks and ~{tokens_saved} tokens")
+        
+        if num_chunks:
+            print(f"Added {num_chunks} chunks to vector store")
+        self._emit_report(report)
+        
+        return report
+    
+    def set_retrieval_filter(self, where: Optional[Dict[str, Any]] = None):
+        """
+        Restrict retrieval to chunks whose metadata matches a Chroma where-filter.
+        
+        Chunks carry source, file_path, page/page_end, sheet_name, row_start/row_end
+        and chunk_index metadata (and origin "upload" for uploaded files), so retrieval
+        can be narrowed server-side, e.g. {"sheet_name": "Q3"} or
+        {"$and": [{"page": {"$gte": 10}}, {"page": {"$lte": 20}}]}.
+        
+        Args:
+            where: Filter to apply, or None to search all chunks
+        """
+        self.retrieval_filter = where
+        self._create_retriever()
+    
+    def _create_retriever(self):
+        """Create the retriever and QA chain if the vector store holds any documents."""
+        if self.vector_store.count() == 0:
+            return
+        
+        search_kwargs = {"k": DEFAULT_RESULTS_NUM}
+        if self.retrieval_filter:
+            search_kwargs["filter"] = self.retrieval_filter
+        
+        self.retriever = self.vector_store.get_retriever(search_kwargs=search_kwargs)
+        self._create_qa_chain()
+    
+    def _purge_deleted_files(self, directory_path: str):
+        """Delete the chunks of previously ingested files that no longer exist on disk."""
+        for file_path in self.manifest.files_under(directory_path):
+            if not os.path.exists(file_path):
+                self.vector_store.delete(self.manifest.remove(file_path))
+                print(f"Removed {file_path}: file no longer exists")
     
     def _create_qa_chain(self):
         """
@@ -291,6 +591,7 @@ class RAGChatbot:
         Clear all documents from the vector store.
         """
         self.vector_store.clear()
+        self.manifest.clear()
         self.retriever = None
         self.qa_chain = None
         print("All documents have been cleared from the vector store")
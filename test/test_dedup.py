@@ -0,0 +1,58 @@
+"""
+Test script for the deduplication module
+"""
+
+from utils.dedup import BoilerplateFilter, NearDuplicateFilter
+from langchain_core.documents import Document
+
+def test_boilerplate_filter():
+    """Test that lines repeated across pages are stripped"""
+    print("Testing BoilerplateFilter functionality")
+    
+    regions = ["north", "south", "east", "west", "central", "coastal", "mountain", "valley", "island", "urban"]
+    topics = ["revenue", "costs", "staffing", "risks", "outlook"]
+    pages = [
+        Document(
+            page_content=(f"ACME Corp Confidential\nQuarterly Report\n"
+                          + "".join(f"The {regions[i]} region {topic} summary.\n" for topic in topics)
+                          + f"Page {i + 1} of 10"),
+            metadata={"page": i}
+        )
+        for i in range(10)
+    ]
+    
+    stats = {}
+    filtered = list(BoilerplateFilter().filter(pages, stats))
+    
+    assert len(filtered) == len(pages)
+    for doc in filtered:
+        assert "Confidential" not in doc.page_content
+        assert "Quarterly Report" not in doc.page_content
+        assert "of 10" not in doc.page_content
+        assert doc.page_content.count("region") == len(topics)
+    assert stats["boilerplate_lines_removed"] == 30
+    print(f"Removed {stats['boilerplate_lines_removed']} boilerplate lines")
+
+def test_near_duplicate_filter():
+    """Test that exact and near-duplicate chunks are dropped"""
+    print("\nTesting NearDuplicateFilter functionality")
+    
+    disclaimer = ("This document is provided for information purposes only and does not constitute "
+                  "legal, tax or investment advice. Past performance is not indicative of future results.")
+    records = [
+        {"text": disclaimer, "metadata": {}},
+        {"text": "Revenue grew twelve percent year over year, driven by the services segment.", "metadata": {}},
+        {"text": disclaimer, "metadata": {}},
+        {"text": disclaimer.replace("only", "only,"), "metadata": {}},
+    ]
+    
+    stats = {}
+    kept = list(NearDuplicateFilter().filter(records, stats))
+    
+    assert [record["text"] for record in kept] == [records[0]["text"], records[1]["text"]]
+    assert stats["duplicate_chunks_dropped"] == 2
+    print(f"Dropped {stats['duplicate_chunks_dropped']} duplicate chunks")
+
+if __name__ == "__main__":
+    test_boilerplate_filter()
+    test_near_duplicate_filter()
@@ -2,17 +2,18 @@
 Test script for the DocumentProcessor module
 """
 
+import io
 import os
+import zipfile
+import tempfile
+import openpyxl
 from utils.document_processor import DocumentProcessor
+from utils.text_cache import ExtractedTextCache
 from docx import Document
+from langchain_core.documents import Document as LCDocument
 
-def create_test_files():
-    """Create sample test files for demonstration"""
-    # Create a sample directory for test files
-    os.makedirs("data/sample", exist_ok=True)
-    
-    # Create a sample Word document for testing
-    doc_path = "data/sample/sample.docx"
+def create_sample_docx(doc_path):
+    """Write the sample Word document used by the tests"""
     doc = Document()
     doc.add_heading('Sample Document', 0)
     doc.add_paragraph('This is a sample document for testing the document processor.')
@@ -22,6 +23,15 @@ def create_test_files():
     doc.add_heading('Section 2', level=1)
     doc.add_paragraph('This is the content of section 2. LangChain document loaders are used to process this document.')
     doc.save(doc_path)
+
+def create_test_files():
+    """Create sample test files for demonstration"""
+    # Create a sample directory for test files
+    os.makedirs("data/sample", exist_ok=True)
+    
+    # Create a sample Word document for testing
+    doc_path = "data/sample/sample.docx"
+    create_sample_docx(doc_path)
     
     print(f"Created sample Word document at {doc_path}")
     print("Note: For actual PDF and XLSX files, please place them in the data directory")
@@ -72,6 +82,379 @@ def test_document_processor():
             print("\nNo supported files found in the data directory")
             print("Please add PDF, DOCX, or XLSX files to test with actual documents")
 
+def test_in_memory_processing():
+    """Test that bytes and zip archives produce the same chunks as files on disk"""
+    print("\nTesting in-memory processing")
+    processor = DocumentProcessor(chunk_size=500, chunk_overlap=100)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        doc_path = os.path.join(directory, "sample.docx")
+        create_sample_docx(doc_path)
+        with open(doc_path, "rb") as f:
+            data = f.read()
+        
+        chunks = processor.process_bytes(data, "docx", name=doc_path)
+        assert chunks and chunks == processor.process_file(doc_path)
+        print(f"Processed {len(chunks)} chunks from bytes")
+        
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("docs/sample.docx", data)
+            zf.writestr("notes.txt", "skipped")
+        
+        members = [(name, [record["text"] for record in records]) for name, records in processor.iter_zip_records(archive.getvalue())]
+        assert members == [("docs/sample.docx", chunks)]
+        print("Processed the supported members of a zip archive")
+
+def create_test_pdf(file_path, pages):
+    """Write a minimal PDF with one line of Helvetica text per page"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        content = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>"
+    
+    with open(file_path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, obj in enumerate(objects, 1):
+            offsets.append(f.tell())
+            f.write(f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1"))
+        xref = f.tell()
+        f.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1"))
+        for offset in offsets:
+            f.write(f"{offset:010d} 00000 n \n".encode("latin-1"))
+        f.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1"))
+
+def test_pdf_backends():
+    """Test that both PDF backends, and page-parallel extraction, read the same pages"""
+    print("\nTesting PDF backends and page-parallel extraction")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        pdf_path = os.path.join(directory, "pages.pdf")
+        num_pages = DocumentProcessor.PDF_PARALLEL_MIN_PAGES + 10
+        lines = [f"Page {page} describes topic {page * 7}." for page in range(num_pages)]
+        create_test_pdf(pdf_path, lines)
+        
+        def chunk_pages(records):
+            return [(record["text"], record["metadata"]["page"], record["metadata"]["page_end"]) for record in records]
+        
+        sequential = DocumentProcessor(chunk_size=200, chunk_overlap=0).process_file_records(pdf_path)
+        assert "\n\n".join(record["text"] for record in sequential) == "\n\n".join(lines)
+        
+        # pdfminer does not read page labels, but finds the same text on the same pages
+        pdfminer = DocumentProcessor(chunk_size=200, chunk_overlap=0, pdf_backend="pdfminer").process_file_records(pdf_path)
+        assert chunk_pages(pdfminer) == chunk_pages(sequential)
+        print(f"pypdf and pdfminer extracted the same {num_pages} pages")
+        
+        for backend in ["pypdf", "pdfminer"]:
+            processor = DocumentProcessor(chunk_size=200, chunk_overlap=0, pdf_backend=backend, pdf_page_workers=2)
+            parallel = processor.process_file_records(pdf_path)
+            assert parallel == (sequential if backend == "pypdf" else pdfminer)
+        print("Page-parallel extraction matched sequential extraction")
+        
+        # pdfminer pages, and pages of in-memory PDFs, are extracted as they are consumed
+        import pdfminer.high_level
+        extract_pages = pdfminer.high_level.extract_pages
+        extracted = []
+        
+        def counting_extract_pages(*args, **kwargs):
+            for layout in extract_pages(*args, **kwargs):
+                extracted.append(layout)
+                yield layout
+        
+        pdfminer.high_level.extract_pages = counting_extract_pages
+        try:
+            processor = DocumentProcessor(pdf_backend="pdfminer")
+            with open(pdf_path, "rb") as f:
+                streamed = io.BytesIO(f.read())
+            for pages in [processor._iter_pdf(pdf_path), processor._iter_pdf("pages.pdf", stream=streamed)]:
+                del extracted[:]
+                first = next(pages)
+                assert first.page_content == lines[0] and first.metadata["total_pages"] == num_pages
+                assert len(extracted) == 1
+                assert len(list(pages)) == num_pages - 1 and len(extracted) == num_pages
+        finally:
+            pdfminer.high_level.extract_pages = extract_pages
+        print("pdfminer extracted pages one at a time")
+
+def create_test_workbook(file_path, num_rows=60):
+    """Write a workbook with a large "Sales" sheet and a small "Staff" sheet with blank and short rows"""
+    workbook = openpyxl.Workbook()
+    sales = workbook.active
+    sales.title = "Sales"
+    sales.append(["Region", "Units", "Price"])
+    for i in range(num_rows):
+        sales.append([f"Region {i}", i, i * 1.5])
+    
+    staff = workbook.create_sheet("Staff")
+    staff.append(["Name", "Age"])
+    staff.append(["Ann", 30])
+    staff.append([None, None])
+    staff.append(["Bob"])
+    workbook.save(file_path)
+
+def test_excel_streaming():
+    """Test that workbooks are read in read-only mode and streamed as row windows"""
+    print("\nTesting Excel streaming")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        xlsx_path = os.path.join(directory, "sales.xlsx")
+        create_test_workbook(xlsx_path)
+        processor = DocumentProcessor(chunk_size=2000, chunk_overlap=0)
+        
+        opened = []
+        load_workbook = openpyxl.load_workbook
+        openpyxl.load_workbook = lambda *args, **kwargs: opened.append(kwargs) or load_workbook(*args, **kwargs)
+        try:
+            documents = processor._iter_excel(xlsx_path)
+            first = next(documents)
+            assert opened == [{"read_only": True, "data_only": True}]
+            documents = [first] + list(documents)
+        finally:
+            openpyxl.load_workbook = load_workbook
+        
+        # The large sheet becomes row windows, each repeating the headers
+        window_rows = DocumentProcessor.EXCEL_WINDOW_ROWS
+        windows = [document for document in documents if document.metadata["sheet_name"] == "Sales"]
+        assert [document.metadata["row_range"] for document in windows] == [
+            f"{start}-{min(start + window_rows, 60) - 1}" for start in range(0, 60, window_rows)
+        ]
+        assert all("Region, Units, Price" in document.page_content for document in windows)
+        
+        # Blank rows are skipped and short rows padded in the small sheet
+        staff = [document for document in documents if document.metadata["sheet_name"] == "Staff"]
+        assert len(staff) == 1 and staff[0].metadata["row_count"] == 2
+        assert "row_range" not in staff[0].metadata
+        print(f"Streamed {len(windows)} row windows and 1 whole sheet in read-only mode")
+        
+        # Row ranges keep the sheet's row numbers across skipped blank rows
+        staff = [document for document in processor._iter_excel(xlsx_path, excel_mode="windows")
+                 if document.metadata["sheet_name"] == "Staff"]
+        assert [(document.metadata["row_range"], document.metadata["row_count"]) for document in staff] == [("0-2", 2)]
+        assert "(Rows 0-2)" in staff[0].page_content
+        print("Row windows keep their sheet row numbers when blank rows are skipped")
+
+def test_excel_modes():
+    """Test the documents each excel_mode produces and the savings report"""
+    print("\nTesting Excel representation modes")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        xlsx_path = os.path.join(directory, "sales.xlsx")
+        create_test_workbook(xlsx_path)
+        processor = DocumentProcessor(chunk_size=2000, chunk_overlap=0)
+        
+        def describe(excel_mode):
+            return [(document.metadata["sheet_name"], document.metadata.get("row_range", "whole"))
+                    for document in processor._iter_excel(xlsx_path, excel_mode=excel_mode)]
+        
+        windows = [("Sales", "0-24"), ("Sales", "25-49"), ("Sales", "50-59")]
+        assert describe("small_whole") == windows + [("Staff", "whole")]
+        assert describe("windows") == windows + [("Staff", "0-2")]
+        assert describe("summary_windows") == windows + [("Sales", "whole"), ("Staff", "whole")]
+        assert describe("whole_and_windows") == [("Sales", "whole")] + windows + [("Staff", "whole")]
+        
+        summary = list(processor._iter_excel(xlsx_path, excel_mode="summary_windows"))[3]
+        assert "(Summary)" in summary.page_content and summary.metadata["row_count"] == 60
+        assert "Units: 0 to 59" in summary.page_content
+        print("Each mode produced the expected sheets and row windows")
+        
+        report = processor.excel_report(xlsx_path)
+        assert set(report) == set(DocumentProcessor.EXCEL_MODES)
+        assert report["whole_and_windows"]["tokens_saved"] == 0
+        assert report["small_whole"]["tokens_saved"] > 0 and report["small_whole"]["chunks_saved"] == 1
+        print(f"small_whole saves ~{report['small_whole']['tokens_saved']} tokens over whole_and_windows")
+        
+        try:
+            DocumentProcessor(excel_mode="rows")
+            assert False, "Unknown Excel mode should be rejected"
+        except ValueError:
+            pass
+
+def test_table_formats():
+    """Test how each table_format serializes sheet rows"""
+    print("\nTesting table formats")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        xlsx_path = os.path.join(directory, "sales.xlsx")
+        create_test_workbook(xlsx_path)
+        
+        def sheets(table_format, **kwargs):
+            documents = DocumentProcessor(table_format=table_format, **kwargs)._iter_excel(xlsx_path)
+            return [document.page_content for document in documents]
+        
+        # Empty cells render as nothing and numbers without padding
+        assert sheets("csv")[-1] == "# Sheet: Staff\n\nName,Age\nAnn,30\nBob,\n\n"
+        assert sheets("tsv")[-1] == "# Sheet: Staff\n\nName\tAge\nAnn\t30\nBob\t\n\n"
+        assert sheets("markdown")[-1] == "# Sheet: Staff\n\n| Name | Age |\n|---|---|\n| Ann | 30 |\n| Bob |  |\n\n"
+        assert "Region 1,1,1.5\n" in sheets("csv")[0]
+        assert "Region 1,1,1.50\n" in sheets("csv", float_format=".2f")[0]
+        
+        text_length = sum(len(sheet) for sheet in sheets("text"))
+        for table_format in ["csv", "tsv", "markdown"]:
+            assert sum(len(sheet) for sheet in sheets(table_format)) < text_length
+        print("Compact formats serialized rows without padding")
+
+def test_chunk_metadata():
+    """Test the location metadata carried by each chunk record"""
+    print("\nTesting chunk metadata")
+    processor = DocumentProcessor(chunk_size=120, chunk_overlap=0)
+    
+    pages = [" ".join(f"page{page}-word{i}" for i in range(3 + 2 * page)) for page in range(8)]
+    documents = [LCDocument(page_content=text, metadata={"source": "report.pdf", "page": page, "page_label": str(page + 1)})
+                 for page, text in enumerate(pages)]
+    records = list(processor.iter_chunk_records(documents))
+    
+    # Offsets point into the pages joined by blank lines
+    stream = "\n\n".join(pages)
+    page_starts = [stream.index(text) for text in pages]
+    for chunk_index, record in enumerate(records):
+        metadata = record["metadata"]
+        assert metadata["chunk_index"] == chunk_index
+        assert stream[metadata["start_index"]:metadata["end_index"]] == record["text"]
+        first_page = max(page for page, start in enumerate(page_starts) if start <= metadata["start_index"])
+        last_page = max(page for page, start in enumerate(page_starts) if start < metadata["end_index"])
+        assert metadata["page"] == first_page and metadata["page_label"] == str(first_page + 1)
+        assert metadata.get("page_end", first_page) == last_page
+        assert all(isinstance(value, (str, int, float, bool)) for value in metadata.values())
+    assert any("page_end" in record["metadata"] for record in records)
+    print(f"{len(records)} chunks carry their page range and offsets")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        xlsx_path = os.path.join(directory, "sales.xlsx")
+        create_test_workbook(xlsx_path)
+        records = DocumentProcessor(chunk_size=2000, chunk_overlap=0).process_file_records(xlsx_path)
+        windows = [record["metadata"] for record in records if "row_range" in record["metadata"]]
+        assert [(metadata["sheet_name"], metadata["row_start"], metadata["row_end"]) for metadata in windows] == [
+            ("Sales", 0, 24), ("Sales", 25, 49), ("Sales", 50, 59)
+        ]
+        assert records[-1]["metadata"]["sheet_name"] == "Staff"
+        print("Excel chunks carry their sheet and row range")
+
+def test_text_cache():
+    """Test extracted-text cache hits, misses and invalidation"""
+    print("\nTesting the extracted-text cache")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        xlsx_path = os.path.join(directory, "sales.xlsx")
+        create_test_workbook(xlsx_path)
+        cache_dir = os.path.join(directory, "cache")
+        
+        def process(**kwargs):
+            """Process the workbook, returning its chunks and whether the loader ran"""
+            processor = DocumentProcessor(cache_dir=cache_dir, **kwargs)
+            loads = []
+            load_documents = processor._load_documents
+            processor._load_documents = lambda *args: loads.append(args) or load_documents(*args)
+            key = ExtractedTextCache.make_key(xlsx_path, processor._extraction_signature(".xlsx"))
+            chunks = processor.process_file(xlsx_path)
+            assert key in processor.text_cache
+            return chunks, bool(loads)
+        
+        chunks, loaded = process(chunk_size=2000, chunk_overlap=0)
+        assert loaded
+        assert process(chunk_size=2000, chunk_overlap=0) == (chunks, False)
+        print("A second run read the workbook's text from the cache")
+        
+        # Chunking settings are not part of the key, so only the splitter re-runs
+        smaller, loaded = process(chunk_size=300, chunk_overlap=0)
+        assert not loaded and len(smaller) > len(chunks)
+        
+        # Settings that change the extracted text, or new file content, miss the cache
+        csv_chunks, loaded = process(chunk_size=2000, chunk_overlap=0, table_format="csv")
+        assert loaded and csv_chunks != chunks
+        create_test_workbook(xlsx_path, num_rows=70)
+        assert process(chunk_size=2000, chunk_overlap=0)[1]
+        print("Changed extraction settings and file content invalidated the cache")
+
+def test_streaming_chunks():
+    """Test that streamed chunks fit chunk_size and cover the whole text"""
+    print("\nTesting streaming chunking")
+    processor = DocumentProcessor(chunk_size=100, chunk_overlap=20)
+    
+    # Enough pages for the buffer to be split several times
+    pages = ["\n".join(" ".join(f"p{page}l{line}w{i}" for i in range(4 + (page + line) % 5)) for line in range(6))
+             for page in range(30)]
+    stream = "\n\n".join(pages)
+    assert len(stream) > 4 * processor.chunk_size * DocumentProcessor.STREAM_BUFFER_CHUNKS
+    
+    records = list(processor.iter_chunk_records(LCDocument(page_content=text, metadata={"page": page})
+                                                for page, text in enumerate(pages)))
+    assert all(len(record["text"]) <= processor.chunk_size for record in records)
+    
+    # Chunks only ever skip the whitespace they were split on
+    covered = 0
+    for record in records:
+        start, end = record["metadata"]["start_index"], record["metadata"]["end_index"]
+        assert stream[start:end] == record["text"]
+        assert not stream[covered:start].strip()
+        covered = max(covered, end)
+    assert not stream[covered:].strip()
+    print(f"{len(records)} streamed chunks fit chunk_size and cover all {len(stream)} characters")
+
+def test_repetitive_offsets():
+    """Test chunk offsets in repetitive text with both splitters"""
+    print("\nTesting chunk offsets in repetitive text")
+    
+    # The same words recur within every chunk's overlap window; the last page is
+    # periodic, so any placement matching the chunk text is as good as another
+    pages = [" ".join(["alpha beta gamma delta eta"] * 12) for _ in range(4)] + ["a " * 200]
+    stream = "\n\n".join(pages)
+    documents = [LCDocument(page_content=text, metadata={"page": page}) for page, text in enumerate(pages)]
+    
+    offsets = {}
+    for splitter in ("fast", "langchain"):
+        processor = DocumentProcessor(chunk_size=71, chunk_overlap=19, splitter=splitter)
+        records = list(processor.iter_chunk_records(documents))
+        covered = 0
+        for record in records:
+            start, end = record["metadata"]["start_index"], record["metadata"]["end_index"]
+            assert stream[start:end] == record["text"] and end <= len(stream)
+            assert not stream[covered:start].strip()
+            covered = max(covered, end)
+        assert not stream[covered:].strip()
+        offsets[splitter] = [(record["metadata"]["start_index"], record["metadata"]["end_index"]) for record in records]
+    
+    periodic_start = stream.index(pages[-1])
+    exact = [[span for span in spans if span[0] < periodic_start] for spans in offsets.values()]
+    assert exact[0] == exact[1]
+    print(f"Both splitters give the same offsets for {len(exact[0])} chunks and cover the periodic page")
+
+def test_parallel_directory():
+    """Test that parallel directory processing matches sequential processing"""
+    print("\nTesting parallel directory processing")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        os.makedirs(os.path.join(directory, "sub"))
+        for i in range(4):
+            doc = Document()
+            for j in range(10):
+                doc.add_paragraph(f"Document {i} paragraph {j} covers topic {i * 10 + j} in some detail.")
+            doc.save(os.path.join(directory, "sub" if i % 2 else "", f"doc{i}.docx"))
+        create_test_workbook(os.path.join(directory, "sales.xlsx"))
+        create_test_pdf(os.path.join(directory, "pages.pdf"), [f"Page {page} of the report." for page in range(5)])
+        
+        processor = DocumentProcessor(chunk_size=200, chunk_overlap=20)
+        sequential = processor.process_directory(directory)
+        parallel = processor.process_directory(directory, max_workers=3)
+        assert len(sequential) == 6 and all(sequential.values())
+        assert list(parallel.items()) == list(sequential.items())
+        print(f"Parallel run matched the sequential run for {len(parallel)} files, in the same order")
+
 if __name__ == "__main__":
     create_test_files()
     test_document_processor()
+    test_in_memory_processing()
+    test_pdf_backends()
+    test_excel_streaming()
+    test_excel_modes()
+    test_table_formats()
+    test_chunk_metadata()
+    test_text_cache()
+    test_streaming_chunks()
+    test_repetitive_offsets()
+    test_parallel_directory()
@@ -0,0 +1,60 @@
+"""
+Test script for the EmbeddingCache module
+"""
+
+import os
+import shutil
+import tempfile
+from utils.embedding_cache import EmbeddingCache
+
+def test_embedding_cache():
+    """Test lookups, persistence, key separation and LRU eviction"""
+    print("Testing EmbeddingCache functionality")
+    
+    cache_dir = tempfile.mkdtemp()
+    try:
+        cache_path = os.path.join(cache_dir, EmbeddingCache.FILENAME)
+        cache = EmbeddingCache(cache_path)
+        texts = [f"chunk {i}" for i in range(10)]
+        embeddings = [[float(i), 0.5, -1.0] for i in range(10)]
+        
+        assert cache.get_many("model-a", None, texts) == [None] * 10
+        cache.put_many("model-a", None, texts, embeddings)
+        assert cache.get_many("model-a", None, texts[:5] + ["unseen"]) == embeddings[:5] + [None]
+        stats = cache.stats()
+        assert stats["hits"] == 5 and stats["misses"] == 11 and stats["entries"] == 10
+        print(cache.summary())
+        
+        # The model and dimensions are part of the key
+        assert cache.get_many("model-b", None, texts[:1]) == [None]
+        assert cache.get_many("model-a", 256, texts[:1]) == [None]
+        print("Entries are keyed by model and dimensions")
+        
+        # Entries survive reopening the database
+        cache.close()
+        cache = EmbeddingCache(cache_path)
+        assert cache.get_many("model-a", None, texts) == embeddings
+        print("Entries persisted across instances")
+        cache.close()
+        
+        # A full cache evicts the least recently used entries
+        vector = [0.25] * 1024
+        entry_size = len(EmbeddingCache._encode(vector)) + EmbeddingCache.ENTRY_OVERHEAD
+        cache = EmbeddingCache(os.path.join(cache_dir, "small.sqlite"), max_size_mb=20 * entry_size / (1024 * 1024))
+        for i in range(20):
+            cache.put_many("model-a", None, [f"text {i}"], [vector])
+            if i >= 1:
+                # Keep the first text recently used
+                cache.get_many("model-a", None, ["text 0"])
+        cache.put_many("model-a", None, ["text 20"], [vector])
+        stats = cache.stats()
+        assert stats["evictions"] > 0 and stats["entries"] <= 20
+        assert stats["size_mb"] * 1024 * 1024 <= 20 * entry_size
+        assert cache.get_many("model-a", None, ["text 0", "text 1", "text 20"]) == [vector, None, vector]
+        print(f"Evicted {stats['evictions']} least recently used entries")
+        cache.close()
+    finally:
+        shutil.rmtree(cache_dir)
+
+if __name__ == "__main__":
+    test_embedding_cache()
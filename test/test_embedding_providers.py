@@ -0,0 +1,99 @@
+"""
+Test script for the embedding providers and per-collection provider selection
+"""
+
+import math
+import shutil
+import tempfile
+from utils.embedding_providers import HashingEmbeddings, SentenceTransformer, create_embeddings, truncate_embedding
+from utils.vector_store import VectorStore
+
+def test_hashing_embeddings():
+    """Test that hashing embeddings are deterministic, normalized and lexical"""
+    print("Testing HashingEmbeddings")
+    
+    embeddings = HashingEmbeddings(dimensions=256)
+    leave, revenue, question = embeddings.embed_documents([
+        "The PTO policy grants 20 days of paid leave per year",
+        "Quarterly revenue grew 12 percent in the northern region",
+        "How many days of paid leave does the PTO policy grant?"
+    ])
+    assert len(leave) == 256 and abs(math.sqrt(sum(v * v for v in leave)) - 1) < 1e-9
+    assert HashingEmbeddings(dimensions=256).embed_query("The PTO policy grants 20 days of paid leave per year") == leave
+    
+    similarity = lambda a, b: sum(x * y for x, y in zip(a, b))
+    assert similarity(question, leave) > similarity(question, revenue)
+    print(f"Similarity to the matching chunk {similarity(question, leave):.2f}, to another {similarity(question, revenue):.2f}")
+    
+    try:
+        create_embeddings("unknown")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    if SentenceTransformer is None:
+        try:
+            create_embeddings("sentence-transformers")
+            assert False, "expected ImportError"
+        except ImportError:
+            print("sentence-transformers not installed; its provider raises ImportError")
+
+def test_collection_provider():
+    """Test that a collection remembers its provider and rejects a different one"""
+    print("\nTesting per-collection embedding providers")
+    
+    persist_directory = tempfile.mkdtemp()
+    try:
+        store = VectorStore(persist_directory, embedding_provider="hashing", openai_api_key="")
+        store.add_texts(["The PTO policy grants 20 days of paid leave", "Quarterly revenue grew 12 percent"],
+                        [{"source": "hr.docx"}, {"source": "finance.xlsx"}])
+        assert store.similarity_search("days of paid leave", k=1)[0].metadata["source"] == "hr.docx"
+        
+        # Reopening without a provider uses the collection's, with no API key needed
+        reopened = VectorStore(persist_directory, openai_api_key="")
+        assert reopened.embedding_provider == "hashing" and reopened.count() == 2
+        print(f"Collection metadata: {reopened.vector_store._collection.metadata}")
+        
+        try:
+            VectorStore(persist_directory, embedding_provider="openai", openai_api_key="sk-test")
+            assert False, "expected ValueError"
+        except ValueError as e:
+            print(f"Mismatched provider rejected: {e}")
+        
+        # Another collection in the same directory can use another provider
+        other = VectorStore(persist_directory, embedding_provider="openai", openai_api_key="sk-test",
+                            collection_name="openai-docs")
+        assert other.vector_store._collection.metadata["embedding_provider"] == "openai"
+        print("Collections in one directory use different providers")
+    finally:
+        shutil.rmtree(persist_directory)
+
+def test_dimensions():
+    """Test shortened embeddings and that a collection keeps its dimensions"""
+    print("\nTesting embedding dimensions")
+    
+    assert truncate_embedding([3.0, 4.0, 12.0], 2) == [0.6, 0.8]
+    assert create_embeddings("openai", openai_api_key="sk-test", dimensions=512).dimensions == 512
+    
+    persist_directory = tempfile.mkdtemp()
+    try:
+        store = VectorStore(persist_directory, embedding_provider="hashing", embedding_dimensions=128)
+        store.add_texts(["The PTO policy grants 20 days of paid leave"], [{"source": "hr.docx"}])
+        assert len(store.embed_texts(["query"])[0]) == 128
+        
+        # Queries against the reopened collection are embedded at the same length
+        reopened = VectorStore(persist_directory)
+        assert reopened.embedding_dimensions == 128
+        assert reopened.similarity_search("paid leave", k=1)[0].metadata["source"] == "hr.docx"
+        
+        try:
+            VectorStore(persist_directory, embedding_dimensions=256)
+            assert False, "expected ValueError"
+        except ValueError as e:
+            print(f"Mismatched dimensions rejected: {e}")
+    finally:
+        shutil.rmtree(persist_directory)
+
+if __name__ == "__main__":
+    test_hashing_embeddings()
+    test_collection_provider()
+    test_dimensions()
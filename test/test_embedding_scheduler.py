@@ -0,0 +1,92 @@
+"""
+Test script for the EmbeddingScheduler module
+"""
+
+import time
+import threading
+from utils.embedding_scheduler import EmbeddingScheduler
+
+class RateLimitError(Exception):
+    """Stand-in for openai.RateLimitError, carrying a status code and response headers"""
+    
+    def __init__(self, headers):
+        super().__init__("rate limited")
+        self.status_code = 429
+        self.response = type("Response", (), {"headers": headers})()
+
+class FakeEmbeddingAPI:
+    """Embeds texts as [length], rejects some requests with 429 and tracks concurrency"""
+    
+    def __init__(self, fail_every=0):
+        self.fail_every = fail_every
+        self.calls = 0
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+    
+    def embed_documents(self, texts):
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(0.01)
+            if self.fail_every and call % self.fail_every == 0:
+                raise RateLimitError({"retry-after-ms": "20"})
+            with self.lock:
+                self.batches.append(list(texts))
+            return [[float(len(text))] for text in texts]
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+def count_words(text):
+    return len(text.split())
+
+count_words.count_batch = lambda texts: [count_words(text) for text in texts]
+
+def test_embedding_scheduler():
+    """Test batching, ordering, concurrency and rate-limit retries"""
+    print("Testing EmbeddingScheduler functionality")
+    
+    texts = [" ".join(["word"] * (i % 7 + 1)) for i in range(200)]
+    
+    api = FakeEmbeddingAPI()
+    scheduler = EmbeddingScheduler(api.embed_documents, max_batch_tokens=30, max_batch_texts=8,
+                                   max_concurrency=4, token_counter=count_words)
+    embeddings = scheduler.embed(texts)
+    assert embeddings == [[float(len(text))] for text in texts]
+    assert all(len(batch) <= 8 and sum(map(count_words, batch)) <= 30 for batch in api.batches)
+    assert 1 < api.max_in_flight <= 4
+    print(f"{len(texts)} texts embedded in order in {api.calls} requests, up to {api.max_in_flight} at once")
+    
+    api = FakeEmbeddingAPI(fail_every=3)
+    scheduler = EmbeddingScheduler(api.embed_documents, max_batch_tokens=30, max_batch_texts=8,
+                                   max_concurrency=4, token_counter=count_words)
+    future = scheduler.submit(texts)
+    assert future.result() == [[float(len(text))] for text in texts]
+    stats = scheduler.stats()
+    assert stats["rate_limited"] > 0 and stats["retries"] == stats["rate_limited"] == future.retries
+    assert stats["failures"] == 0 and stats["texts"] == len(texts)
+    print(scheduler.summary())
+    
+    # Errors that are not transient are raised without retrying
+    def broken(texts):
+        raise ValueError("bad input")
+    scheduler = EmbeddingScheduler(broken, token_counter=count_words)
+    try:
+        scheduler.embed(["text"])
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    assert scheduler.stats()["retries"] == 0
+    print("Non-transient errors are not retried")
+    
+    assert EmbeddingScheduler._header_delay({"x-ratelimit-reset-tokens": "6m0s"}) == 360
+    assert EmbeddingScheduler._header_delay({"retry-after": "2"}) == 2
+    print("Rate-limit headers parsed")
+
+if __name__ == "__main__":
+    test_embedding_scheduler()
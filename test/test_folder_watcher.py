@@ -0,0 +1,97 @@
+"""
+Test script for the FolderWatcher module
+"""
+
+import os
+import time
+import tempfile
+from utils.document_processor import DocumentProcessor
+from utils.folder_watcher import FolderWatcher, Observer
+from utils.ingestion_report import IngestionReport
+
+class RecordingChatbot:
+    """Minimal stand-in for RAGChatbot that records which paths were re-ingested"""
+    
+    def __init__(self):
+        self.document_processor = DocumentProcessor()
+        self.loads = 0
+        self.updates = []
+        # Called while the initial load runs, to make changes the load might miss
+        self.during_load = None
+    
+    def load_documents(self, directory_path=None, max_workers=1):
+        self.loads += 1
+        if self.during_load:
+            self.during_load()
+        return IngestionReport()
+    
+    def update_documents(self, directory_path, changed_paths, max_workers=1):
+        self.updates.append(changed_paths)
+        return IngestionReport()
+
+def test_folder_watcher():
+    """Test that polled changes are debounced into a single update"""
+    print("Testing FolderWatcher functionality (polling)")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        kept = os.path.join(directory, "kept.pdf")
+        removed = os.path.join(directory, "removed.docx")
+        for path in [kept, removed]:
+            with open(path, "w") as f:
+                f.write("original")
+        
+        chatbot = RecordingChatbot()
+        watcher = FolderWatcher(chatbot, directory, debounce_seconds=0.5, poll_interval=0.1, use_watchdog=False)
+        watcher.start()
+        assert chatbot.loads == 1
+        
+        # A burst of changes, including unsupported files that should be ignored
+        added = os.path.join(directory, "added.xlsx")
+        with open(added, "w") as f:
+            f.write("new")
+        with open(os.path.join(directory, "notes.txt"), "w") as f:
+            f.write("ignored")
+        os.remove(removed)
+        
+        time.sleep(1.5)
+        watcher.stop()
+        
+        assert chatbot.updates == [sorted([added, removed])], chatbot.updates
+        print(f"Debounced changes into one update: {[os.path.basename(p) for p in chatbot.updates[0]]}")
+
+def test_folder_watcher_watchdog():
+    """Test that watchdog events, including those during the initial load, are debounced into one update"""
+    print("\nTesting FolderWatcher functionality (watchdog)")
+    if Observer is None:
+        print("watchdog is not installed; skipping")
+        return
+    
+    with tempfile.TemporaryDirectory() as directory:
+        removed = os.path.join(directory, "removed.docx")
+        with open(removed, "w") as f:
+            f.write("original")
+        
+        # A file written while the initial load is running must not be missed
+        during_load = os.path.join(directory, "during_load.pdf")
+        chatbot = RecordingChatbot()
+        chatbot.during_load = lambda: open(during_load, "w").close()
+        watcher = FolderWatcher(chatbot, directory, debounce_seconds=0.5, use_watchdog=True)
+        watcher.start()
+        assert chatbot.loads == 1
+        
+        added = os.path.join(directory, "added.xlsx")
+        with open(added, "w") as f:
+            f.write("new")
+        with open(os.path.join(directory, "notes.txt"), "w") as f:
+            f.write("ignored")
+        os.remove(removed)
+        
+        time.sleep(1.5)
+        watcher.stop()
+        
+        assert chatbot.updates == [sorted([added, during_load, removed])], chatbot.updates
+        print(f"Debounced changes into one update: {[os.path.basename(p) for p in chatbot.updates[0]]}")
+
+if __name__ == "__main__":
+    test_folder_watcher()
+    test_folder_watcher_watchdog()
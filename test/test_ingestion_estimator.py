@@ -0,0 +1,47 @@
+"""
+Test script for the IngestionEstimator module
+"""
+
+import os
+import tempfile
+from docx import Document
+from utils.document_processor import DocumentProcessor
+from utils.ingestion_estimator import IngestionEstimator
+
+def create_test_files(directory, count):
+    """Create identical Word documents, so a sample predicts the rest exactly"""
+    file_paths = []
+    for i in range(count):
+        doc = Document()
+        for j in range(30):
+            doc.add_paragraph(f"Paragraph {j} describes the quarterly figures for region {j % 4}.")
+        file_path = os.path.join(directory, f"report{i}.docx")
+        doc.save(file_path)
+        file_paths.append(file_path)
+    return file_paths
+
+def test_ingestion_estimator():
+    """Test that a sampled estimate matches the real chunk count without touching the quarantine"""
+    print("Testing IngestionEstimator functionality")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        file_paths = create_test_files(directory, 6)
+        broken = os.path.join(directory, "broken.pdf")
+        with open(broken, "w") as f:
+            f.write("not a pdf")
+        
+        processor = DocumentProcessor(chunk_size=300, chunk_overlap=30, quarantine_path=os.path.join(directory, "quarantine.json"))
+        estimate = IngestionEstimator(processor, sample_files=2).estimate(directory)
+        print(IngestionEstimator.summary(estimate))
+        
+        docx = estimate["types"][".docx"]
+        assert docx["files"] == 6 and docx["sampled_files"] == 2
+        assert docx["chunks"] == sum(len(processor.process_file(path)) for path in file_paths)
+        assert docx["tokens"] > 0
+        assert estimate["types"][".pdf"]["failed_files"] == 1
+        assert estimate["totals"]["cost_usd"] > 0
+        assert processor.quarantine.get(broken) is None
+        print("Estimate matches the processed chunk count; quarantine untouched")
+
+if __name__ == "__main__":
+    test_ingestion_estimator()
@@ -0,0 +1,111 @@
+"""
+Test script for the IngestionManifest module
+"""
+
+import os
+import time
+import tempfile
+from utils.ingestion_manifest import IngestionManifest
+
+def test_ingestion_manifest():
+    """Test change detection and persistence of the IngestionManifest class"""
+    print("Testing IngestionManifest functionality")
+    
+    test_dir = tempfile.mkdtemp()
+    manifest_path = os.path.join(test_dir, IngestionManifest.FILENAME)
+    file_path = os.path.join(test_dir, "sample.txt")
+    with open(file_path, "w") as f:
+        f.write("original content")
+    
+    manifest = IngestionManifest(manifest_path)
+    
+    # New files always need ingesting
+    changed, file_info = manifest.check(file_path)
+    assert changed, "New file should be reported as changed"
+    manifest.record(file_path, file_info, ["id-1", "id-2"])
+    manifest.save()
+    print("New file detected and recorded")
+    
+    # A reloaded manifest should skip the unchanged file
+    manifest = IngestionManifest(manifest_path)
+    changed, _ = manifest.check(file_path)
+    assert not changed, "Unchanged file should be skipped"
+    assert manifest.get_chunk_ids(file_path) == ["id-1", "id-2"]
+    print("Unchanged file skipped after reload")
+    
+    # Touching the file without changing its content should not trigger re-ingestion
+    os.utime(file_path, (time.time() + 10, time.time() + 10))
+    changed, _ = manifest.check(file_path)
+    assert not changed, "Touched but unchanged file should be skipped"
+    print("Touched file skipped based on content hash")
+    
+    # Files recorded with other settings need re-ingesting
+    manifest.record(file_path, manifest.check(file_path)[1], ["id-1", "id-2"], settings="chunk_size=1000")
+    assert not manifest.check(file_path, "chunk_size=1000")[0]
+    assert manifest.check(file_path, "chunk_size=200")[0]
+    manifest.record(file_path, manifest.check(file_path)[1], ["id-1", "id-2"])
+    print("File recorded with other settings detected")
+    
+    # Changing the content should
+    with open(file_path, "w") as f:
+        f.write("modified content")
+    changed, _ = manifest.check(file_path)
+    assert changed, "Modified file should be reported as changed"
+    print("Modified file detected")
+    
+    # Deleted files are found under their directory and can be purged
+    os.remove(file_path)
+    assert manifest.files_under(test_dir) == [os.path.abspath(file_path)]
+    assert manifest.remove(file_path) == ["id-1", "id-2"]
+    assert manifest.files_under(test_dir) == []
+    print("Deleted file purged from the manifest")
+    
+    print("\nIngestion manifest test completed successfully")
+
+def test_manifest_checkpoints():
+    """Test that recorded files survive an interrupted run through the journal"""
+    print("\nTesting IngestionManifest checkpoint recovery")
+    
+    test_dir = tempfile.mkdtemp()
+    manifest_path = os.path.join(test_dir, IngestionManifest.FILENAME)
+    file_paths = []
+    for i in range(3):
+        file_path = os.path.join(test_dir, f"sample{i}.txt")
+        with open(file_path, "w") as f:
+            f.write(f"content {i}")
+        file_paths.append(file_path)
+    
+    # Record two files without a final save(), as if the run crashed
+    manifest = IngestionManifest(manifest_path)
+    for i, file_path in enumerate(file_paths[:2]):
+        _, file_info = manifest.check(file_path)
+        manifest.record(file_path, file_info, [f"id-{i}"])
+    with open(manifest.journal_path, "a") as f:
+        f.write('{"op": "record", "pa')
+    
+    manifest = IngestionManifest(manifest_path)
+    assert manifest.recovered == 2
+    assert not manifest.check(file_paths[0])[0]
+    assert not manifest.check(file_paths[1])[0]
+    assert manifest.check(file_paths[2])[0]
+    print("Recovered 2 checkpoints and ignored a torn journal line")
+    
+    # The torn line was cut off, so a checkpoint written after recovery is readable
+    _, file_info = manifest.check(file_paths[2])
+    manifest.record(file_paths[2], file_info, ["id-2"])
+    manifest = IngestionManifest(manifest_path)
+    assert manifest.recovered == 3
+    assert manifest.get_chunk_ids(file_paths[2]) == ["id-2"]
+    print("Checkpoints appended after a torn line are recovered")
+    
+    # Saving folds the journal into the manifest
+    manifest.save()
+    assert not os.path.exists(manifest.journal_path)
+    manifest = IngestionManifest(manifest_path)
+    assert manifest.recovered == 0
+    assert manifest.get_chunk_ids(file_paths[1]) == ["id-1"]
+    print("Journal compacted into the manifest on save")
+
+if __name__ == "__main__":
+    test_ingestion_manifest()
+    test_manifest_checkpoints()
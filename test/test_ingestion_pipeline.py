@@ -0,0 +1,110 @@
+"""
+Test script for the IngestionPipeline module
+"""
+
+import os
+import tempfile
+from concurrent.futures import Future
+from docx import Document
+from utils.document_processor import DocumentProcessor
+from utils.ingestion_pipeline import IngestionPipeline
+from utils.ingestion_report import IngestionReport
+
+class InMemoryStore:
+    """Minimal stand-in for VectorStore that records embedding calls and writes"""
+    
+    def __init__(self):
+        self.rows = {}
+        self.embedded = 0
+    
+    def make_ids(self, texts, metadatas):
+        return [f"{metadata['source']}:{metadata['chunk_index']}:{text}" for text, metadata in zip(texts, metadatas)]
+    
+    def find_new(self, texts, ids):
+        return [i for i, chunk_id in enumerate(ids) if self.rows.get(chunk_id, (None,))[0] != texts[i]]
+    
+    def embed_texts(self, texts):
+        self.embedded += len(texts)
+        return [[float(len(text))] for text in texts]
+    
+    def submit_embeddings(self, texts):
+        future = Future()
+        future.set_result(self.embed_texts(texts))
+        return future
+    
+    def add_embeddings(self, texts, embeddings, metadatas, ids):
+        for text, embedding, metadata, chunk_id in zip(texts, embeddings, metadatas, ids):
+            self.rows[chunk_id] = (text, embedding, metadata)
+        return ids
+
+def create_test_files(directory):
+    """Create a few Word documents with several chunks each"""
+    file_paths = []
+    for i in range(3):
+        doc = Document()
+        for j in range(20):
+            doc.add_paragraph(f"Document {i} paragraph {j} explains part {j} of the ingestion pipeline test.")
+        file_path = os.path.join(directory, f"doc{i}.docx")
+        doc.save(file_path)
+        file_paths.append(file_path)
+    return file_paths
+
+def test_ingestion_pipeline():
+    """Test that the pipeline writes every chunk and skips unchanged chunks on re-runs"""
+    print("Testing IngestionPipeline functionality")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        file_paths = create_test_files(directory)
+        file_paths.append(os.path.join(directory, "missing.pdf"))
+        
+        processor = DocumentProcessor(chunk_size=200, chunk_overlap=20)
+        store = InMemoryStore()
+        pipeline = IngestionPipeline(processor, store, batch_size=4, queue_size=2)
+        
+        done = []
+        num_chunks = pipeline.run(file_paths, on_file_done=lambda path, ids, error: done.append((path, ids, error)))
+        
+        expected = sum(len(processor.process_file(path)) for path in file_paths[:3])
+        assert num_chunks == expected
+        assert len(store.rows) == expected
+        assert store.embedded == expected
+        assert [path for path, _, _ in done] == file_paths
+        assert all(error is None for _, _, error in done[:3])
+        assert done[3][2] is not None
+        assert all(row[2]["file_path"] in file_paths for row in store.rows.values())
+        print(f"Ingested {num_chunks} chunks from {len(done) - 1} files")
+        
+        # A second store starts empty, so its report covers every chunk
+        report = IngestionReport()
+        IngestionPipeline(processor, InMemoryStore(), batch_size=4).run(file_paths, report=report)
+        totals = report.totals()
+        assert report.num_chunks == expected and totals["chunks_embedded"] == expected
+        assert totals["files_ingested"] == 3 and len(report.failures) == 1
+        assert totals["bytes"] == sum(os.path.getsize(path) for path in file_paths[:3])
+        assert totals["tokens_embedded"] > 0
+        assert all(report.files[path]["parse_seconds"] > 0 for path in file_paths[:3])
+        print(report.summary())
+        
+        # Everything is already stored, so nothing is embedded again
+        pipeline.run(file_paths[:3])
+        assert store.embedded == expected
+        print("Re-running the pipeline embedded no chunks")
+        
+        # A file that failed before is skipped, not reported as a new failure
+        bad_pdf = os.path.join(directory, "broken.pdf")
+        with open(bad_pdf, "w") as f:
+            f.write("not a pdf")
+        processor = DocumentProcessor(chunk_size=200, chunk_overlap=20, quarantine_path=os.path.join(directory, "quarantine.json"))
+        report = IngestionReport()
+        IngestionPipeline(processor, InMemoryStore()).run([bad_pdf], report=report)
+        assert report.totals()["files_failed"] == 1
+        report = IngestionReport()
+        done = []
+        IngestionPipeline(processor, InMemoryStore()).run([bad_pdf], report=report,
+                                                         on_file_done=lambda path, ids, error: done.append(path))
+        assert report.totals()["files_failed"] == 0 and report.files[bad_pdf]["status"] == "skipped"
+        assert done == []
+        print("Quarantined file reported as skipped")
+
+if __name__ == "__main__":
+    test_ingestion_pipeline()
@@ -0,0 +1,110 @@
+"""
+Test script for the Quarantine module and per-file isolation in DocumentProcessor
+"""
+
+import os
+import time
+import tempfile
+from docx import Document
+from utils.quarantine import Quarantine
+from utils.document_processor import DocumentProcessor
+
+def test_quarantine():
+    """Test that failed files are skipped until they change"""
+    print("Testing Quarantine functionality")
+    
+    test_dir = tempfile.mkdtemp()
+    quarantine_path = os.path.join(test_dir, Quarantine.FILENAME)
+    bad_pdf = os.path.join(test_dir, "broken.pdf")
+    with open(bad_pdf, "w") as f:
+        f.write("not a pdf")
+    
+    processor = DocumentProcessor(quarantine_path=quarantine_path)
+    results = list(processor.iter_process_files([bad_pdf]))
+    assert results[0][1] is None and results[0][2].startswith("Error processing")
+    assert Quarantine(quarantine_path).get(bad_pdf) is not None
+    print("Failed file quarantined")
+    
+    # The next run skips the file without trying to parse it again
+    processor = DocumentProcessor(quarantine_path=quarantine_path)
+    results = list(processor.iter_process_files([bad_pdf]))
+    assert results[0][2].startswith(f"Skipped {bad_pdf}: quarantined")
+    print("Quarantined file skipped on the next run")
+    
+    # Modifying the file releases it from quarantine
+    with open(bad_pdf, "w") as f:
+        f.write("still not a pdf, but different")
+    quarantine = Quarantine(quarantine_path)
+    assert quarantine.get(bad_pdf) is None
+    assert bad_pdf not in Quarantine(quarantine_path).entries
+    print("Modified file released from quarantine")
+
+class MisbehavingProcessor(DocumentProcessor):
+    """DocumentProcessor whose hang.docx spins in C code and whose hog.docx allocates past max_memory_mb"""
+    
+    def iter_file_records(self, file_path, stats=None):
+        name = os.path.basename(file_path)
+        if name == "hang.docx":
+            # A single C call: the SIGALRM handler cannot run until it returns
+            sum(range(10 ** 11))
+        elif name == "hog.docx":
+            bytearray(4 * self.max_memory_mb * 1024 * 1024)
+        return super().iter_file_records(file_path, stats)
+
+def create_docx(file_path, text):
+    """Write a one-paragraph Word document"""
+    doc = Document()
+    doc.add_paragraph(text)
+    doc.save(file_path)
+
+def test_file_timeout():
+    """Test that a worker stuck past the timeout is terminated and its file quarantined"""
+    print("\nTesting per-file timeout")
+    
+    test_dir = tempfile.mkdtemp()
+    quarantine_path = os.path.join(test_dir, Quarantine.FILENAME)
+    file_paths = [os.path.join(test_dir, name) for name in ["a.docx", "hang.docx", "b.docx", "c.docx"]]
+    for file_path in file_paths:
+        create_docx(file_path, f"Contents of {os.path.basename(file_path)}")
+    
+    processor = MisbehavingProcessor(file_timeout=1, quarantine_path=quarantine_path)
+    started = time.monotonic()
+    results = list(processor.iter_process_files(file_paths, max_workers=2))
+    elapsed = time.monotonic() - started
+    
+    assert [file_path for file_path, _, _ in results] == file_paths
+    assert "timed out" in results[1][2] and results[1][1] is None
+    assert all(error is None and chunks for file_path, chunks, error in results if file_path != file_paths[1])
+    assert Quarantine(quarantine_path).get(file_paths[1]) is not None
+    assert elapsed < 1 + DocumentProcessor.FILE_TIMEOUT_GRACE + 15
+    print(f"Hung worker terminated after {elapsed:.1f}s; the other files completed: {results[1][2]}")
+
+def test_memory_limit():
+    """Test that a file allocating past max_memory_mb fails alone and is quarantined"""
+    print("\nTesting per-file memory limit")
+    
+    try:
+        import resource  # noqa: F401
+    except ImportError:
+        print("Skipped: memory limits need POSIX resource limits")
+        return
+    
+    test_dir = tempfile.mkdtemp()
+    quarantine_path = os.path.join(test_dir, Quarantine.FILENAME)
+    file_paths = [os.path.join(test_dir, name) for name in ["a.docx", "hog.docx", "b.docx"]]
+    for file_path in file_paths:
+        create_docx(file_path, f"Contents of {os.path.basename(file_path)}")
+    
+    processor = MisbehavingProcessor(max_memory_mb=256, quarantine_path=quarantine_path)
+    results = list(processor.iter_process_files(file_paths))
+    
+    assert [file_path for file_path, _, _ in results] == file_paths
+    assert results[1][1] is None and "MemoryError" in results[1][2]
+    assert results[0][2] is None and results[2][2] is None
+    assert Quarantine(quarantine_path).get(file_paths[1]) is not None
+    print(f"Result: {results[1][2]}")
+
+if __name__ == "__main__":
+    test_quarantine()
+    test_file_timeout()
+    test_memory_limit()
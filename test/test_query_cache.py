@@ -0,0 +1,76 @@
+"""
+Test script for the QueryEmbeddingCache module
+"""
+
+import os
+import shutil
+import tempfile
+from langchain_core.embeddings import Embeddings
+from utils.embedding_cache import EmbeddingCache
+from utils.query_cache import QueryEmbeddingCache
+
+class CountingEmbeddings(Embeddings):
+    """Embeds texts as [length, vowels, capitals] and counts query calls"""
+    
+    model = "counting"
+    
+    def __init__(self):
+        self.queries = []
+    
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+    
+    def embed_query(self, text):
+        self.queries.append(text)
+        return [float(len(text)), float(sum(c in "aeiou" for c in text)), float(sum(c.isupper() for c in text))]
+
+def test_query_cache():
+    """Test normalization, LRU eviction, stats and the shared disk cache"""
+    print("Testing QueryEmbeddingCache functionality")
+    
+    embeddings = CountingEmbeddings()
+    cache = QueryEmbeddingCache(embeddings, max_entries=2)
+    
+    first = cache.embed_query("What is the PTO policy?")
+    assert cache.embed_query("  what is the  PTO policy?\n") == first
+    # The first spelling is embedded as written; the normalized text is only the key
+    assert embeddings.queries == ["What is the PTO policy?"]
+    print("Equivalent queries share one embedding call")
+    
+    cache.embed_query("second question")
+    cache.embed_query("what is the pto policy?")
+    cache.embed_query("third question")
+    # "second question" was least recently used, so it was evicted
+    cache.embed_query("second question")
+    assert embeddings.queries.count("second question") == 2
+    assert embeddings.queries.count("What is the PTO policy?") == 1
+    assert "what is the pto policy?" not in embeddings.queries
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 4 and stats["entries"] == 2
+    print(cache.summary())
+    
+    cache_dir = tempfile.mkdtemp()
+    try:
+        disk_cache = EmbeddingCache(os.path.join(cache_dir, EmbeddingCache.FILENAME))
+        QueryEmbeddingCache(CountingEmbeddings(), disk_cache=disk_cache).embed_query("Shared question")
+        
+        # A second process (here, a second wrapper) finds the query on disk
+        other = CountingEmbeddings()
+        shared = QueryEmbeddingCache(other, disk_cache=disk_cache)
+        # The stored vector is the embedding of the original "Shared question"
+        assert shared.embed_query("shared question") == [15.0, 6.0, 1.0]
+        assert other.queries == [] and shared.stats()["disk_hits"] == 1
+        print("Query embeddings shared through the disk cache")
+        
+        # Queries and chunk embeddings of the same text live in separate namespaces
+        assert disk_cache.get_many(shared.model, shared.dimensions, ["shared question"]) == [None]
+        disk_cache.put_many(shared.model, shared.dimensions, ["chunk text"], [[1.0, 2.0, 3.0]])
+        assert shared.embed_query("Chunk text") == [10.0, 2.0, 1.0]
+        assert other.queries == ["Chunk text"]
+        print("Query vectors never collide with chunk embeddings")
+        disk_cache.close()
+    finally:
+        shutil.rmtree(cache_dir)
+
+if __name__ == "__main__":
+    test_query_cache()
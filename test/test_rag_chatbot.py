@@ -3,6 +3,9 @@ Test script for the RAG Chatbot core
 """
 
 import os
+import io
+import tempfile
+from docx import Document
 from rag_chatbot import RAGChatbot
 
 def test_rag_chatbot():
@@ -56,7 +59,7 @@ def test_rag_chatbot():
         
         # Load the sample document
         print("\nLoading sample document...")
-        num_chunks = chatbot.load_documents(file_paths=[sample_file])
+        num_chunks = chatbot.load_documents(file_paths=[sample_file]).num_chunks
         print(f"Loaded {num_chunks} chunks from sample document")
         
         # Test asking questions
@@ -87,5 +90,95 @@ def test_rag_chatbot():
     print("2. Load documents: chatbot.load_documents(file_paths=['document.pdf'])")
     print("3. Ask questions: answer = chatbot.ask('What is in the document?')")
 
+def docx_bytes(paragraphs):
+    """Return a Word document with the given paragraphs as bytes"""
+    doc = Document()
+    for paragraph in paragraphs:
+        doc.add_paragraph(paragraph)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+def test_upload_name_collision():
+    """Test that re-uploading a file leaves a file on disk with the same name alone"""
+    print("\nTesting uploads named like a file on disk")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        # The hashing provider embeds locally, so no real API key is needed
+        chatbot = RAGChatbot(persist_directory=os.path.join(directory, "db"), openai_api_key="sk-test",
+                             embedding_provider="hashing")
+        
+        file_path = os.path.join(directory, "handbook.docx")
+        with open(file_path, "wb") as f:
+            f.write(docx_bytes(["The handbook on disk describes the vacation policy."]))
+        chatbot.load_documents(file_paths=[file_path])
+        disk_ids = chatbot.vector_store.get_ids({"source": "handbook.docx"})
+        assert disk_ids
+        
+        chatbot.load_uploaded_files([("handbook.docx", docx_bytes(["The first upload describes the travel policy."]))])
+        first_upload_ids = chatbot.vector_store.get_ids({"origin": "upload"})
+        assert first_upload_ids
+        
+        chatbot.load_uploaded_files([("handbook.docx", docx_bytes(["The second upload describes the expense policy."]))])
+        upload_ids = chatbot.vector_store.get_ids({"origin": "upload"})
+        assert upload_ids and not set(upload_ids) & set(first_upload_ids)
+        assert set(chatbot.vector_store.get_ids({"source": "handbook.docx"})) == set(disk_ids) | set(upload_ids)
+        print("Re-uploading replaced the previous upload and kept the file on disk")
+
+def test_settings_change():
+    """Test that files are re-ingested when the processing settings change"""
+    print("\nTesting re-ingestion after a chunk_size change")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        persist_directory = os.path.join(directory, "db")
+        file_path = os.path.join(directory, "policy.docx")
+        with open(file_path, "wb") as f:
+            f.write(docx_bytes([f"Paragraph {i} of the policy explains rule {i} in a full sentence." for i in range(20)]))
+        
+        def load(chunk_size):
+            chatbot = RAGChatbot(persist_directory=persist_directory, openai_api_key="sk-test",
+                                 embedding_provider="hashing", chunk_size=chunk_size, chunk_overlap=0)
+            report = chatbot.load_documents(file_paths=[file_path])
+            return chatbot, report
+        
+        chatbot, report = load(1000)
+        large_chunks = chatbot.vector_store.count()
+        assert report.num_chunks == large_chunks
+        
+        # Same settings: the file is skipped
+        _, report = load(1000)
+        assert report.num_chunks == 0 and report.totals()["files_skipped"] == 1
+        
+        # Smaller chunks: the file is re-ingested and its old chunks replaced
+        chatbot, report = load(200)
+        assert report.num_chunks > large_chunks
+        assert chatbot.vector_store.count() == report.num_chunks
+        print(f"Re-ingested {report.num_chunks} chunks (previously {large_chunks}) after chunk_size changed")
+
+def test_quarantined_skip():
+    """Test that a quarantined file is reported as skipped, not as a new failure"""
+    print("\nTesting quarantined files in the ingestion report")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        chatbot = RAGChatbot(persist_directory=os.path.join(directory, "db"), openai_api_key="sk-test",
+                             embedding_provider="hashing")
+        bad_pdf = os.path.join(directory, "broken.pdf")
+        with open(bad_pdf, "w") as f:
+            f.write("not a pdf")
+        
+        report = chatbot.load_documents(file_paths=[bad_pdf])
+        assert report.totals()["files_failed"] == 1 and len(report.failures) == 1
+        
+        # The next run skips the file and gives the quarantine as the reason
+        report = chatbot.load_documents(file_paths=[bad_pdf])
+        totals = report.totals()
+        assert totals["files_failed"] == 0 and totals["files_skipped"] == 1 and not report.failures
+        assert report.files[bad_pdf]["status"] == "skipped"
+        assert report.files[bad_pdf]["error"].startswith("quarantined after an earlier failure")
+        print("Quarantined file recorded as skipped with its reason")
+
 if __name__ == "__main__":
     test_rag_chatbot()
+    test_upload_name_collision()
+    test_settings_change()
+    test_quarantined_skip()
@@ -0,0 +1,84 @@
+"""
+Test script for the FastRecursiveSplitter module
+"""
+
+import random
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from utils.text_splitter import FastRecursiveSplitter, get_token_counter
+from utils.document_processor import DocumentProcessor
+
+def random_text(rng, length):
+    """Build text from words, spaces, newlines and paragraph breaks"""
+    pieces = ["alpha", "beta", "gamma", "x" * 40, " ", " ", "\n", "\n\n", ". "]
+    return "".join(rng.choice(pieces) for _ in range(length))
+
+def test_matches_langchain():
+    """Test that chunks are identical to RecursiveCharacterTextSplitter's"""
+    print("Testing FastRecursiveSplitter against RecursiveCharacterTextSplitter")
+    
+    rng = random.Random(0)
+    for case in range(300):
+        chunk_size = rng.randint(5, 300)
+        chunk_overlap = rng.randint(0, chunk_size - 1)
+        text = random_text(rng, rng.randint(0, 400))
+        expected = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap).split_text(text)
+        actual = FastRecursiveSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap).split_text(text)
+        assert actual == expected, f"case {case}: chunk_size={chunk_size}, chunk_overlap={chunk_overlap}"
+    print("300 random texts split identically")
+    
+    # Custom length functions are measured the same way as well
+    word_count = lambda s: len(s.split())
+    text = random_text(rng, 2000)
+    expected = RecursiveCharacterTextSplitter(chunk_size=50, chunk_overlap=10, length_function=word_count).split_text(text)
+    actual = FastRecursiveSplitter(chunk_size=50, chunk_overlap=10, length_function=word_count).split_text(text)
+    assert actual == expected
+    print("Custom length function split identically")
+
+def test_offsets():
+    """Test that chunk offsets point at the chunks, even in repetitive text"""
+    print("\nTesting chunk offsets")
+    
+    text = "".join(f"Line {i % 3} repeats here.\n\n" for i in range(200))
+    splitter = FastRecursiveSplitter(chunk_size=100, chunk_overlap=30)
+    located = splitter.split_text_with_offsets(text)
+    assert all(text[start:start + len(chunk)] == chunk for start, chunk in located)
+    assert [start for start, _ in located] == sorted(start for start, _ in located)
+    assert located[-1][0] + len(located[-1][1]) == len(text.rstrip())
+    print(f"{len(located)} chunks located exactly")
+    
+    # Chunks from LangChain's splitter are located past the overlap, not at earlier repeats
+    chunks = RecursiveCharacterTextSplitter(chunk_size=100, chunk_overlap=30).split_text(text)
+    assert FastRecursiveSplitter.locate_chunks(text, chunks, 30) == located
+    print("LangChain chunks located at the same offsets")
+
+def test_token_lengths():
+    """Test chunking measured in tokens"""
+    print("\nTesting token-length chunking")
+    
+    # Batched measurement splits exactly like measuring one piece at a time
+    word_count = lambda s: len(s.split())
+    batch_word_count = lambda texts: [len(t.split()) for t in texts]
+    text = random_text(random.Random(1), 2000)
+    expected = RecursiveCharacterTextSplitter(chunk_size=40, chunk_overlap=8, length_function=word_count).split_text(text)
+    actual = FastRecursiveSplitter(chunk_size=40, chunk_overlap=8, length_function=word_count,
+                                   batch_length_function=batch_word_count).split_text(text)
+    assert actual == expected
+    print("Batched lengths split identically")
+    
+    counter = get_token_counter()
+    assert get_token_counter("cl100k_base") is counter
+    print(f"Token counter exact: {counter.exact}")
+    
+    processor = DocumentProcessor(chunk_size=100, chunk_overlap=20, length_unit="tokens")
+    documents = [Document(page_content=random_text(random.Random(page), 300), metadata={"page": page})
+                 for page in range(20)]
+    chunks = list(processor.iter_chunks(documents))
+    counts = counter.count_batch(chunks)
+    assert chunks and max(counts) <= 100
+    print(f"{len(chunks)} chunks, {min(counts)}-{max(counts)} tokens each")
+
+if __name__ == "__main__":
+    test_matches_langchain()
+    test_offsets()
+    test_token_lengths()
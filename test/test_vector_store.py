@@ -3,6 +3,7 @@ Test script for the VectorStore module
 """
 
 import os
+import tempfile
 from utils.vector_store import VectorStore
 from langchain_core.documents import Document
 
@@ -97,5 +98,46 @@ def test_vector_store():
     print("3. Search: results = vector_store.similarity_search(query)")
     print("4. Get retriever: retriever = vector_store.get_retriever()")
 
+def test_chunk_ids():
+    """Test deterministic chunk IDs and that upserts skip unchanged chunks"""
+    print("\nTesting chunk IDs and upserts")
+    
+    with tempfile.TemporaryDirectory() as persist_directory:
+        # The hashing provider embeds locally, so no API key is needed
+        vector_store = VectorStore(persist_directory, embedding_provider="hashing", openai_api_key="")
+        
+        embedded = []
+        embed_texts = vector_store.embed_texts
+        vector_store.embed_texts = lambda texts: embedded.extend(texts) or embed_texts(texts)
+        
+        texts = ["Vacation requests go to your manager.", "Expenses are reimbursed monthly."]
+        metadatas = [{"source": "handbook.docx", "file_path": "/docs/a/handbook.docx", "chunk_index": i} for i in range(2)]
+        ids = vector_store.make_ids(texts, metadatas)
+        assert ids == vector_store.make_ids(texts, metadatas) and len(set(ids)) == 2
+        
+        # A same-named file with identical content elsewhere gets its own IDs
+        other_metadatas = [{**metadata, "file_path": "/docs/b/handbook.docx"} for metadata in metadatas]
+        assert not set(vector_store.make_ids(texts, other_metadatas)) & set(ids)
+        print("Chunk IDs are deterministic and distinct per file")
+        
+        assert vector_store.upsert_texts(texts, metadatas) == ids
+        assert vector_store.upsert_texts(texts, metadatas) == ids
+        assert len(embedded) == 2 and vector_store.count() == 2
+        
+        # Only the changed chunk is embedded again, under a new ID
+        new_ids = vector_store.upsert_texts([texts[0], "Expenses are reimbursed weekly."], metadatas)
+        assert embedded[2:] == ["Expenses are reimbursed weekly."]
+        assert new_ids[0] == ids[0] and new_ids[1] != ids[1] and vector_store.count() == 3
+        print("Upserts skipped unchanged chunks")
+        
+        documents = [Document(page_content=text, metadata=metadata) for text, metadata in zip(texts, other_metadatas)]
+        doc_ids = vector_store.add_documents(documents)
+        assert doc_ids == vector_store.add_documents(documents) == vector_store.make_ids(texts, other_metadatas)
+        assert vector_store.count() == 5
+        # Documents are embedded through embed_texts (scheduler and embedding cache) too
+        assert embedded[3:] == texts + texts
+        print("add_documents uses the same IDs and embed path, so re-adding documents stores no duplicates")
+
 if __name__ == "__main__":
     test_vector_store()
+    test_chunk_ids()
@@ -4,5 +4,23 @@ Utility modules for the RAG Chatbot
 
 from .document_processor import DocumentProcessor
 from .vector_store import VectorStore
+from .ingestion_manifest import IngestionManifest
+from .text_cache import ExtractedTextCache
+from .dedup import BoilerplateFilter, NearDuplicateFilter
+from .ingestion_pipeline import IngestionPipeline
+from .folder_watcher import FolderWatcher
+from .quarantine import Quarantine
+from .text_splitter import FastRecursiveSplitter
+from .ingestion_report import IngestionReport
+from .ingestion_estimator import IngestionEstimator
+from .embedding_scheduler import EmbeddingScheduler
+from .embedding_cache import EmbeddingCache
+from .query_cache import QueryEmbeddingCache
+from .embedding_providers import HashingEmbeddings, SentenceTransformerEmbeddings, create_embeddings, truncate_embedding
 
-__all__ = ['DocumentProcessor', 'VectorStore']
\ No newline at end of file
+__all__ = ['DocumentProcessor', 'VectorStore', 'IngestionManifest', 'ExtractedTextCache',
+           'BoilerplateFilter', 'NearDuplicateFilter', 'IngestionPipeline',
+           'FolderWatcher', 'Quarantine', 'FastRecursiveSplitter',
+           'IngestionReport', 'IngestionEstimator', 'EmbeddingScheduler',
+           'EmbeddingCache', 'QueryEmbeddingCache', 'HashingEmbeddings',
+           'SentenceTransformerEmbeddings', 'create_embeddings', 'truncate_embedding']
\ No newline at end of file
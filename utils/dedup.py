@@ -0,0 +1,187 @@
+"""
+Deduplication Module for RAG Chatbot
+Removes repeated page boilerplate and near-duplicate chunks before they are embedded.
+"""
+
+import re
+import hashlib
+from collections import Counter
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+
+from langchain_core.documents import Document
+
+
+class BoilerplateFilter:
+    """
+    Strips lines that repeat across the pages of a document (headers, footers, disclaimers).
+    
+    Repeated lines are learned from the first sample_pages pages. Only the first and
+    last edge_lines lines of each page are considered, where headers and footers
+    live. Lines are compared after normalization (case, whitespace, and digits, so
+    "Page 3 of 10" matches "Page 4 of 10"), and a line counts as boilerplate when it
+    appears on at least min_fraction of the sampled pages and on at least min_pages
+    of them.
+    """
+    
+    def __init__(self, sample_pages: int = 20, min_pages: int = 3, min_fraction: float = 0.5, edge_lines: int = 3):
+        """
+        Initialize the filter.
+        
+        Args:
+            sample_pages: Number of leading pages used to learn boilerplate lines
+            min_pages: Minimum number of sampled pages a line must appear on
+            min_fraction: Minimum fraction of sampled pages a line must appear on
+            edge_lines: Number of lines at the top and bottom of each page to consider
+        """
+        self.sample_pages = sample_pages
+        self.min_pages = min_pages
+        self.min_fraction = min_fraction
+        self.edge_lines = edge_lines
+        self.boilerplate = set()
+    
+    @staticmethod
+    def normalize(line: str) -> str:
+        """Normalize a line for comparison across pages."""
+        return re.sub(r"\s+", " ", re.sub(r"\d+", "#", line)).strip().lower()
+    
+    def filter(self, documents: Iterable[Document], stats: Optional[Dict[str, int]] = None) -> Iterator[Document]:
+        """
+        Yield documents with boilerplate lines removed.
+        
+        Only the first sample_pages documents are buffered, so memory stays bounded.
+        
+        Args:
+            documents: Iterable of page documents
+            stats: Optional dictionary updated with boilerplate_lines_removed and
+                boilerplate_chars_removed counts
+        
+        Yields:
+            Documents with boilerplate lines removed
+        """
+        documents = iter(documents)
+        sample = []
+        for doc in documents:
+            sample.append(doc)
+            if len(sample) >= self.sample_pages:
+                break
+        
+        self.boilerplate = self._learn(sample)
+        
+        for doc in sample:
+            yield self._strip(doc, stats)
+        for doc in documents:
+            yield self._strip(doc, stats)
+    
+    def _learn(self, pages: List[Document]) -> set:
+        """Find the normalized lines that repeat across the sampled pages."""
+        if len(pages) < self.min_pages:
+            return set()
+        
+        counts = Counter()
+        for doc in pages:
+            lines = doc.page_content.splitlines()
+            edges = {self.normalize(lines[i]) for i in self._edge_indexes(len(lines))}
+            counts.update(edges - {""})
+        
+        threshold = max(self.min_pages, self.min_fraction * len(pages))
+        return {line for line, count in counts.items() if count >= threshold}
+    
+    def _edge_indexes(self, num_lines: int) -> set:
+        """Return the indexes of the lines at the top and bottom of a page."""
+        return set(range(min(self.edge_lines, num_lines))) | set(range(max(0, num_lines - self.edge_lines), num_lines))
+    
+    def _strip(self, doc: Document, stats: Optional[Dict[str, int]]) -> Document:
+        """Remove boilerplate lines from a document."""
+        if not self.boilerplate:
+            return doc
+        
+        lines = doc.page_content.splitlines()
+        edges = self._edge_indexes(len(lines))
+        
+        kept = []
+        for i, line in enumerate(lines):
+            if i in edges and self.normalize(line) in self.boilerplate:
+                if stats is not None:
+                    stats["boilerplate_lines_removed"] = stats.get("boilerplate_lines_removed", 0) + 1
+                    stats["boilerplate_chars_removed"] = stats.get("boilerplate_chars_removed", 0) + len(line) + 1
+            else:
+                kept.append(line)
+        
+        return Document(page_content="\n".join(kept), metadata=doc.metadata)
+
+
+class NearDuplicateFilter:
+    """
+    Drops chunks that are exact or near duplicates of an earlier chunk, using 64-bit SimHash.
+    
+    Fingerprints are built from word shingles. Two chunks are near duplicates when
+    their fingerprints differ in at most max_distance bits. Candidates are found
+    through a banded index (the fingerprint split into max_distance + 1 bands, at
+    least one of which must match exactly), so each lookup touches only a few
+    earlier chunks.
+    """
+    
+    def __init__(self, max_distance: int = 3, shingle_size: int = 3):
+        """
+        Initialize the filter.
+        
+        Args:
+            max_distance: Maximum Hamming distance between near-duplicate fingerprints
+            shingle_size: Number of words per shingle
+        """
+        self.max_distance = max_distance
+        self.shingle_size = shingle_size
+        self.num_bands = max_distance + 1
+        self.band_bits = 64 // self.num_bands
+        self.bands: List[Dict[int, List[int]]] = [{} for _ in range(self.num_bands)]
+    
+    def simhash(self, text: str) -> int:
+        """Compute the 64-bit SimHash fingerprint of a text."""
+        words = re.findall(r"\w+", text.lower())
+        shingles = [
+            " ".join(words[i:i + self.shingle_size])
+            for i in range(max(1, len(words) - self.shingle_size + 1))
+        ]
+        
+        weights = [0] * 64
+        for shingle, count in Counter(shingles).items():
+            value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+            for bit in range(64):
+                weights[bit] += count if value >> bit & 1 else -count
+        
+        return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+    
+    def is_duplicate(self, text: str) -> bool:
+        """Return True if text duplicates a chunk seen earlier, otherwise remember it."""
+        fingerprint = self.simhash(text)
+        mask = (1 << self.band_bits) - 1
+        keys = [fingerprint >> (band * self.band_bits) & mask for band in range(self.num_bands)]
+        
+        for band, key in enumerate(keys):
+            for other in self.bands[band].get(key, []):
+                if bin(fingerprint ^ other).count("1") <= self.max_distance:
+                    return True
+        
+        for band, key in enumerate(keys):
+            self.bands[band].setdefault(key, []).append(fingerprint)
+        return False
+    
+    def filter(self, records: Iterable[Dict[str, Any]], stats: Optional[Dict[str, int]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield chunk records that are not near duplicates of an earlier record.
+        
+        Args:
+            records: Iterable of {"text", "metadata"} chunk records
+            stats: Optional dictionary updated with duplicate_chunks_dropped and
+                duplicate_chars_dropped counts
+        
+        Yields:
+            The first occurrence of each distinct chunk
+        """
+        for record in records:
+            if self.is_duplicate(record["text"]):
+                if stats is not None:
+                    stats["duplicate_chunks_dropped"] = stats.get("duplicate_chunks_dropped", 0) + 1
+                    stats["duplicate_chars_dropped"] = stats.get("duplicate_chars_dropped", 0) + len(record["text"])
+                continue
+            yield record
@@ -4,14 +4,31 @@ Handles extraction of text from Word documents, Excel files, and PDFs using Lang
 """
 
 import os
+import io
+import sys
+import csv
+import zipfile
+import copy
+import time
+import bisect
+import collections
+import docx2txt
 import pandas as pd
-from typing import List, Dict, Any, Optional
+import signal
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator, Union, BinaryIO, Callable
 
 # LangChain components
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader, UnstructuredExcelLoader
+from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader
 from langchain_core.documents import Document
 
+from utils.text_cache import ExtractedTextCache
+from utils.text_splitter import FastRecursiveSplitter, get_token_counter
+from utils.dedup import BoilerplateFilter, NearDuplicateFilter
+from utils.quarantine import Quarantine
+
 
 class DocumentProcessor:
     """
@@ -19,21 +36,157 @@ class DocumentProcessor:
     using LangChain document loaders.
     """
     
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+    SUPPORTED_EXTENSIONS = ['.pdf', '.docx', '.xlsx', '.xls']
+    
+    # Number of chunks' worth of text buffered before the streaming splitter runs
+    STREAM_BUFFER_CHUNKS = 8
+    
+    # Bump when loader output changes, to invalidate the extracted-text cache
+    EXTRACTION_VERSION = 2
+    
+    # Per-file stats that are timings and retry counts rather than deduplication counts
+    FILE_STATS = ['parse_seconds', 'split_seconds', 'retries']
+    
+    # Loader metadata fields carried over to chunk records
+    CHUNK_METADATA_KEYS = ['file_type', 'page', 'page_label', 'sheet_name', 'row_range']
+    
+    # Sheets with more data rows than this are split into row windows
+    EXCEL_SMALL_SHEET_ROWS = 50
+    
+    # Number of rows per Excel row-window document
+    EXCEL_WINDOW_ROWS = 25
+    
+    # How sheets are represented as documents:
+    #   small_whole:       small sheets as one document, large sheets as row windows
+    #   windows:           every sheet as row windows
+    #   summary_windows:   small sheets whole, large sheets as row windows plus a summary
+    #   whole_and_windows: legacy; large sheets as a whole-sheet document and row windows
+    #                      (embeds each row twice and holds whole sheets in memory)
+    EXCEL_MODES = ['small_whole', 'windows', 'summary_windows', 'whole_and_windows']
+    
+    # How sheet rows are serialized:
+    #   text:     DataFrame.to_string() with aligned, whitespace-padded columns
+    #   csv, tsv: delimited rows
+    #   markdown: minimal pipe table
+    # The compact formats drop all-empty columns, render empty cells as nothing
+    # and format numbers without padding.
+    TABLE_FORMATS = ['text', 'csv', 'tsv', 'markdown']
+    
+    # Rough characters-per-token ratio used for cost estimates
+    CHARS_PER_TOKEN = 4
+    
+    # Text splitter implementations; both produce identical chunks
+    #   fast:      single-pass FastRecursiveSplitter
+    #   langchain: LangChain's RecursiveCharacterTextSplitter
+    SPLITTERS = ['fast', 'langchain']
+    
+    # Units chunk_size and chunk_overlap are measured in:
+    #   chars:  characters (len)
+    #   tokens: tokens of a tiktoken encoding, so chunks match embedding and prompt budgets
+    LENGTH_UNITS = ['chars', 'tokens']
+    
+    # PDF text extraction backends ("auto" benchmarks both on a sample of pages)
+    PDF_BACKENDS = ['pypdf', 'pdfminer', 'auto']
+    
+    # PDFs with fewer pages than this are never split across worker processes
+    PDF_PARALLEL_MIN_PAGES = 50
+    
+    # Number of leading pages extracted with each backend when choosing one automatically
+    PDF_BACKEND_SAMPLE_PAGES = 3
+    
+    # A backend recovering this many times more text than the other is always chosen
+    PDF_BACKEND_TEXT_RATIO = 1.2
+    
+    # Seconds past file_timeout after which a worker that ignored its timeout signal
+    # (e.g. stuck in C code) is terminated from the parent process
+    FILE_TIMEOUT_GRACE = 5.0
+    
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200, excel_mode: str = "small_whole",
+                 table_format: str = "text", float_format: Optional[str] = None,
+                 pdf_backend: str = "pypdf", pdf_page_workers: Optional[int] = 1,
+                 cache_dir: Optional[str] = None, dedupe: bool = False,
+                 file_timeout: Optional[float] = None, max_memory_mb: Optional[int] = None,
+                 quarantine_path: Optional[str] = None, splitter: str = "fast",
+                 length_unit: str = "chars", encoding_name: str = "cl100k_base"):
         """
         Initialize the DocumentProcessor with text chunking parameters.
         
         Args:
-            chunk_size: The size of text chunks for splitting documents
-            chunk_overlap: The overlap between consecutive chunks
+            chunk_size: The size of text chunks for splitting documents, in length_unit
+            chunk_overlap: The overlap between consecutive chunks, in length_unit
+            excel_mode: How Excel sheets are represented, one of EXCEL_MODES
+            table_format: How Excel rows are serialized, one of TABLE_FORMATS
+            float_format: Format spec for floats in compact table formats (e.g. ".2f");
+                by default floats are rounded to 6 decimals with trailing zeros removed
+            pdf_backend: PDF text extraction backend, one of PDF_BACKENDS
+            pdf_page_workers: Number of worker processes used to extract the pages of a
+                single large PDF; 1 (the default) reads pages sequentially, None uses
+                one worker per CPU
+            cache_dir: Directory for the extracted-text cache; None disables caching.
+                Cached text is keyed by file content and loader settings only, so
+                changing chunk_size/chunk_overlap re-runs just the splitter.
+            dedupe: Strip lines repeated across pages (headers, footers, disclaimers) and
+                drop near-duplicate chunks of PDF and Word files before embedding
+            file_timeout: Wall-clock seconds a single file may take to process
+                (None for no limit)
+            max_memory_mb: Memory, in MB, a worker process may allocate on top of its
+                baseline while processing files (None for no limit)
+            quarantine_path: JSON file recording files that failed to process, so they
+                are skipped on later runs until they change (None disables the quarantine)
+            splitter: Text splitter implementation, one of SPLITTERS
+            length_unit: Unit of chunk_size and chunk_overlap, one of LENGTH_UNITS
+            encoding_name: tiktoken encoding used to count tokens when length_unit is
+                "tokens" (estimated at CHARS_PER_TOKEN characters per token if tiktoken
+                is unavailable)
+        
+        Setting file_timeout or max_memory_mb processes every file in a worker process,
+        even with max_workers=1, so a hanging or runaway file cannot take down the run.
+        Both limits rely on POSIX signals and resource limits and are ignored where
+        those are unavailable.
         """
+        if excel_mode not in self.EXCEL_MODES:
+            raise ValueError(f"Unsupported Excel mode: {excel_mode}")
+        if table_format not in self.TABLE_FORMATS:
+            raise ValueError(f"Unsupported table format: {table_format}")
+        if pdf_backend not in self.PDF_BACKENDS:
+            raise ValueError(f"Unsupported PDF backend: {pdf_backend}")
+        if splitter not in self.SPLITTERS:
+            raise ValueError(f"Unsupported splitter: {splitter}")
+        if length_unit not in self.LENGTH_UNITS:
+            raise ValueError(f"Unsupported length unit: {length_unit}")
+        
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len
-        )
+        self.excel_mode = excel_mode
+        self.table_format = table_format
+        self.float_format = float_format
+        self.pdf_backend = pdf_backend
+        self.pdf_page_workers = pdf_page_workers
+        self.text_cache = ExtractedTextCache(cache_dir) if cache_dir else None
+        self.dedupe = dedupe
+        self.dedup_stats: Dict[str, int] = {}
+        self.file_timeout = file_timeout
+        self.max_memory_mb = max_memory_mb
+        self.isolate = file_timeout is not None or max_memory_mb is not None
+        self.quarantine = Quarantine(quarantine_path) if quarantine_path else None
+        self.splitter = splitter
+        self.length_unit = length_unit
+        self.encoding_name = encoding_name
+        self.token_counter = get_token_counter(encoding_name) if length_unit == "tokens" else None
+        
+        if splitter == "fast":
+            self.text_splitter = FastRecursiveSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                length_function=self.token_counter or len,
+                batch_length_function=self.token_counter.count_batch if self.token_counter else None
+            )
+        else:
+            self.text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                length_function=self.token_counter or len
+            )
     
     def process_file(self, file_path: str) -> List[str]:
         """
@@ -41,75 +194,788 @@ class DocumentProcessor:
         
         Args:
             file_path: Path to the document file
-            
+        
         Returns:
             List of text chunks extracted from the document
         
+        Raises:
+            ValueError: If the file format is not supported
+        """
+        return list(self.process_file_iter(file_path))
+    
+    def process_file_records(self, file_path: str) -> List[Dict[str, Any]]:
+        """
+        Process a file and return chunk records carrying their location metadata.
+        
+        Args:
+            file_path: Path to the document file
+        
+        Returns:
+            List of {"text": chunk, "metadata": {...}} records (see iter_chunk_records)
+        
+        Raises:
+            ValueError: If the file format is not supported
+        """
+        return list(self.iter_file_records(file_path))
+    
+    def process_file_iter(self, file_path: str) -> Iterator[str]:
+        """
+        Process a file lazily, yielding text chunks as pages are read.
+        
+        Unlike building the whole document text up front, peak memory is bounded
+        by a few chunks' worth of text plus the current page.
+        
+        Args:
+            file_path: Path to the document file
+        
+        Yields:
+            Text chunks extracted from the document, in document order
+        
+        Raises:
+            ValueError: If the file format is not supported
+        """
+        for record in self.iter_file_records(file_path):
+            yield record["text"]
+    
+    def iter_file_records(self, file_path: str, stats: Optional[Dict[str, int]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Process a file lazily, yielding chunk records as pages are read.
+        
+        Args:
+            file_path: Path to the document file
+            stats: Optional dictionary updated with deduplication counts and the
+                parse_seconds/split_seconds spent loading and splitting; defaults to
+                the processor's dedup_stats (without timings)
+        
+        Yields:
+            {"text": chunk, "metadata": {...}} records, in document order
+        
         Raises:
             ValueError: If the file format is not supported
         """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
         
-        file_extension = os.path.splitext(file_path)[1].lower()
+        return self._iter_records(file_path, os.path.splitext(file_path)[1].lower(), None, stats)
+    
+    def process_bytes(self, data: Union[bytes, BinaryIO], file_type: str, name: Optional[str] = None) -> List[str]:
+        """
+        Process an in-memory document and return chunked text.
+        
+        Args:
+            data: File contents as bytes or a binary file-like object
+            file_type: Document type, e.g. "pdf" or ".docx" (see SUPPORTED_EXTENSIONS)
+            name: Name recorded as the chunks' source (defaults to "<memory>.{type}")
+        
+        Returns:
+            List of text chunks extracted from the document
+        
+        Raises:
+            ValueError: If the file format is not supported
+        """
+        return [record["text"] for record in self.iter_bytes_records(data, file_type, name)]
+    
+    def iter_bytes_records(self, data: Union[bytes, BinaryIO], file_type: str, name: Optional[str] = None,
+                           stats: Optional[Dict[str, int]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Process an in-memory document lazily, yielding chunk records.
+        
+        The data is handed to the loaders directly, without writing a temporary file.
+        
+        Args:
+            data: File contents as bytes or a binary file-like object (must be seekable)
+            file_type: Document type, e.g. "pdf" or ".docx" (see SUPPORTED_EXTENSIONS)
+            name: Name recorded as the chunks' source (defaults to "<memory>.{type}")
+            stats: Optional dictionary updated with deduplication counts and the
+                parse_seconds/split_seconds spent loading and splitting; defaults to
+                the processor's dedup_stats (without timings)
+        
+        Yields:
+            {"text": chunk, "metadata": {...}} records, in document order
+        
+        Raises:
+            ValueError: If the file format is not supported
+        """
+        file_extension = "." + file_type.lower().lstrip(".")
+        if file_extension not in self.SUPPORTED_EXTENSIONS:
+            raise ValueError(f"Unsupported file format: {file_extension}")
+        
+        stream = io.BytesIO(data) if isinstance(data, (bytes, bytearray, memoryview)) else data
+        return self._iter_records(name or f"<memory>{file_extension}", file_extension, stream, stats)
+    
+    def iter_zip_records(self, data: Union[bytes, BinaryIO, str],
+                         stats: Optional[Dict[str, int]] = None) -> Iterator[Tuple[str, Iterator[Dict[str, Any]]]]:
+        """
+        Process the supported documents inside a zip archive without extracting it to disk.
+        
+        Members are read into memory one at a time, in archive order; unsupported
+        members and directories are skipped.
+        
+        Args:
+            data: Archive as bytes, a binary file-like object or a path
+            stats: Optional dictionary updated with deduplication counts and the
+                parse_seconds/split_seconds spent loading and splitting; defaults to
+                the processor's dedup_stats (without timings)
+        
+        Yields:
+            (member_name, records) pairs, where records lazily yields the member's
+            chunk records (see iter_bytes_records)
+        """
+        archive_file = io.BytesIO(data) if isinstance(data, (bytes, bytearray, memoryview)) else data
+        
+        with zipfile.ZipFile(archive_file) as archive:
+            for member in archive.infolist():
+                file_extension = os.path.splitext(member.filename)[1].lower()
+                if member.is_dir() or file_extension not in self.SUPPORTED_EXTENSIONS:
+                    continue
+                
+                # Loaders need random access, which compressed members don't offer cheaply
+                stream = io.BytesIO(archive.read(member))
+                yield member.filename, self._iter_records(member.filename, file_extension, stream, stats)
+    
+    def _iter_records(self, file_path: str, file_extension: str, stream: Optional[BinaryIO],
+                      stats: Optional[Dict[str, int]]) -> Iterator[Dict[str, Any]]:
+        """Load, deduplicate and split a file (or an in-memory stream named file_path) into chunk records."""
+        # Timings are only reported to callers' own stats, not to the running dedup totals
+        timings = {} if stats is None else stats
+        if stats is None:
+            stats = self.dedup_stats
         
-        # Load documents using LangChain document loaders
         try:
-            if file_extension == '.pdf':
-                documents = self._load_pdf(file_path)
-            elif file_extension == '.docx':
-                documents = self._load_docx(file_path)
-            elif file_extension in ['.xlsx', '.xls']:
-                documents = self._load_excel(file_path)
-            else:
-                raise ValueError(f"Unsupported file format: {file_extension}")
+            # Load documents lazily and split them as they arrive
+            # Some loaders (e.g. in-memory Word files) parse when called, so time the call too
+            documents = _timed(lambda: self._iter_documents(file_path, file_extension, stream), timings, "parse_seconds")
             
-            # Extract text from documents
-            text = self._extract_text_from_documents(documents)
+            # Spreadsheets are left alone: their repeated header lines and similar rows are data
+            dedupe = self.dedupe and file_extension in ['.pdf', '.docx']
+            if dedupe:
+                documents = BoilerplateFilter().filter(documents, stats)
             
-            # Split the text into chunks
-            return self.text_splitter.split_text(text)
+            records = self.iter_chunk_records(documents)
+            if dedupe:
+                records = NearDuplicateFilter().filter(records, stats)
             
+            # Splitting time is whatever producing the records took beyond loading the documents
+            yield from _timed(lambda: records, timings, "split_seconds", "parse_seconds")
         except Exception as e:
-            raise Exception(f"Error processing {file_path}: {str(e)}")
+            raise Exception(f"Error processing {file_path}: {str(e) or type(e).__name__}")
+    
+    def dedup_report(self) -> Dict[str, int]:
+        """
+        Summarize what deduplication has saved so far.
+        
+        Returns:
+            Dictionary with chunks_saved, tokens_saved (estimated at CHARS_PER_TOKEN
+            characters per token), boilerplate_lines_removed and
+            duplicate_chunks_dropped
+        """
+        chars_saved = self.dedup_stats.get("boilerplate_chars_removed", 0) + self.dedup_stats.get("duplicate_chars_dropped", 0)
+        return {
+            "chunks_saved": self.dedup_stats.get("duplicate_chunks_dropped", 0),
+            "tokens_saved": chars_saved // self.CHARS_PER_TOKEN,
+            "boilerplate_lines_removed": self.dedup_stats.get("boilerplate_lines_removed", 0),
+            "duplicate_chunks_dropped": self.dedup_stats.get("duplicate_chunks_dropped", 0)
+        }
+    
+    def iter_chunks(self, documents: Iterable[Document]) -> Iterator[str]:
+        """
+        Split a stream of documents into text chunks (see iter_chunk_records).
+        
+        Args:
+            documents: Iterable of LangChain Document objects (e.g. pages)
+        
+        Yields:
+            Text chunks
+        """
+        for record in self.iter_chunk_records(documents):
+            yield record["text"]
+    
+    def iter_chunk_records(self, documents: Iterable[Document]) -> Iterator[Dict[str, Any]]:
+        """
+        Split a stream of documents into chunk records, carrying text across document boundaries.
+        
+        Text is buffered until it holds STREAM_BUFFER_CHUNKS chunks' worth of characters
+        (token chunk sizes are converted at CHARS_PER_TOKEN characters per token),
+        then split. The trailing chunk is held back and re-split together with the
+        following pages, so chunks that straddle a page boundary come out whole.
+        Excel documents are self-contained (each repeats its headers) and are split
+        on their own rather than merged with their neighbours.
+        
+        Because the splitter only ever sees the buffered text, chunk boundaries can
+        differ from those of split_text() over the whole text at once, where a
+        separator further ahead may be chosen. Every chunk still fits chunk_size, and
+        together the chunks cover all of the text.
+        
+        Each record's metadata holds the chunk_index, the start_index/end_index
+        character offsets within the document stream (documents joined by blank
+        lines), and the location fields of the document the chunk starts in: page
+        (plus page_end when the chunk runs onto a later page), sheet_name and
+        row_range (plus numeric row_start/row_end). Values are all scalars, so they
+        can be stored as Chroma metadata and used in where-filters.
+        
+        Args:
+            documents: Iterable of LangChain Document objects (e.g. pages)
+        
+        Yields:
+            {"text": chunk, "metadata": {...}} records
+        """
+        for chunk_index, record in enumerate(self._iter_split_records(documents)):
+            record["metadata"]["chunk_index"] = chunk_index
+            yield record
+    
+    def _iter_split_records(self, documents: Iterable[Document]) -> Iterator[Dict[str, Any]]:
+        """Streaming splitter behind iter_chunk_records; records are not yet numbered."""
+        flush_size = self.chunk_size * self.STREAM_BUFFER_CHUNKS
+        if self.token_counter:
+            flush_size *= self.CHARS_PER_TOKEN
+        buffer = ""
+        # Offset of buffer[0] within the document stream
+        buffer_offset = 0
+        # (offset, metadata) of each document that overlaps the buffer
+        segments = []
+        
+        for doc in documents:
+            if doc.metadata.get("file_type") == "excel":
+                if buffer:
+                    yield from self._split_records(buffer, buffer_offset, segments)
+                    buffer_offset += len(buffer)
+                    buffer = ""
+                
+                text = doc.page_content + "\n\n"
+                yield from self._split_records(text, buffer_offset, [(buffer_offset, doc.metadata)])
+                buffer_offset += len(text)
+                segments = []
+                continue
+            
+            segments.append((buffer_offset + len(buffer), doc.metadata))
+            buffer += doc.page_content + "\n\n"
+            if len(buffer) < flush_size:
+                continue
+            
+            records = self._split_records(buffer, buffer_offset, segments)
+            if not records:
+                buffer_offset += len(buffer)
+                buffer = ""
+                segments = []
+                continue
+            
+            yield from records[:-1]
+            
+            # Keep the raw text from the start of the last chunk onwards
+            tail = records[-1]["metadata"]["start_index"] - buffer_offset
+            buffer = buffer[tail:]
+            buffer_offset += tail
+            segments = [
+                segment for i, segment in enumerate(segments)
+                if i + 1 == len(segments) or segments[i + 1][0] > buffer_offset
+            ]
+        
+        if buffer:
+            yield from self._split_records(buffer, buffer_offset, segments)
     
-    def process_directory(self, directory_path: str) -> Dict[str, List[str]]:
+    def _split_records(self, text: str, offset: int, segments: List[Tuple[int, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Split text into chunk records, locating each chunk in the text to compute its offsets.
+        
+        Args:
+            text: Text to split
+            offset: Offset of text[0] within the document stream
+            segments: (offset, metadata) of the documents making up the text, in order
+        """
+        if isinstance(self.text_splitter, FastRecursiveSplitter):
+            located = self.text_splitter.split_text_with_offsets(text)
+        else:
+            max_overlap = self.chunk_overlap if self.token_counter is None else None
+            located = FastRecursiveSplitter.locate_chunks(text, self.text_splitter.split_text(text), max_overlap)
+        
+        records = []
+        for position, chunk in located:
+            start = offset + position
+            metadata = self._chunk_metadata(segments, start, start + len(chunk))
+            records.append({"text": chunk, "metadata": metadata})
+        
+        return records
+    
+    def _chunk_metadata(self, segments: List[Tuple[int, Dict[str, Any]]], start: int, end: int) -> Dict[str, Any]:
+        """Build a chunk's metadata from the documents containing its first and last characters."""
+        starts = [segment_start for segment_start, _ in segments]
+        first = segments[max(bisect.bisect_right(starts, start) - 1, 0)][1] if segments else {}
+        last = segments[max(bisect.bisect_right(starts, end - 1) - 1, 0)][1] if segments else {}
+        
+        metadata = {key: first[key] for key in self.CHUNK_METADATA_KEYS if key in first}
+        
+        if "page" in last and last.get("page") != first.get("page"):
+            metadata["page_end"] = last["page"]
+        
+        if "row_range" in metadata:
+            row_start, row_end = str(metadata["row_range"]).split("-")
+            metadata["row_start"] = int(row_start)
+            metadata["row_end"] = int(row_end)
+        
+        metadata["start_index"] = start
+        metadata["end_index"] = end
+        
+        return metadata
+    
+    def _iter_documents(self, file_path: str, file_extension: Optional[str] = None,
+                        stream: Optional[BinaryIO] = None) -> Iterator[Document]:
+        """
+        Lazily load a file as LangChain documents, through the extracted-text cache if enabled.
+        
+        With a stream, the document is read from it and file_path is only used as its name.
+        """
+        file_extension = file_extension or os.path.splitext(file_path)[1].lower()
+        if file_extension not in self.SUPPORTED_EXTENSIONS:
+            raise ValueError(f"Unsupported file format: {file_extension}")
+        
+        if self.text_cache is None:
+            return self._load_documents(file_path, file_extension, stream)
+        
+        key = ExtractedTextCache.make_key(stream or file_path, self._extraction_signature(file_extension))
+        return self.text_cache.iter_documents(key, file_path, lambda: self._load_documents(file_path, file_extension, stream))
+    
+    def _load_documents(self, file_path: str, file_extension: Optional[str] = None,
+                        stream: Optional[BinaryIO] = None) -> Iterator[Document]:
+        """Lazily load a file (or stream) as LangChain documents based on its extension."""
+        file_extension = file_extension or os.path.splitext(file_path)[1].lower()
+        
+        if file_extension == '.pdf':
+            return self._iter_pdf(file_path, stream)
+        elif file_extension == '.docx':
+            if stream is None:
+                return Docx2txtLoader(file_path).lazy_load()
+            # Same output as Docx2txtLoader, which only accepts paths
+            return iter([Document(page_content=docx2txt.process(stream), metadata={"source": file_path})])
+        elif file_extension in ['.xlsx', '.xls']:
+            return self._iter_excel(file_path, stream=stream, file_extension=file_extension)
+        else:
+            raise ValueError(f"Unsupported file format: {file_extension}")
+    
+    def settings_signature(self) -> str:
+        """
+        Identify every setting that affects the chunks produced from a file.
+        
+        Unlike the extracted-text cache key, this covers chunking and deduplication
+        as well as extraction, so a manifest can tell when files must be re-processed.
+        """
+        return ":".join(str(value) for value in [
+            f"v{self.EXTRACTION_VERSION}", self.chunk_size, self.chunk_overlap, self.length_unit,
+            self.encoding_name if self.length_unit == "tokens" else "", self.splitter, self.excel_mode,
+            self.table_format, self.float_format, self.pdf_backend, self.dedupe
+        ])
+    
+    def _extraction_signature(self, file_extension: str) -> str:
+        """Identify the loader version and the settings that affect text extracted from a file type."""
+        signature = [f"v{self.EXTRACTION_VERSION}", file_extension]
+        
+        if file_extension == '.pdf':
+            signature.append(self.pdf_backend)
+        elif file_extension in ['.xlsx', '.xls']:
+            signature.extend([self.excel_mode, self.table_format, str(self.float_format)])
+        
+        return ":".join(signature)
+    
+    def process_directory(self, directory_path: str, max_workers: Optional[int] = 1) -> Dict[str, List[str]]:
         """
         Process all supported documents in a directory and its subdirectories.
         
+        Files are processed in sorted path order, so repeated runs over the same
+        tree produce the same result ordering regardless of worker count.
+        
         Args:
             directory_path: Path to the directory containing documents
-                
+            max_workers: Number of worker processes to use. 1 (the default) processes
+                files sequentially in this process; None uses one worker per CPU.
+        
         Returns:
             Dictionary mapping file paths to their chunked text content
         """
         if not os.path.isdir(directory_path):
             raise NotADirectoryError(f"Directory not found: {directory_path}")
         
+        file_paths = self.find_supported_files(directory_path)
+        processed = self.process_files(file_paths, max_workers=max_workers)
+        
+        processed_files = {}
+        for file_path, chunks in processed.items():
+            # Get relative path from the base directory to use as key
+            rel_path = os.path.relpath(file_path, directory_path)
+            processed_files[rel_path] = chunks
+            print(f"Processed {rel_path}")
+        
+        return processed_files
+    
+    def process_files(self, file_paths: List[str], max_workers: Optional[int] = 1,
+                      with_metadata: bool = False) -> Dict[str, List[Any]]:
+        """
+        Process a list of files, optionally in parallel, reporting per-file errors.
+        
+        Args:
+            file_paths: Paths of the files to process
+            max_workers: Number of worker processes to use. 1 (the default) processes
+                files sequentially in this process; None uses one worker per CPU.
+            with_metadata: Return chunk records (see process_file_records) instead of
+                plain text chunks
+        
+        Returns:
+            Dictionary mapping each successfully processed file path to its chunks,
+            in the same order as file_paths
+        """
         processed_files = {}
-        supported_extensions = ['.pdf', '.docx', '.xlsx', '.xls']
+        
+        for file_path, chunks, error in self.iter_process_files(file_paths, max_workers, with_metadata):
+            if error is None:
+                processed_files[file_path] = chunks
+            else:
+                print(error)
+        
+        return processed_files
+    
+    def iter_process_files(self, file_paths: List[str], max_workers: Optional[int] = 1,
+                           with_metadata: bool = False, lazy: bool = False,
+                           file_stats: Optional[Dict[str, Dict[str, float]]] = None) -> Iterator[Tuple[str, Optional[Iterable[Any]], Optional[str]]]:
+        """
+        Process a list of files, yielding each file's result as soon as it is ready.
+        
+        Results are yielded in file_paths order. In parallel mode at most twice as
+        many files as workers are in flight, so memory is bounded no matter how many
+        files there are or how slowly the caller consumes the results.
+        
+        Quarantined files are skipped, and files that fail are added to the quarantine.
+        
+        Args:
+            file_paths: Paths of the files to process
+            max_workers: Number of worker processes to use. 1 (the default) processes
+                files sequentially in this process; None uses one worker per CPU.
+            with_metadata: Return chunk records (see process_file_records) instead of
+                plain text chunks
+            lazy: When files are processed sequentially in this process, yield each
+                file's chunks as an iterator that extracts them on demand (extraction
+                errors are then raised while iterating) instead of as a list
+            file_stats: Optional dictionary filled with each processed file's FILE_STATS
+                (parse_seconds, split_seconds, and retries after a worker crash), keyed
+                by file path; a lazily processed file's entry is added once its chunks
+                have been consumed
+        
+        Yields:
+            (file_path, chunks, None) on success or (file_path, None, error) on failure,
+            where error is a message naming the file
+        """
+        if not self.isolate and (max_workers == 1 or len(file_paths) <= 1):
+            for file_path in file_paths:
+                reason = self.quarantine_reason(file_path)
+                if reason:
+                    yield file_path, None, f"Skipped {file_path}: {reason}"
+                elif lazy:
+                    yield file_path, self._iter_file_chunks(file_path, with_metadata, file_stats), None
+                else:
+                    chunks, error, stats = self._process_file_safe(file_path, with_metadata)
+                    self.merge_file_stats(file_path, stats, file_stats)
+                    yield self._check_result(file_path, chunks, error)
+            return
+        
+        # Files are already spread across processes; don't also fan out pages within each file
+        worker = copy.copy(self)
+        worker.pdf_page_workers = 1
+        worker.quarantine = None
+        max_workers = max_workers or os.cpu_count() or 1
+        # With a timeout, each in-flight file must have a worker of its own, so that
+        # its deadline counts from when it started rather than from when it was queued
+        max_in_flight = max_workers if self.file_timeout else 2 * max_workers
+        
+        waiting = collections.deque(file_paths)
+        while waiting:
+            crashed = []
+            timed_out = None
+            with self._make_pool(max_workers) as executor:
+                pending = collections.deque()
+                try:
+                    while waiting or pending:
+                        while waiting and len(pending) < max_in_flight:
+                            file_path = waiting.popleft()
+                            future = self._submit_file(executor, worker, file_path, with_metadata)
+                            pending.append((file_path, future, self._file_deadline()))
+                        yield self._pop_result(pending, file_stats)
+                except BrokenProcessPool:
+                    # A worker died (e.g. killed by the OS for its memory use); rerun the files
+                    # that were in flight one at a time so only the culprit is quarantined
+                    crashed = [file_path for file_path, _, _ in pending]
+                except FileTimeoutError:
+                    # The oldest file's worker never returned; stop the pool and start the
+                    # other in-flight files over in a new one
+                    self._terminate_workers(executor)
+                    timed_out = pending.popleft()[0]
+                    waiting.extendleft(reversed([file_path for file_path, _, _ in pending]))
+            
+            if timed_out is not None:
+                yield self._check_result(timed_out, None, self._timeout_error(timed_out))
+            
+            for file_path in crashed:
+                yield self._run_file_alone(worker, file_path, with_metadata, file_stats)
+    
+    def quarantine_reason(self, file_path: str) -> Optional[str]:
+        """Return why a file is skipped because it is quarantined, or None if it should be processed."""
+        reason = self.quarantine.get(file_path) if self.quarantine else None
+        if reason is None:
+            return None
+        return f"quarantined after an earlier failure ({reason})"
+    
+    def _make_pool(self, max_workers: int) -> ProcessPoolExecutor:
+        """Create a worker pool, applying the per-worker memory limit if one is set."""
+        if self.max_memory_mb is None:
+            return ProcessPoolExecutor(max_workers=max_workers)
+        return ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_limit_worker_memory,
+            initargs=(self.max_memory_mb,)
+        )
+    
+    def _submit_file(self, executor: ProcessPoolExecutor, worker: "DocumentProcessor",
+                     file_path: str, with_metadata: bool) -> Future:
+        """Submit a file to a worker pool, or return an already completed future if it is quarantined."""
+        reason = self.quarantine_reason(file_path)
+        if reason is None:
+            return executor.submit(worker._process_file_isolated, file_path, with_metadata)
+        
+        future = Future()
+        future.set_result((None, f"Skipped {file_path}: {reason}", {}))
+        return future
+    
+    def _file_deadline(self) -> Optional[float]:
+        """Return the time.monotonic() by which a file submitted now must be done, or None without a timeout."""
+        if not self.file_timeout:
+            return None
+        return time.monotonic() + self.file_timeout + self.FILE_TIMEOUT_GRACE
+    
+    def _timeout_error(self, file_path: str) -> str:
+        """Error message for a file whose worker had to be terminated."""
+        return f"Error processing {file_path}: timed out after {self.file_timeout}s (worker process terminated)"
+    
+    @staticmethod
+    def _terminate_workers(executor: ProcessPoolExecutor):
+        """Kill a pool's worker processes, e.g. one stuck in C code that never sees SIGALRM."""
+        # ProcessPoolExecutor has no public way to stop running tasks before Python 3.14
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+    
+    def _pop_result(self, pending: collections.deque,
+                    file_stats: Optional[Dict[str, Dict[str, float]]]) -> Tuple[str, Optional[List[Any]], Optional[str]]:
+        """
+        Wait for the oldest in-flight file and return its (file_path, chunks, error).
+        
+        The file stays in pending if its worker pool broke, so it can be retried, or
+        if it missed its deadline, in which case FileTimeoutError is raised.
+        """
+        file_path, future, deadline = pending[0]
+        try:
+            chunks, error, stats = future.result(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            raise FileTimeoutError(f"{file_path} missed its deadline")
+        pending.popleft()
+        self.merge_file_stats(file_path, stats, file_stats)
+        return self._check_result(file_path, chunks, error)
+    
+    def _run_file_alone(self, worker: "DocumentProcessor", file_path: str, with_metadata: bool,
+                        file_stats: Optional[Dict[str, Dict[str, float]]]) -> Tuple[str, Optional[List[Any]], Optional[str]]:
+        """Process a file in a dedicated worker process, reporting a crash or hang of that process as an error."""
+        with self._make_pool(1) as executor:
+            future = self._submit_file(executor, worker, file_path, with_metadata)
+            deadline = self._file_deadline()
+            try:
+                chunks, error, stats = future.result(timeout=None if deadline is None else deadline - time.monotonic())
+            except BrokenProcessPool:
+                chunks, error, stats = None, f"Error processing {file_path}: worker process crashed", {}
+            except FutureTimeoutError:
+                self._terminate_workers(executor)
+                chunks, error, stats = None, self._timeout_error(file_path), {}
+        
+        stats["retries"] = stats.get("retries", 0) + 1
+        self.merge_file_stats(file_path, stats, file_stats)
+        return self._check_result(file_path, chunks, error)
+    
+    def _check_result(self, file_path: str, chunks: Optional[List[Any]],
+                      error: Optional[str]) -> Tuple[str, Optional[List[Any]], Optional[str]]:
+        """Quarantine a file that failed to process, passing its result through."""
+        if error and self.quarantine and not self.quarantine.get(file_path):
+            self.quarantine.add(file_path, error)
+        return file_path, chunks, error
+    
+    def _iter_file_chunks(self, file_path: str, with_metadata: bool,
+                          file_stats: Optional[Dict[str, Dict[str, float]]] = None) -> Iterator[Any]:
+        """Lazily yield a file's chunks or chunk records, quarantining the file if it fails."""
+        stats = {}
+        try:
+            for record in self.iter_file_records(file_path, stats):
+                yield record if with_metadata else record["text"]
+        except Exception as e:
+            if self.quarantine:
+                self.quarantine.add(file_path, str(e))
+            raise
+        finally:
+            self.merge_file_stats(file_path, stats, file_stats)
+    
+    def _process_file_isolated(self, file_path: str, with_metadata: bool = False) -> Tuple[Optional[List[Any]], Optional[str], Dict[str, int]]:
+        """
+        Run _process_file_safe in a worker process, enforcing file_timeout with SIGALRM where available.
+        
+        The signal is only handled between Python bytecodes, so the parent process also
+        terminates workers that run FILE_TIMEOUT_GRACE seconds past the timeout.
+        """
+        if not self.file_timeout or not hasattr(signal, "SIGALRM"):
+            return self._process_file_safe(file_path, with_metadata)
+        
+        def on_timeout(signum, frame):
+            raise FileTimeoutError(f"timed out after {self.file_timeout}s")
+        
+        previous_handler = signal.signal(signal.SIGALRM, on_timeout)
+        try:
+            signal.setitimer(signal.ITIMER_REAL, self.file_timeout)
+            try:
+                return self._process_file_safe(file_path, with_metadata)
+            finally:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        except FileTimeoutError as e:
+            # The timer fired just as processing finished
+            return None, f"Error processing {file_path}: {str(e)}", {}
+        finally:
+            signal.signal(signal.SIGALRM, previous_handler)
+    
+    def find_supported_files(self, directory_path: str) -> List[str]:
+        """Return the sorted paths of all supported files under a directory."""
+        file_paths = []
         
         # Walk through directory and all subdirectories
         for root, _, files in os.walk(directory_path):
             for filename in files:
                 ext = os.path.splitext(filename)[1].lower()
-                if ext in supported_extensions:
-                    # Construct the full file path
-                    file_path = os.path.join(root, filename)
-                    try:
-                        # Get relative path from the base directory to use as key
-                        rel_path = os.path.relpath(file_path, directory_path)
-                        processed_files[rel_path] = self.process_file(file_path)
-                        print(f"Processed {rel_path}")
-                    except Exception as e:
-                        print(f"Error processing {file_path}: {str(e)}")
+                if ext in self.SUPPORTED_EXTENSIONS:
+                    file_paths.append(os.path.join(root, filename))
         
-        return processed_files
+        return sorted(file_paths)
+    
+    def _process_file_safe(self, file_path: str, with_metadata: bool = False) -> Tuple[Optional[List[Any]], Optional[str], Dict[str, int]]:
+        """
+        Process a file, returning (chunks, None, stats) on success or (None, error, stats) on failure.
+        
+        Deduplication counts are returned rather than accumulated on self, since this
+        may run in a worker process.
+        """
+        stats = {}
+        try:
+            records = list(self.iter_file_records(file_path, stats))
+            if with_metadata:
+                return records, None, stats
+            return [record["text"] for record in records], None, stats
+        except Exception as e:
+            return None, str(e) or f"Error processing {file_path}: {type(e).__name__}", stats
+    
+    def merge_file_stats(self, file_path: str, stats: Dict[str, Any],
+                         file_stats: Optional[Dict[str, Dict[str, float]]] = None):
+        """
+        Fold the stats gathered while processing one file into the processor's totals.
+        
+        Args:
+            file_path: Path (or in-memory name) of the file
+            stats: The file's stats, as filled by iter_file_records or iter_bytes_records
+            file_stats: Optional dictionary receiving the file's FILE_STATS, keyed by
+                file_path; the remaining deduplication counts go to dedup_stats
+        """
+        for key, value in stats.items():
+            if key in self.FILE_STATS:
+                if file_stats is not None:
+                    file_stats.setdefault(file_path, {})[key] = value
+            else:
+                self.dedup_stats[key] = self.dedup_stats.get(key, 0) + value
     
     def _load_pdf(self, file_path: str) -> List[Document]:
-        """Load a PDF file using LangChain's PyPDFLoader."""
-        loader = PyPDFLoader(file_path)
-        return loader.load()
+        """Load a PDF file as one Document per page."""
+        return list(self._iter_pdf(file_path))
+    
+    def _iter_pdf(self, file_path: str, stream: Optional[BinaryIO] = None) -> Iterator[Document]:
+        """
+        Lazily load a PDF file (or in-memory stream named file_path) as one Document per page.
+        
+        With pdf_page_workers > 1, PDF files of at least PDF_PARALLEL_MIN_PAGES pages
+        are split into page ranges that are extracted in worker processes and yielded
+        back in page order. Otherwise pages are read sequentially, through
+        LangChain's PyPDFLoader for the pypdf backend.
+        """
+        pdf = stream or file_path
+        
+        backend = self.pdf_backend
+        if backend == "auto":
+            backend = self._choose_pdf_backend(pdf)
+        
+        # Only the parallel path needs the page count up front
+        parallel = self.pdf_page_workers != 1 and stream is None
+        if parallel:
+            from pypdf import PdfReader
+            num_pages = len(PdfReader(pdf).pages)
+            parallel = num_pages >= self.PDF_PARALLEL_MIN_PAGES
+        
+        if not parallel:
+            if backend == "pypdf" and stream is None:
+                yield from PyPDFLoader(file_path).lazy_load()
+            else:
+                # Pages are extracted one at a time as they are consumed
+                from pypdf import PdfReader
+                if stream is not None:
+                    stream.seek(0)
+                num_pages = len(PdfReader(pdf).pages)
+                for page, text, page_label in _iter_pdf_pages(pdf, 0, None, backend):
+                    yield _pdf_page_document(file_path, page, text, page_label, num_pages)
+            return
+        
+        # Split the document into one contiguous page range per task
+        workers = self.pdf_page_workers or os.cpu_count() or 1
+        range_size = max(1, -(-num_pages // (workers * 4)))
+        starts = list(range(0, num_pages, range_size))
+        ends = [min(start + range_size, num_pages) for start in starts]
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map() yields the page ranges back in submission (page) order
+            results = executor.map(
+                _extract_pdf_pages,
+                [file_path] * len(starts), starts, ends, [backend] * len(starts)
+            )
+            for pages in results:
+                for page, text, page_label in pages:
+                    yield _pdf_page_document(file_path, page, text, page_label, num_pages)
+    
+    def _choose_pdf_backend(self, file_path: Union[str, BinaryIO]) -> str:
+        """
+        Pick the PDF text backend for a file by benchmarking both on a sample of pages.
+        
+        A backend that recovers clearly more text from the sample wins (pdfminer often
+        copes better with unusual font encodings); otherwise the faster one is used.
+        """
+        from pypdf import PdfReader
+        num_pages = len(PdfReader(file_path).pages)
+        sample_end = min(num_pages, self.PDF_BACKEND_SAMPLE_PAGES)
+        
+        stats = {}
+        for backend in ["pypdf", "pdfminer"]:
+            started = time.perf_counter()
+            try:
+                pages = _extract_pdf_pages(file_path, 0, sample_end, backend)
+            except Exception:
+                continue
+            stats[backend] = (sum(len(text) for _, text, _ in pages), time.perf_counter() - started)
+        
+        if "pdfminer" not in stats:
+            return "pypdf"
+        if "pypdf" not in stats:
+            return "pdfminer"
+        
+        pypdf_chars, _ = stats["pypdf"]
+        pdfminer_chars, _ = stats["pdfminer"]
+        if pdfminer_chars > pypdf_chars * self.PDF_BACKEND_TEXT_RATIO:
+            return "pdfminer"
+        if pypdf_chars > pdfminer_chars * self.PDF_BACKEND_TEXT_RATIO:
+            return "pypdf"
+        
+        # Both recover comparable text: take the faster one
+        return min(stats, key=lambda backend: stats[backend][1])
     
     def _load_docx(self, file_path: str) -> List[Document]:
         """Load a Word document using LangChain's Docx2txtLoader."""
@@ -119,95 +985,432 @@ class DocumentProcessor:
     def _load_excel(self, file_path: str, header_row: int = 0) -> List[Document]:
         """
         Load an Excel file preserving headers and sheet structure.
-        Uses pandas to maintain the tabular data structure and headers.
         
         Args:
             file_path: Path to the Excel file
             header_row: Row index (0-based) containing the column headers (default: 0)
-            
+        
         Returns:
             List of Document objects with properly formatted Excel content
         """
-        import pandas as pd
-        from langchain_core.documents import Document
+        return list(self._iter_excel(file_path, header_row=header_row))
+    
+    def _iter_excel(self, file_path: str, header_row: int = 0, excel_mode: Optional[str] = None,
+                    stream: Optional[BinaryIO] = None, file_extension: Optional[str] = None) -> Iterator[Document]:
+        """
+        Stream an Excel file as documents, one sheet or row window at a time.
         
-        documents = []
+        Sheets with at most EXCEL_SMALL_SHEET_ROWS data rows are "small". How small and
+        large sheets are represented is controlled by excel_mode (see EXCEL_MODES).
+        Row windows hold EXCEL_WINDOW_ROWS rows and repeat the column headers, so
+        memory stays proportional to the window rather than the sheet, except in the
+        legacy whole_and_windows mode.
         
-        # Read all sheets in the Excel file
-        excel_file = pd.ExcelFile(file_path)
-        sheet_names = excel_file.sheet_names
+        Args:
+            file_path: Path to the Excel file
+            header_row: Row index (0-based) containing the column headers (default: 0)
+            excel_mode: Representation mode; defaults to the processor's excel_mode
+            stream: In-memory workbook to read instead of file_path
+            file_extension: Workbook type (.xlsx or .xls); defaults to file_path's extension
         
-        for sheet_name in sheet_names:
-            # Read the sheet into a pandas DataFrame with specified header row
-            df = pd.read_excel(file_path, sheet_name=sheet_name, header=header_row)
+        Yields:
+            Document objects with properly formatted Excel content
+        """
+        excel_mode = excel_mode or self.excel_mode
+        
+        for sheet_name, columns, rows in self._iter_excel_sheets(file_path, header_row, stream, file_extension):
+            # Buffer just enough rows to tell whether the sheet is small
+            head = []
+            for row in rows:
+                head.append(row)
+                if len(head) > self.EXCEL_SMALL_SHEET_ROWS:
+                    break
             
             # Skip empty sheets
-            if df.empty:
+            if not head:
                 continue
             
-            # Format the DataFrame as text with headers
-            formatted_text = f"# Sheet: {sheet_name}\n\n"
-            
-            # Add column headers as a section
-            formatted_text += "## Headers\n"
-            formatted_text += ", ".join(df.columns.astype(str)) + "\n\n"
-            
-            # Format the data with row indices and header references
-            formatted_text += "## Data\n"
-            
-            # Convert DataFrame to string representation with clear header alignment
-            # Use to_string() for better formatting of tabular data
-            table_str = df.to_string(index=False)
-            formatted_text += table_str + "\n\n"
-            
-            # Create document with metadata for this sheet
-            doc = Document(
-                page_content=formatted_text,
-                metadata={
-                    "source": file_path,
-                    "file_type": "excel",
-                    "sheet_name": sheet_name,
-                    "row_count": len(df),
-                    "column_count": len(df.columns)
-                }
-            )
-            documents.append(doc)
-            
-            # For large sheets, create additional documents with specific data subsets
-            # to improve retrieval granularity
-            if len(df) > 50:  # Only for larger sheets
-                # Process the sheet in smaller chunks with column headers
-                chunk_size = 25  # rows per chunk
-                for i in range(0, len(df), chunk_size):
-                    chunk_df = df.iloc[i:i+chunk_size]
-                    chunk_text = f"# Sheet: {sheet_name} (Rows {i}-{i+len(chunk_df)-1})\n\n"
-                    chunk_text += "## Headers\n"
-                    chunk_text += ", ".join(df.columns.astype(str)) + "\n\n"
-                    chunk_text += "## Data\n"
-                    chunk_text += chunk_df.to_string(index=False) + "\n"
-                    
-                    chunk_doc = Document(
-                        page_content=chunk_text,
-                        metadata={
-                            "source": file_path,
-                            "file_type": "excel",
-                            "sheet_name": sheet_name,
-                            "row_range": f"{i}-{i+len(chunk_df)-1}",
-                            "row_count": len(chunk_df),
-                            "column_count": len(df.columns)
-                        }
-                    )
-                    documents.append(chunk_doc)
-        
-        return documents
-    
-    def _extract_text_from_documents(self, documents: List[Document]) -> str:
-        """Extract text from a list of LangChain Document objects."""
-        text = ""
-        for doc in documents:
-            text += doc.page_content + "\n\n"
-        return text
+            if len(head) <= self.EXCEL_SMALL_SHEET_ROWS and excel_mode != "windows":
+                yield self._excel_document(file_path, sheet_name, columns, [row for _, row in head])
+                continue
+            
+            rows = self._chain_rows(head, rows)
+            
+            if excel_mode == "whole_and_windows":
+                all_rows = list(rows)
+                yield self._excel_document(file_path, sheet_name, columns, [row for _, row in all_rows])
+                rows = iter(all_rows)
+            
+            summary = ExcelSheetSummary(columns) if excel_mode == "summary_windows" else None
+            
+            # Emit row windows as they are read, numbered by their rows' places in the sheet
+            window = []
+            for row_number, row in rows:
+                window.append((row_number, row))
+                if summary:
+                    summary.add(row)
+                if len(window) == self.EXCEL_WINDOW_ROWS:
+                    yield self._excel_window(file_path, sheet_name, columns, window)
+                    window = []
+            if window:
+                yield self._excel_window(file_path, sheet_name, columns, window)
+            
+            if summary:
+                yield summary.to_document(file_path, sheet_name)
+    
+    def excel_report(self, file_path: str, header_row: int = 0) -> Dict[str, Dict[str, int]]:
+        """
+        Compare the cost of each Excel representation mode for a workbook.
+        
+        Every mode is run through the real chunking pipeline; token counts are
+        estimated at CHARS_PER_TOKEN characters per token. Savings are reported
+        relative to the legacy whole_and_windows representation.
+        
+        Args:
+            file_path: Path to the Excel file
+            header_row: Row index (0-based) containing the column headers (default: 0)
+        
+        Returns:
+            Dictionary mapping each mode to its documents, chunks, tokens,
+            chunks_saved and tokens_saved
+        """
+        report = {}
+        
+        for excel_mode in self.EXCEL_MODES:
+            documents = list(self._iter_excel(file_path, header_row, excel_mode=excel_mode))
+            chunks = list(self.iter_chunks(documents))
+            report[excel_mode] = {
+                "documents": len(documents),
+                "chunks": len(chunks),
+                "tokens": sum(len(chunk) for chunk in chunks) // self.CHARS_PER_TOKEN
+            }
+        
+        baseline = report["whole_and_windows"]
+        for stats in report.values():
+            stats["chunks_saved"] = baseline["chunks"] - stats["chunks"]
+            stats["tokens_saved"] = baseline["tokens"] - stats["tokens"]
+        
+        return report
+    
+    @staticmethod
+    def _chain_rows(head: List[Tuple[int, tuple]], rows: Iterator[Tuple[int, tuple]]) -> Iterator[Tuple[int, tuple]]:
+        """Yield the buffered rows followed by the rest of the row iterator."""
+        yield from head
+        yield from rows
+    
+    def _iter_excel_sheets(self, file_path: str, header_row: int = 0, stream: Optional[BinaryIO] = None,
+                           file_extension: Optional[str] = None) -> Iterator[Tuple[str, List[str], Iterator[Tuple[int, tuple]]]]:
+        """
+        Open a workbook once and yield (sheet_name, column_names, row_iterator) per sheet.
+        
+        Row iterators yield (row_number, row) pairs, where row_number is the row's
+        0-based index below the header, so numbers stay true to the sheet when blank
+        rows are skipped. .xlsx files are read with openpyxl in read-only mode, which streams rows from
+        the file. Legacy .xls files are parsed once through a shared pandas ExcelFile.
+        A stream, if given, is read instead of file_path.
+        """
+        workbook_file = stream or file_path
+        file_extension = file_extension or os.path.splitext(file_path)[1].lower()
+        
+        if file_extension == '.xls':
+            with pd.ExcelFile(workbook_file) as excel_file:
+                for sheet_name in excel_file.sheet_names:
+                    df = excel_file.parse(sheet_name, header=header_row)
+                    rows = enumerate(df.itertuples(index=False, name=None))
+                    yield sheet_name, [str(column) for column in df.columns], rows
+            return
+        
+        from openpyxl import load_workbook
+        
+        workbook = load_workbook(workbook_file, read_only=True, data_only=True)
+        try:
+            for worksheet in workbook.worksheets:
+                rows = worksheet.iter_rows(values_only=True)
+                # Skip rows above the header
+                for _ in range(header_row):
+                    next(rows, None)
+                header = next(rows, None)
+                if header is None:
+                    continue
+                
+                columns = self._excel_column_names(header)
+                yield worksheet.title, columns, self._iter_excel_rows(rows, len(columns))
+        finally:
+            workbook.close()
+    
+    @staticmethod
+    def _iter_excel_rows(rows: Iterator[tuple], width: int) -> Iterator[Tuple[int, tuple]]:
+        """Yield (row_number, row) for non-blank rows padded or truncated to the header width, with empty cells as NaN."""
+        for row_number, row in enumerate(rows):
+            if all(value is None for value in row):
+                continue
+            row = tuple(float("nan") if value is None else value for value in row[:width])
+            yield row_number, row + (float("nan"),) * (width - len(row))
+    
+    @staticmethod
+    def _excel_column_names(header: tuple) -> List[str]:
+        """Name header cells the way pandas does (Unnamed: i, de-duplicated with .1, .2, ...)."""
+        columns = []
+        seen = {}
+        for i, value in enumerate(header):
+            name = f"Unnamed: {i}" if value is None else str(value)
+            if name in seen:
+                seen[name] += 1
+                name = f"{name}.{seen[name]}"
+            else:
+                seen[name] = 0
+            columns.append(name)
+        return columns
+    
+    def _excel_window(self, file_path: str, sheet_name: str, columns: List[str],
+                      window: List[Tuple[int, tuple]]) -> Document:
+        """Format a row window of (row_number, row) pairs as a Document labelled with its row range."""
+        return self._excel_document(file_path, sheet_name, columns, [row for _, row in window],
+                                    window[0][0], window[-1][0])
+    
+    def _excel_document(self, file_path: str, sheet_name: str, columns: List[str],
+                        rows: List[tuple], start: Optional[int] = None, end: Optional[int] = None) -> Document:
+        """
+        Format a block of sheet rows as a Document with headers.
+        
+        Args:
+            file_path: Path to the Excel file
+            sheet_name: Name of the sheet the rows came from
+            columns: Column names
+            rows: Row values
+            start: Index of the first row for a row window, or None for a whole sheet
+            end: Index of the last row for a row window; defaults to start plus the
+                number of rows, less one
+        """
+        df = pd.DataFrame(rows, columns=columns)
+        
+        metadata = {
+            "source": file_path,
+            "file_type": "excel",
+            "sheet_name": sheet_name
+        }
+        
+        if start is None:
+            text = f"# Sheet: {sheet_name}\n\n"
+        else:
+            if end is None:
+                end = start + len(df) - 1
+            text = f"# Sheet: {sheet_name} (Rows {start}-{end})\n\n"
+            metadata["row_range"] = f"{start}-{end}"
+        
+        if self.table_format == "text":
+            # Add column headers as a section, followed by the data
+            text += "## Headers\n"
+            text += ", ".join(columns) + "\n\n"
+            text += "## Data\n"
+            text += df.to_string(index=False) + "\n\n"
+        else:
+            # The table's own header row carries the column names
+            text += self._format_compact_table(df) + "\n"
+        
+        metadata["row_count"] = len(df)
+        metadata["column_count"] = len(columns)
+        
+        return Document(page_content=text, metadata=metadata)
+    
+    def _format_compact_table(self, df: pd.DataFrame) -> str:
+        """Serialize a DataFrame as CSV, TSV or a minimal markdown table without padding."""
+        df = df.dropna(axis=1, how="all")
+        header = [str(column) for column in df.columns]
+        rows = [[self._format_cell(value) for value in row] for row in df.itertuples(index=False, name=None)]
+        
+        if self.table_format == "markdown":
+            def markdown_row(cells):
+                return "| " + " | ".join(cell.replace("|", "\\|").replace("\n", " ") for cell in cells) + " |"
+            
+            lines = [markdown_row(header), "|" + "---|" * len(header)]
+            lines.extend(markdown_row(row) for row in rows)
+            return "\n".join(lines) + "\n"
+        
+        output = io.StringIO()
+        writer = csv.writer(output, delimiter="\t" if self.table_format == "tsv" else ",", lineterminator="\n")
+        writer.writerow(header)
+        writer.writerows(rows)
+        return output.getvalue()
+    
+    def _format_cell(self, value: Any) -> str:
+        """Format a single cell compactly: empty for missing values, unpadded numbers."""
+        if value is None or (isinstance(value, float) and value != value):
+            return ""
+        if isinstance(value, float):
+            if self.float_format:
+                return format(value, self.float_format)
+            if value.is_integer():
+                return str(int(value))
+            return f"{value:.6f}".rstrip("0").rstrip(".")
+        return str(value)
+
 
+def _timed(make_iterable: Callable[[], Iterable[Any]], stats: Dict[str, Any], key: str,
+           nested_key: Optional[str] = None) -> Iterator[Any]:
+    """
+    Yield from the iterable make_iterable returns, adding the time spent creating it
+    and producing its items to stats[key].
+    
+    Time the consumer spends between items is not counted. With nested_key, time
+    added to stats[nested_key] meanwhile (by an inner _timed) is subtracted.
+    """
+    start = time.perf_counter()
+    try:
+        iterator = iter(make_iterable())
+    finally:
+        stats[key] = stats.get(key, 0.0) + time.perf_counter() - start
+    
+    while True:
+        start = time.perf_counter()
+        nested = stats.get(nested_key, 0.0) if nested_key else 0.0
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            elapsed = time.perf_counter() - start
+            if nested_key:
+                elapsed -= stats.get(nested_key, 0.0) - nested
+            stats[key] = stats.get(key, 0.0) + elapsed
+        yield item
+
+
+class FileTimeoutError(Exception):
+    """Raised inside a worker process when a file exceeds DocumentProcessor.file_timeout."""
+
+
+def _limit_worker_memory(max_memory_mb: int):
+    """
+    Worker pool initializer capping the worker's address space, so runaway files fail with MemoryError.
+    
+    The parser modules are imported first and the cap is applied on top of the
+    worker's resulting baseline size, so max_memory_mb is what a single file may use.
+    """
+    try:
+        import resource
+    except ImportError:
+        return
+    
+    import pypdf, docx2txt, openpyxl, xml.parsers.expat  # noqa: F401
+    
+    baseline = 0
+    try:
+        with open("/proc/self/statm") as f:
+            baseline = int(f.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError):
+        pass
+    
+    limit = baseline + max_memory_mb * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+class ExcelSheetSummary:
+    """
+    Running summary of a sheet's rows, built in constant memory while the rows stream past.
+    """
+    
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+        self.row_count = 0
+        self.numeric_ranges: Dict[str, List[float]] = {}
+    
+    def add(self, row: tuple):
+        """Account for one row: count it and track min/max of numeric cells."""
+        self.row_count += 1
+        for column, value in zip(self.columns, row):
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value:
+                continue
+            value_range = self.numeric_ranges.setdefault(column, [value, value])
+            value_range[0] = min(value_range[0], value)
+            value_range[1] = max(value_range[1], value)
+    
+    def to_document(self, file_path: str, sheet_name: str) -> Document:
+        """Format the summary as a Document."""
+        text = f"# Sheet: {sheet_name} (Summary)\n\n"
+        text += "## Headers\n"
+        text += ", ".join(self.columns) + "\n\n"
+        text += f"Rows: {self.row_count}\nColumns: {len(self.columns)}\n"
+        
+        if self.numeric_ranges:
+            text += "\n## Numeric Columns\n"
+            for column, (low, high) in self.numeric_ranges.items():
+                text += f"{column}: {low} to {high}\n"
+        
+        return Document(
+            page_content=text,
+            metadata={
+                "source": file_path,
+                "file_type": "excel",
+                "sheet_name": sheet_name,
+                "row_count": self.row_count,
+                "column_count": len(self.columns)
+            }
+        )
+
+
+def _extract_pdf_pages(file_path: Union[str, BinaryIO], start: int, end: Optional[int],
+                       backend: str) -> List[Tuple[int, str, Optional[str]]]:
+    """
+    Extract the text of pages [start, end) of a PDF (path or binary stream) with the given backend.
+    
+    Defined at module level so it can run in worker processes; see _iter_pdf_pages.
+    
+    Returns:
+        List of (page_number, text, page_label) tuples in page order; page_label
+        is None for the pdfminer backend
+    """
+    return list(_iter_pdf_pages(file_path, start, end, backend))
+
+
+def _iter_pdf_pages(file_path: Union[str, BinaryIO], start: int, end: Optional[int],
+                    backend: str) -> Iterator[Tuple[int, str, Optional[str]]]:
+    """
+    Lazily extract the text of pages [start, end) of a PDF (path or binary stream), one page at a time.
+    
+    Text is stripped the same way PyPDFLoader strips it. An end of None reads to
+    the last page.
+    
+    Yields:
+        (page_number, text, page_label) tuples in page order; page_label is None
+        for the pdfminer backend
+    """
+    if not isinstance(file_path, str):
+        file_path.seek(0)
+    
+    if backend == "pdfminer":
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LTTextContainer
+        
+        page_numbers = range(start, sys.maxsize if end is None else end)
+        for page_number, layout in zip(page_numbers, extract_pages(file_path, page_numbers=page_numbers)):
+            text = "".join(element.get_text() for element in layout if isinstance(element, LTTextContainer))
+            yield page_number, text.strip(), None
+        return
+    
+    from pypdf import PdfReader
+    
+    reader = PdfReader(file_path)
+    # page_labels is rebuilt for the whole document on every access
+    labels = reader.page_labels
+    for page_number in range(start, len(reader.pages) if end is None else end):
+        yield page_number, reader.pages[page_number].extract_text().strip(), labels[page_number]
+
+
+def _pdf_page_document(file_path: str, page: int, text: str, page_label: Optional[str], total_pages: int) -> Document:
+    """Wrap extracted page text in a Document with PyPDFLoader-style metadata."""
+    metadata = {
+        "source": file_path,
+        "total_pages": total_pages,
+        "page": page
+    }
+    if page_label is not None:
+        metadata["page_label"] = page_label
+    
+    return Document(page_content=text, metadata=metadata)
 
 # Example usage
 if __name__ == "__main__":
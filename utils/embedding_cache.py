@@ -0,0 +1,213 @@
+"""
+Embedding Cache Module for RAG Chatbot
+Persists embedding vectors so text that was embedded before is never sent to the API again.
+"""
+
+import time
+import sqlite3
+import hashlib
+import threading
+from array import array
+from typing import List, Dict, Any, Optional
+
+
+class EmbeddingCache:
+    """
+    A SQLite cache of embedding vectors, keyed by (model, dimensions, sha256(text)).
+    
+    Vectors are stored as float32 blobs. Every hit refreshes the entry's last-used
+    time, and once the stored vectors exceed max_size_mb the least recently used
+    entries are evicted down to EVICT_TO of the limit. Because the key is the text
+    itself rather than a chunk ID, the same text in another file, a re-ingested
+    folder or a rebuilt collection is served from the cache.
+    
+    The cache is safe to share between threads; several processes can share the
+    file too, since SQLite locks it (WAL mode).
+    """
+    
+    FILENAME = "embedding_cache.sqlite"
+    
+    # Fraction of max_size_mb that eviction shrinks the cache to
+    EVICT_TO = 0.9
+    
+    # Approximate per-entry storage besides the vector (key, hash, index entries)
+    ENTRY_OVERHEAD = 96
+    
+    # Maximum number of hashes per SELECT ... IN (...) lookup
+    LOOKUP_BATCH_SIZE = 500
+    
+    def __init__(self, cache_path: str, max_size_mb: Optional[float] = 1024):
+        """
+        Initialize the cache, creating the database if needed.
+        
+        Args:
+            cache_path: Path of the SQLite database file
+            max_size_mb: Maximum size of the stored entries in MB (None for no limit)
+        """
+        self.cache_path = cache_path
+        self.max_bytes = int(max_size_mb * 1024 * 1024) if max_size_mb is not None else None
+        
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(cache_path, timeout=30, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, dimensions INTEGER NOT NULL, text_hash BLOB NOT NULL, "
+            "vector BLOB NOT NULL, last_used REAL NOT NULL, "
+            "PRIMARY KEY (model, dimensions, text_hash))"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._connection.commit()
+        
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._bytes = self._stored_bytes()
+    
+    @staticmethod
+    def hash_text(text: str) -> bytes:
+        """Return the SHA-256 digest identifying a text."""
+        return hashlib.sha256(text.encode("utf-8")).digest()
+    
+    def _stored_bytes(self) -> int:
+        """Return the approximate size of all entries in the database."""
+        count, size = self._connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()
+        return size + count * self.ENTRY_OVERHEAD
+    
+    def get_many(self, model: str, dimensions: Optional[int], texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look up the cached embeddings of texts.
+        
+        Args:
+            model: Embedding model name
+            dimensions: Embedding dimensions requested from the model (None for its default)
+            texts: Texts to look up
+        
+        Returns:
+            One embedding per text, or None where the text is not cached
+        """
+        hashes = [self.hash_text(text) for text in texts]
+        found = {}
+        with self._lock:
+            for i in range(0, len(hashes), self.LOOKUP_BATCH_SIZE):
+                batch = list(set(hashes[i:i + self.LOOKUP_BATCH_SIZE]))
+                rows = self._connection.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND dimensions = ? "
+                    f"AND text_hash IN ({', '.join('?' * len(batch))})",
+                    [model, dimensions or 0, *batch]
+                ).fetchall()
+                found.update(rows)
+            
+            if found:
+                now = time.time()
+                self._connection.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND dimensions = ? AND text_hash = ?",
+                    [(now, model, dimensions or 0, text_hash) for text_hash in found]
+                )
+                self._connection.commit()
+            
+            embeddings = [self._decode(found[text_hash]) if text_hash in found else None for text_hash in hashes]
+            hits = sum(1 for embedding in embeddings if embedding is not None)
+            self._stats["hits"] += hits
+            self._stats["misses"] += len(texts) - hits
+        return embeddings
+    
+    def put_many(self, model: str, dimensions: Optional[int], texts: List[str], embeddings: List[List[float]]):
+        """
+        Store the embeddings of texts, evicting the least recently used entries if the cache is full.
+        
+        Args:
+            model: Embedding model name
+            dimensions: Embedding dimensions requested from the model (None for its default)
+            texts: Embedded texts
+            embeddings: One embedding per text
+        """
+        if not texts:
+            return
+        
+        now = time.time()
+        rows = {self.hash_text(text): self._encode(embedding) for text, embedding in zip(texts, embeddings)}
+        with self._lock:
+            existing = set()
+            keys = list(rows)
+            for i in range(0, len(keys), self.LOOKUP_BATCH_SIZE):
+                batch = keys[i:i + self.LOOKUP_BATCH_SIZE]
+                existing.update(text_hash for (text_hash,) in self._connection.execute(
+                    f"SELECT text_hash FROM embeddings WHERE model = ? AND dimensions = ? "
+                    f"AND text_hash IN ({', '.join('?' * len(batch))})",
+                    [model, dimensions or 0, *batch]
+                ))
+            
+            new_rows = [(model, dimensions or 0, text_hash, vector, now)
+                        for text_hash, vector in rows.items() if text_hash not in existing]
+            self._connection.executemany("INSERT OR IGNORE INTO embeddings VALUES (?, ?, ?, ?, ?)", new_rows)
+            self._bytes += sum(len(row[3]) + self.ENTRY_OVERHEAD for row in new_rows)
+            self._stats["writes"] += len(new_rows)
+            
+            if self.max_bytes is not None and self._bytes > self.max_bytes:
+                self._evict(int(self.max_bytes * self.EVICT_TO))
+            self._connection.commit()
+    
+    def _evict(self, target_bytes: int):
+        """Delete least recently used entries until the cache holds at most target_bytes."""
+        # Other processes may have written to the file since it was opened
+        self._bytes = self._stored_bytes()
+        
+        doomed = []
+        freed = 0
+        for rowid, size in self._connection.execute(
+            "SELECT rowid, LENGTH(vector) FROM embeddings ORDER BY last_used"
+        ):
+            if self._bytes - freed <= target_bytes:
+                break
+            doomed.append((rowid,))
+            freed += size + self.ENTRY_OVERHEAD
+        
+        self._connection.executemany("DELETE FROM embeddings WHERE rowid = ?", doomed)
+        self._bytes -= freed
+        self._stats["evictions"] += len(doomed)
+    
+    @staticmethod
+    def _encode(embedding: List[float]) -> bytes:
+        return array("f", embedding).tobytes()
+    
+    @staticmethod
+    def _decode(vector: bytes) -> List[float]:
+        return array("f", vector).tolist()
+    
+    def clear(self):
+        """Remove all cached embeddings."""
+        with self._lock:
+            self._connection.execute("DELETE FROM embeddings")
+            self._connection.commit()
+            self._bytes = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return cache statistics for this process.
+        
+        Returns:
+            Dictionary with hits, misses, hit_rate, writes, evictions, and the
+            number of entries and approximate size_mb of the cache
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            stats["size_mb"] = self._bytes / (1024 * 1024)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+    
+    def summary(self) -> str:
+        """Return a one-line summary of the cache's hit rate and size."""
+        stats = self.stats()
+        return (
+            f"Embedding cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate), "
+            f"{stats['entries']} entries ({stats['size_mb']:.1f} MB), {stats['evictions']} evicted"
+        )
+    
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
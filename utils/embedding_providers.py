@@ -0,0 +1,187 @@
+"""
+Embedding Providers Module for RAG Chatbot
+Creates the embedding model a collection uses: OpenAI, a local sentence-transformers model or feature hashing.
+"""
+
+import re
+import zlib
+import math
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+
+# Supported embedding providers
+EMBEDDING_PROVIDERS = ['openai', 'sentence-transformers', 'hashing']
+
+# Model used when a provider is selected without a model
+DEFAULT_EMBEDDING_MODELS = {
+    "openai": "text-embedding-3-small",
+    "sentence-transformers": "sentence-transformers/all-MiniLM-L6-v2",
+    "hashing": "hashing-v1"
+}
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Dependency-free local embeddings from hashed word unigrams and bigrams.
+    
+    Each word and pair of adjacent words is hashed (CRC32, so vectors are identical
+    across processes and machines) into one of `dimensions` signed buckets, counts
+    are dampened with log(1 + count) and vectors are L2-normalized. This captures
+    lexical overlap only, with no notion of synonyms, but needs no model download,
+    no network and no dependencies, so it works on air-gapped machines and embeds
+    thousands of chunks per second on one CPU.
+    """
+    
+    WORD_PATTERN = re.compile(r"\w+")
+    
+    def __init__(self, dimensions: int = 1024):
+        """
+        Initialize the embedder.
+        
+        Args:
+            dimensions: Length of the embedding vectors
+        """
+        if dimensions < 1:
+            raise ValueError("dimensions must be at least 1")
+        self.model = DEFAULT_EMBEDDING_MODELS["hashing"]
+        self.dimensions = dimensions
+    
+    def _embed(self, text: str) -> List[float]:
+        words = self.WORD_PATTERN.findall(text.casefold())
+        features = words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+        
+        counts = {}
+        for feature in features:
+            digest = zlib.crc32(feature.encode("utf-8"))
+            index = digest % self.dimensions
+            counts[index] = counts.get(index, 0) + (1 if digest & 0x80000000 else -1)
+        
+        vector = [0.0] * self.dimensions
+        for index, count in counts.items():
+            vector[index] = math.copysign(math.log1p(abs(count)), count)
+        norm = math.sqrt(sum(value * value for value in vector))
+        return [value / norm for value in vector] if norm else vector
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+    
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """
+    Local CPU embeddings from a sentence-transformers model (optional dependency).
+    
+    The model is downloaded once into the Hugging Face cache, after which it runs
+    offline. Vectors are L2-normalized. With backend="onnx" (sentence-transformers
+    3.2 and later, with onnxruntime installed) the model runs on ONNX Runtime,
+    which is usually faster on CPU than PyTorch.
+    
+    With dimensions set, vectors are truncated to their first `dimensions` values
+    and renormalized, which keeps most of the quality of Matryoshka-trained models.
+    """
+    
+    def __init__(self, model: str = DEFAULT_EMBEDDING_MODELS["sentence-transformers"], device: str = "cpu",
+                 batch_size: int = 32, backend: str = "torch", dimensions: Optional[int] = None):
+        """
+        Initialize the embedder, loading the model.
+        
+        Args:
+            model: Model name on the Hugging Face hub, or a local path
+            device: Device to run the model on
+            batch_size: Number of texts encoded per forward pass
+            backend: "torch", "onnx" or "openvino"
+            dimensions: Length to truncate vectors to (None keeps the model's own)
+        
+        Raises:
+            ImportError: If sentence-transformers is not installed
+        """
+        if SentenceTransformer is None:
+            raise ImportError("The sentence-transformers provider requires the sentence-transformers package "
+                              "(pip install sentence-transformers); the hashing provider needs no dependencies")
+        
+        self.model = model
+        self.dimensions = dimensions
+        self.batch_size = batch_size
+        backend_kwargs = {} if backend == "torch" else {"backend": backend}
+        self._model = SentenceTransformer(model, device=device, **backend_kwargs)
+        
+        native_dimensions = self._model.get_sentence_embedding_dimension()
+        if dimensions is not None and not 1 <= dimensions <= native_dimensions:
+            raise ValueError(f"dimensions must be between 1 and {native_dimensions} for {model}")
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        embeddings = self._model.encode(texts, batch_size=self.batch_size, normalize_embeddings=True,
+                                        convert_to_numpy=True).tolist()
+        if self.dimensions is None:
+            return embeddings
+        return [truncate_embedding(embedding, self.dimensions) for embedding in embeddings]
+    
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def truncate_embedding(embedding: List[float], dimensions: int) -> List[float]:
+    """
+    Shorten an embedding to its first dimensions values and rescale it to unit length.
+    
+    For models trained with Matryoshka representation learning, such as OpenAI's
+    text-embedding-3 models, this gives the same vectors as requesting fewer
+    dimensions from the model.
+    
+    Args:
+        embedding: Embedding vector
+        dimensions: Number of leading values to keep
+    
+    Returns:
+        Truncated, L2-normalized embedding
+    """
+    truncated = embedding[:dimensions]
+    norm = math.sqrt(sum(value * value for value in truncated))
+    return [value / norm for value in truncated] if norm else truncated
+
+
+def create_embeddings(provider: str = "openai", model: Optional[str] = None,
+                      openai_api_key: Optional[str] = None, dimensions: Optional[int] = None,
+                      **kwargs) -> Embeddings:
+    """
+    Create the embedding model for a provider.
+    
+    Args:
+        provider: One of EMBEDDING_PROVIDERS
+        model: Model name (defaults to the provider's DEFAULT_EMBEDDING_MODELS entry;
+            ignored by the hashing provider)
+        openai_api_key: API key for the openai provider
+        dimensions: Length of the embedding vectors (None for the model's default).
+            OpenAI returns shortened vectors itself (text-embedding-3 models only),
+            sentence-transformers vectors are truncated and renormalized, and
+            hashing uses this many buckets.
+        **kwargs: Extra arguments for the provider's class, e.g. max_retries for
+            OpenAIEmbeddings or backend for SentenceTransformerEmbeddings
+    
+    Returns:
+        LangChain Embeddings instance with model and dimensions attributes
+    """
+    if provider not in EMBEDDING_PROVIDERS:
+        raise ValueError(f"Unknown embedding provider: {provider}. Choose from {EMBEDDING_PROVIDERS}")
+    
+    if dimensions is not None and dimensions < 1:
+        raise ValueError("dimensions must be at least 1")
+    
+    model = model or DEFAULT_EMBEDDING_MODELS[provider]
+    if provider == "openai":
+        if not openai_api_key:
+            raise ValueError("OpenAI API key is required. Please provide it or set OPENAI_API_KEY environment variable.")
+        return OpenAIEmbeddings(model=model, openai_api_key=openai_api_key, dimensions=dimensions, **kwargs)
+    if provider == "sentence-transformers":
+        return SentenceTransformerEmbeddings(model, dimensions=dimensions, **kwargs)
+    return HashingEmbeddings(**({} if dimensions is None else {"dimensions": dimensions}), **kwargs)
@@ -0,0 +1,318 @@
+"""
+Embedding Scheduler Module for RAG Chatbot
+Packs texts into token-bounded batches and embeds them concurrently, backing off on rate limits.
+"""
+
+import re
+import time
+import random
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Optional, Callable
+
+from utils.text_splitter import get_token_counter
+
+
+class EmbeddingScheduler:
+    """
+    Schedules embedding requests: token-aware batching, bounded concurrency and adaptive backoff.
+    
+    Texts are packed, in order, into batches of at most max_batch_texts texts and
+    max_batch_tokens tokens, and up to max_concurrency batches are in flight at a
+    time. The concurrency limit adapts like TCP congestion control: it is halved
+    whenever a request is rate limited (HTTP 429) and grows back by one request
+    per round of successful requests. A rate-limited request also pauses every
+    worker for the delay the server asks for (retry-after-ms, retry-after or
+    x-ratelimit-reset-* headers), or for an exponential backoff with jitter when
+    it gives none, since the quota is shared by all requests. Other transient
+    failures (timeouts, connection errors, 5xx) are retried with the same backoff
+    but leave the concurrency alone.
+    
+    With tokens_per_minute set, requests are also paced client-side with a token
+    bucket, so a known TPM quota can be used fully without tripping it.
+    
+    embed_fn should not retry by itself (e.g. OpenAIEmbeddings(max_retries=0)), so
+    that rate limits reach the scheduler.
+    """
+    
+    # HTTP status codes worth retrying besides 429
+    RETRY_STATUS_CODES = [408, 409, 500, 502, 503, 504]
+    
+    # Exceptions without a status code that are worth retrying, by class name
+    RETRY_ERRORS = ['APIConnectionError', 'APITimeoutError', 'Timeout', 'ConnectionError']
+    
+    # Exponential backoff bounds, in seconds
+    MIN_BACKOFF = 0.5
+    MAX_BACKOFF = 60.0
+    
+    def __init__(self, embed_fn: Callable[[List[str]], List[List[float]]], max_batch_tokens: int = 100_000,
+                 max_batch_texts: int = 512, max_concurrency: int = 4, max_retries: int = 6,
+                 tokens_per_minute: Optional[int] = None, token_counter=None):
+        """
+        Initialize the scheduler.
+        
+        Args:
+            embed_fn: Function embedding a list of texts, e.g. OpenAIEmbeddings.embed_documents
+            max_batch_tokens: Maximum tokens per request (a longer text gets a request of its own)
+            max_batch_texts: Maximum texts per request
+            max_concurrency: Maximum number of requests in flight
+            max_retries: Number of times a failed request is retried before giving up
+            tokens_per_minute: Optional client-side token budget per minute
+            token_counter: Function counting tokens, with a count_batch method
+                (defaults to the shared cl100k_base TokenCounter)
+        """
+        if max_batch_tokens < 1 or max_batch_texts < 1 or max_concurrency < 1:
+            raise ValueError("max_batch_tokens, max_batch_texts and max_concurrency must be at least 1")
+        
+        self.embed_fn = embed_fn
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_texts = max_batch_texts
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.tokens_per_minute = tokens_per_minute
+        self.token_counter = token_counter or get_token_counter()
+        
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="embedding")
+        self._condition = threading.Condition()
+        self._limit = float(max_concurrency)
+        self._in_flight = 0
+        self._resume_at = 0.0
+        self._bucket = float(tokens_per_minute or 0)
+        self._bucket_time = time.monotonic()
+        
+        self._stats = {
+            "requests": 0,
+            "texts": 0,
+            "tokens": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "failures": 0,
+            "request_seconds": 0.0
+        }
+        self._first_request = None
+        self._last_response = None
+    
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts, blocking until all batches are done.
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            One embedding per text, in order
+        """
+        return self.submit(texts).result()
+    
+    def submit(self, texts: List[str]) -> Future:
+        """
+        Start embedding texts in the background.
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            Future resolving to one embedding per text, in order. Its tokens
+            attribute holds the tokens sent for these texts, and its retries
+            attribute counts the retried requests made for them.
+        """
+        future = Future()
+        future.retries = 0
+        future.tokens = 0
+        if not texts:
+            future.set_result([])
+            return future
+        
+        batches = self._pack(texts)
+        future.tokens = sum(tokens for _, tokens in batches)
+        results: List[Optional[List[List[float]]]] = [None] * len(batches)
+        remaining = [len(batches)]
+        lock = threading.Lock()
+        
+        def on_batch_done(index: int, batch_future: Future):
+            with lock:
+                if future.done():
+                    return
+                error = batch_future.exception()
+                if error is not None:
+                    future.set_exception(error)
+                    return
+                results[index] = batch_future.result()
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    future.set_result([embedding for batch in results for embedding in batch])
+        
+        for index, (batch, tokens) in enumerate(batches):
+            batch_future = self._executor.submit(self._run_batch, batch, tokens, future)
+            batch_future.add_done_callback(lambda done, index=index: on_batch_done(index, done))
+        return future
+    
+    def _pack(self, texts: List[str]) -> List[tuple]:
+        """Group texts, in order, into (texts, tokens) batches within the batch limits."""
+        batches = []
+        batch, batch_tokens = [], 0
+        for text, tokens in zip(texts, self.token_counter.count_batch(texts)):
+            if batch and (batch_tokens + tokens > self.max_batch_tokens or len(batch) >= self.max_batch_texts):
+                batches.append((batch, batch_tokens))
+                batch, batch_tokens = [], 0
+            batch.append(text)
+            batch_tokens += tokens
+        if batch:
+            batches.append((batch, batch_tokens))
+        return batches
+    
+    def _run_batch(self, texts: List[str], tokens: int, job: Future) -> List[List[float]]:
+        """Embed one batch, waiting for a concurrency slot and retrying transient failures."""
+        attempt = 0
+        while True:
+            self._acquire(tokens)
+            start = time.monotonic()
+            try:
+                embeddings = self.embed_fn(texts)
+            except Exception as e:
+                delay, rate_limited = self._retry_delay(e, attempt)
+                self._release(start, rate_limited, success=False)
+                if delay is None or attempt >= self.max_retries:
+                    with self._condition:
+                        self._stats["failures"] += 1
+                    raise
+                attempt += 1
+                with self._condition:
+                    job.retries += 1
+                    self._stats["retries"] += 1
+                    if rate_limited:
+                        # The quota is shared, so every worker waits
+                        self._resume_at = max(self._resume_at, time.monotonic() + delay)
+                if not rate_limited:
+                    time.sleep(delay)
+                continue
+            
+            self._release(start, False, success=True)
+            with self._condition:
+                self._stats["texts"] += len(texts)
+                self._stats["tokens"] += tokens
+            return embeddings
+    
+    def _acquire(self, tokens: int):
+        """Wait for a concurrency slot, the end of any rate-limit pause and enough token budget."""
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                wait = self._resume_at - now
+                if wait <= 0 and self._in_flight < max(1, int(self._limit)):
+                    wait = self._take_budget(tokens, now)
+                    if wait <= 0:
+                        break
+                self._condition.wait(timeout=wait if wait > 0 else None)
+            
+            self._in_flight += 1
+            self._stats["requests"] += 1
+            if self._first_request is None:
+                self._first_request = time.monotonic()
+    
+    def _take_budget(self, tokens: int, now: float) -> float:
+        """Take tokens from the per-minute bucket, or return the seconds until they are available."""
+        if not self.tokens_per_minute:
+            return 0.0
+        
+        rate = self.tokens_per_minute / 60.0
+        self._bucket = min(float(self.tokens_per_minute), self._bucket + (now - self._bucket_time) * rate)
+        self._bucket_time = now
+        # A batch larger than the whole budget is let through once the bucket is full
+        needed = min(tokens, self.tokens_per_minute)
+        if self._bucket >= needed:
+            self._bucket -= tokens
+            return 0.0
+        return (needed - self._bucket) / rate
+    
+    def _release(self, start: float, rate_limited: bool, success: bool):
+        """Free a concurrency slot and adapt the limit: halve it on rate limits, grow it on success."""
+        with self._condition:
+            now = time.monotonic()
+            self._in_flight -= 1
+            self._stats["request_seconds"] += now - start
+            if success:
+                self._last_response = now
+                self._limit = min(float(self.max_concurrency), self._limit + 1.0 / max(self._limit, 1.0))
+            if rate_limited:
+                self._stats["rate_limited"] += 1
+                self._limit = max(1.0, self._limit / 2)
+            self._condition.notify_all()
+    
+    def _retry_delay(self, error: Exception, attempt: int) -> tuple:
+        """
+        Decide whether a failed request is retried.
+        
+        Returns:
+            (delay, rate_limited), where delay is None if the error is not transient
+        """
+        status = getattr(error, "status_code", None)
+        rate_limited = status == 429
+        if not rate_limited and status not in self.RETRY_STATUS_CODES:
+            if status is not None or type(error).__name__ not in self.RETRY_ERRORS:
+                return None, False
+        
+        backoff = min(self.MAX_BACKOFF, self.MIN_BACKOFF * 2 ** attempt) * (0.5 + random.random() / 2)
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        delay = self._header_delay(headers)
+        return (backoff if delay is None else min(delay, self.MAX_BACKOFF)), rate_limited
+    
+    @classmethod
+    def _header_delay(cls, headers) -> Optional[float]:
+        """Read how long the server asks clients to wait from rate-limit response headers."""
+        value = headers.get("retry-after-ms")
+        if value:
+            try:
+                return float(value) / 1000
+            except ValueError:
+                pass
+        
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                try:
+                    return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+        
+        resets = [cls._parse_duration(headers.get(name, "")) for name in ("x-ratelimit-reset-tokens", "x-ratelimit-reset-requests")]
+        resets = [reset for reset in resets if reset is not None]
+        return max(resets) if resets else None
+    
+    @staticmethod
+    def _parse_duration(value: str) -> Optional[float]:
+        """Parse durations like "20ms", "1.5s" or "6m0s" into seconds."""
+        parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value or "")
+        if not parts:
+            return None
+        units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+        return sum(float(number) * units[unit] for number, unit in parts)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return counters and throughput so far.
+        
+        Returns:
+            Dictionary with requests, texts, tokens, retries, rate_limited, failures,
+            request_seconds, the current concurrency_limit, and tokens_per_second and
+            texts_per_second between the first request and the last response
+        """
+        with self._condition:
+            stats = dict(self._stats)
+            stats["concurrency_limit"] = max(1, int(self._limit))
+            elapsed = (self._last_response - self._first_request) if self._last_response and self._first_request else 0.0
+        stats["tokens_per_second"] = stats["tokens"] / elapsed if elapsed > 0 else 0.0
+        stats["texts_per_second"] = stats["texts"] / elapsed if elapsed > 0 else 0.0
+        return stats
+    
+    def summary(self) -> str:
+        """Return a one-line summary of the embedding throughput."""
+        stats = self.stats()
+        return (
+            f"Embedded {stats['texts']} texts ({stats['tokens']} tokens) in {stats['requests']} requests: "
+            f"{stats['tokens_per_second']:.0f} tokens/s, {stats['retries']} retries, "
+            f"{stats['rate_limited']} rate limited, concurrency {stats['concurrency_limit']}/{self.max_concurrency}"
+        )
@@ -0,0 +1,192 @@
+"""
+Folder Watcher Module for RAG Chatbot
+Keeps the vector store in sync with a directory by re-ingesting files as they change.
+"""
+
+import os
+import time
+import threading
+from typing import Dict, Optional, Set, Tuple
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    """Forwards watchdog file system events to a FolderWatcher."""
+    
+    # Events that never change file contents
+    IGNORED_EVENTS = ("opened", "closed_no_write")
+    
+    def __init__(self, watcher: "FolderWatcher"):
+        self.watcher = watcher
+    
+    def on_any_event(self, event):
+        if event.event_type in self.IGNORED_EVENTS:
+            return
+        # A directory is "modified" whenever a file inside it changes; the file has its own event
+        if event.is_directory and event.event_type == "modified":
+            return
+        
+        self.watcher.notify(event.src_path, event.is_directory)
+        if getattr(event, "dest_path", ""):
+            self.watcher.notify(event.dest_path, event.is_directory)
+
+
+class FolderWatcher:
+    """
+    Watches a directory and incrementally re-ingests added, modified and removed files.
+    
+    File system events come from watchdog (inotify on Linux) when it is installed,
+    and from periodically re-scanning the directory otherwise. Changes are debounced:
+    they are collected until no new change has arrived for debounce_seconds and are
+    then ingested in one RAGChatbot.update_documents call, so a file being copied or
+    saved in several writes is only processed once. The chatbot's retriever keeps
+    serving queries while changes are ingested and is refreshed afterwards.
+    """
+    
+    def __init__(self, chatbot, directory_path: str, debounce_seconds: float = 2.0,
+                 poll_interval: float = 5.0, use_watchdog: Optional[bool] = None,
+                 max_workers: Optional[int] = 1):
+        """
+        Initialize the watcher.
+        
+        Args:
+            chatbot: RAGChatbot whose vector store is kept in sync
+            directory_path: Directory to watch, including subdirectories
+            debounce_seconds: Quiet period to wait for after the last change before ingesting
+            poll_interval: Seconds between directory scans when polling
+            use_watchdog: Use watchdog for file system events; None uses it if it is installed
+            max_workers: Number of worker processes used to parse files
+                (None uses one per CPU)
+        """
+        if use_watchdog and Observer is None:
+            raise ValueError("watchdog is not installed; install it or use polling (use_watchdog=False)")
+        
+        self.chatbot = chatbot
+        self.directory_path = directory_path
+        self.debounce_seconds = debounce_seconds
+        self.poll_interval = poll_interval
+        self.use_watchdog = Observer is not None if use_watchdog is None else use_watchdog
+        self.max_workers = max_workers
+        
+        self._changes: Set[str] = set()
+        self._last_change = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+        self._observer = None
+    
+    def start(self):
+        """
+        Catch up with changes made while the watcher was not running, then start watching.
+        """
+        self._stop.clear()
+        
+        # Start watching (or scan) before catching up, so changes made during the
+        # initial load are picked up
+        if self.use_watchdog:
+            self._observer = Observer()
+            self._observer.schedule(_ChangeHandler(self), self.directory_path, recursive=True)
+            self._observer.start()
+        else:
+            self._threads.append(threading.Thread(target=self._poll_loop, args=(self._scan(),), daemon=True))
+        
+        self.chatbot.load_documents(directory_path=self.directory_path, max_workers=self.max_workers)
+        
+        self._threads.append(threading.Thread(target=self._flush_loop, daemon=True))
+        for thread in self._threads:
+            thread.start()
+        
+        mode = "watchdog" if self.use_watchdog else f"polling every {self.poll_interval}s"
+        print(f"Watching {self.directory_path} for changes ({mode})")
+    
+    def stop(self):
+        """Stop watching, ingesting any changes that are still waiting."""
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.flush()
+    
+    def run(self):
+        """Watch until interrupted (Ctrl+C)."""
+        self.start()
+        try:
+            while not self._stop.wait(1.0):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+    
+    def notify(self, path: str, is_directory: bool = False):
+        """
+        Record a changed path, to be ingested once changes have settled.
+        
+        Args:
+            path: Path of the added, modified or removed file or directory
+            is_directory: Whether the path is a directory
+        """
+        ext = os.path.splitext(path)[1].lower()
+        if not is_directory and ext not in self.chatbot.document_processor.SUPPORTED_EXTENSIONS:
+            return
+        
+        with self._lock:
+            self._changes.add(path)
+            self._last_change = time.monotonic()
+    
+    def flush(self) -> int:
+        """
+        Ingest all recorded changes now, without waiting for them to settle.
+        
+        Returns:
+            Number of chunks added to the vector store
+        """
+        with self._lock:
+            changes, self._changes = self._changes, set()
+        if not changes:
+            return 0
+        
+        try:
+            report = self.chatbot.update_documents(self.directory_path, sorted(changes), max_workers=self.max_workers)
+            return report.num_chunks
+        except Exception as e:
+            print(f"Error updating documents in {self.directory_path}: {str(e)}")
+            return 0
+    
+    def _flush_loop(self):
+        """Ingest recorded changes once no new change has arrived for debounce_seconds."""
+        while not self._stop.wait(min(self.debounce_seconds, 1.0) / 4):
+            with self._lock:
+                settled = self._changes and time.monotonic() - self._last_change >= self.debounce_seconds
+            if settled:
+                self.flush()
+    
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """Return the size and mtime of every supported file in the directory."""
+        snapshot = {}
+        for file_path in self.chatbot.document_processor.find_supported_files(self.directory_path):
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            snapshot[file_path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+    
+    def _poll_loop(self, previous: Dict[str, Tuple[int, int]]):
+        """Detect changes by comparing successive directory scans, starting from a previous scan."""
+        while not self._stop.wait(self.poll_interval):
+            current = self._scan()
+            for file_path in previous.keys() | current.keys():
+                if previous.get(file_path) != current.get(file_path):
+                    self.notify(file_path)
+            previous = current
@@ -0,0 +1,169 @@
+"""
+Ingestion Estimator Module for RAG Chatbot
+Estimates the chunks, embedding tokens, cost and time of an ingestion run from a sample of its files.
+"""
+
+import os
+import copy
+import random
+from typing import List, Dict, Any, Optional
+
+from utils.document_processor import DocumentProcessor
+from utils.text_splitter import get_token_counter
+
+
+class IngestionEstimator:
+    """
+    A dry run of ingestion: scans a directory tree and processes a random sample of its files.
+    
+    Every file is stat()ed, but only up to sample_files files of each type are
+    parsed and split, with the DocumentProcessor's current settings (chunk size,
+    Excel mode, table format, deduplication, ...). For each type, the chunks and
+    embedding tokens per byte of the sample are scaled up to the total size of all
+    files of that type. Nothing is embedded or written to the vector store, and the
+    quarantine is left untouched.
+    
+    Cost is tokens times the embedding model's price. Time is the larger of the
+    extraction time (sample seconds per byte, spread over max_workers processes)
+    and the embedding time at embedding_tokens_per_minute, since the ingestion
+    pipeline overlaps the two.
+    """
+    
+    # USD per million input tokens of the OpenAI embedding models
+    EMBEDDING_PRICES = {
+        "text-embedding-3-small": 0.02,
+        "text-embedding-3-large": 0.13,
+        "text-embedding-ada-002": 0.10
+    }
+    
+    def __init__(self, document_processor: DocumentProcessor, sample_files: int = 20,
+                 embedding_model: str = "text-embedding-3-small",
+                 price_per_million_tokens: Optional[float] = None,
+                 embedding_tokens_per_minute: int = 1_000_000,
+                 max_workers: Optional[int] = 1, seed: int = 0):
+        """
+        Initialize the estimator.
+        
+        Args:
+            document_processor: Processor whose settings the estimate is made for
+            sample_files: Maximum number of files of each type to process
+            embedding_model: Embedding model, used to look up its price
+            price_per_million_tokens: USD per million embedding tokens; defaults to
+                the price of embedding_model in EMBEDDING_PRICES
+            embedding_tokens_per_minute: Embedding throughput assumed for the time
+                estimate (usually the account's rate limit)
+            max_workers: Number of worker processes the ingestion will parse files
+                with (None uses one per CPU); the sample is processed with as many
+            seed: Seed for choosing the sample, so estimates are repeatable
+        """
+        if price_per_million_tokens is None:
+            if embedding_model not in self.EMBEDDING_PRICES:
+                raise ValueError(f"Unknown price for embedding model {embedding_model}; pass price_per_million_tokens")
+            price_per_million_tokens = self.EMBEDDING_PRICES[embedding_model]
+        
+        # Process the sample without quarantining failures or touching the processor's totals
+        self.document_processor = copy.copy(document_processor)
+        self.document_processor.quarantine = None
+        self.document_processor.dedup_stats = {}
+        
+        self.sample_files = sample_files
+        self.price_per_million_tokens = price_per_million_tokens
+        self.embedding_tokens_per_minute = embedding_tokens_per_minute
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.seed = seed
+        self.token_counter = document_processor.token_counter or get_token_counter()
+    
+    def estimate(self, directory_path: Optional[str] = None, file_paths: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Estimate the cost of ingesting a directory tree and/or a list of files.
+        
+        Args:
+            directory_path: Directory to scan, including subdirectories
+            file_paths: Additional files to include
+        
+        Returns:
+            Dictionary with "types", mapping each file extension to its files, bytes,
+            sampled_files, sampled_bytes, failed_files, chunks, tokens and
+            extract_seconds, and "totals" with the same counts summed plus cost_usd,
+            extract_hours, embed_hours, hours and tokens_exact (False when tokens are
+            estimated from characters because tiktoken is unavailable)
+        """
+        sizes = {}
+        for file_path in list(file_paths or []) + (self.document_processor.find_supported_files(directory_path) if directory_path else []):
+            try:
+                sizes[file_path] = os.path.getsize(file_path)
+            except OSError:
+                continue
+        
+        by_type = {}
+        for file_path in sorted(sizes):
+            by_type.setdefault(os.path.splitext(file_path)[1].lower(), []).append(file_path)
+        
+        rng = random.Random(self.seed)
+        types = {}
+        for file_extension, paths in by_type.items():
+            sample = rng.sample(paths, min(self.sample_files, len(paths)))
+            types[file_extension] = self._estimate_type(paths, sample, sizes)
+        
+        totals = {key: sum(stats[key] for stats in types.values())
+                  for key in ["files", "bytes", "sampled_files", "sampled_bytes", "failed_files", "chunks", "tokens", "extract_seconds"]}
+        totals["cost_usd"] = totals["tokens"] / 1_000_000 * self.price_per_million_tokens
+        totals["extract_hours"] = totals.pop("extract_seconds") / self.max_workers / 3600
+        totals["embed_hours"] = totals["tokens"] / self.embedding_tokens_per_minute / 60
+        totals["hours"] = max(totals["extract_hours"], totals["embed_hours"])
+        totals["tokens_exact"] = self.token_counter.exact
+        
+        return {"types": types, "totals": totals}
+    
+    def _estimate_type(self, paths: List[str], sample: List[str], sizes: Dict[str, int]) -> Dict[str, Any]:
+        """Process the sampled files of one type and scale their counts up to all of its files."""
+        file_stats = {}
+        failed_files = 0
+        chunks = 0
+        tokens = 0
+        seconds = 0.0
+        
+        results = self.document_processor.iter_process_files(sample, max_workers=self.max_workers, file_stats=file_stats)
+        for file_path, file_chunks, error in results:
+            stats = file_stats.pop(file_path, {})
+            seconds += stats.get("parse_seconds", 0.0) + stats.get("split_seconds", 0.0)
+            if error:
+                failed_files += 1
+                continue
+            chunks += len(file_chunks)
+            tokens += sum(self.token_counter.count_batch(file_chunks))
+        
+        # Scaling by all sampled bytes assumes files fail as often overall as in the sample
+        total_bytes = sum(sizes[file_path] for file_path in paths)
+        sampled_bytes = sum(sizes[file_path] for file_path in sample)
+        ratio = total_bytes / sampled_bytes if sampled_bytes else 0.0
+        
+        return {
+            "files": len(paths),
+            "bytes": total_bytes,
+            "sampled_files": len(sample),
+            "sampled_bytes": sampled_bytes,
+            "failed_files": failed_files,
+            "chunks": round(chunks * ratio),
+            "tokens": round(tokens * ratio),
+            "extract_seconds": seconds * ratio
+        }
+    
+    @staticmethod
+    def summary(estimate: Dict[str, Any]) -> str:
+        """Format an estimate as a table with one row per file type and a totals row."""
+        lines = [f"{'type':<8} {'files':>9} {'GB':>9} {'sampled':>8} {'failed':>7} {'chunks':>12} {'tokens':>14}"]
+        rows = list(estimate["types"].items()) + [("total", estimate["totals"])]
+        for name, stats in rows:
+            lines.append(
+                f"{name:<8} {stats['files']:>9} {stats['bytes'] / 1e9:>9.2f} {stats['sampled_files']:>8} "
+                f"{stats['failed_files']:>7} {stats['chunks']:>12} {stats['tokens']:>14}"
+            )
+        
+        totals = estimate["totals"]
+        approximate = "" if totals["tokens_exact"] else " (tokens estimated from characters)"
+        lines.append(
+            f"Estimated embedding cost: ${totals['cost_usd']:.2f}{approximate}; time: {totals['hours']:.1f} h "
+            f"(extraction {totals['extract_hours']:.1f} h, embedding {totals['embed_hours']:.1f} h)"
+        )
+        return "\n".join(lines)
@@ -0,0 +1,200 @@
+"""
+Ingestion Manifest Module for RAG Chatbot
+Tracks which files have been ingested into the vector store so unchanged files can be skipped.
+"""
+
+import os
+import json
+import hashlib
+from typing import List, Dict, Any, Optional, Tuple
+
+
+class IngestionManifest:
+    """
+    A persisted record of ingested files, keyed by absolute path.
+    
+    Each entry stores the file's size, mtime and SHA-256 content hash together with
+    the IDs of the chunks it produced in the vector store, so changed files can have
+    their old chunks replaced and deleted files can be purged. It also stores the
+    settings the file was processed with, so changing them re-ingests the file.
+    
+    Between full saves, every record() and remove() is appended to a journal file
+    next to the manifest and flushed to disk, so an interrupted ingestion run keeps
+    the files it finished. The journal is replayed on load and folded into the
+    manifest by save().
+    """
+    
+    FILENAME = "ingestion_manifest.json"
+    
+    def __init__(self, manifest_path: str):
+        """
+        Initialize the manifest, loading any existing entries from disk.
+        
+        Args:
+            manifest_path: Path of the JSON file the manifest is persisted to
+        """
+        self.manifest_path = manifest_path
+        self.journal_path = manifest_path + ".journal"
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r") as f:
+                self.entries = json.load(f).get("files", {})
+        
+        # Number of journaled changes recovered from a run that did not finish
+        self.recovered = self._replay_journal()
+    
+    def _replay_journal(self) -> int:
+        """
+        Apply the checkpoints journaled since the last save, returning how many there were.
+        
+        A torn final line left by a crash mid-write is cut off the journal, so the
+        next change is appended after the last complete one rather than onto it.
+        """
+        if not os.path.exists(self.journal_path):
+            return 0
+        
+        replayed = 0
+        # Byte offset of the end of the last complete line
+        offset = 0
+        with open(self.journal_path, "rb+") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete journal line")
+                    op = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-write
+                    f.truncate(offset)
+                    break
+                if op["op"] == "record":
+                    self.entries[op["path"]] = op["entry"]
+                else:
+                    self.entries.pop(op["path"], None)
+                replayed += 1
+                offset += len(line)
+        return replayed
+    
+    def _journal(self, op: Dict[str, Any]):
+        """Append one change to the journal and flush it to disk."""
+        directory = os.path.dirname(self.journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        with open(self.journal_path, "a") as f:
+            f.write(json.dumps(op) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+    
+    @staticmethod
+    def _key(file_path: str) -> str:
+        """Normalize a file path into a manifest key."""
+        return os.path.normpath(os.path.abspath(file_path))
+    
+    @staticmethod
+    def hash_file(file_path: str, block_size: int = 1 << 20) -> str:
+        """Compute the SHA-256 hash of a file's contents without reading it all at once."""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def check(self, file_path: str, settings: Optional[str] = None) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Check whether a file needs to be (re-)ingested.
+        
+        A file recorded with different settings always needs re-ingesting. Otherwise
+        size and mtime are compared first; the content hash is only computed when
+        they differ, so touching a file without changing it does not trigger
+        re-embedding.
+        
+        Args:
+            file_path: Path to the file
+            settings: Signature of the processing and embedding settings the file
+                would be ingested with now
+        
+        Returns:
+            Tuple of (changed, file_info) where file_info holds the current
+            size, mtime and sha256 of the file (sha256 may be None if it was
+            not needed)
+        """
+        stat = os.stat(file_path)
+        file_info = {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": None}
+        entry = self.entries.get(self._key(file_path))
+        
+        if entry is None or entry.get("settings") != settings:
+            return True, file_info
+        
+        if entry["size"] == file_info["size"] and entry["mtime"] == file_info["mtime"]:
+            file_info["sha256"] = entry["sha256"]
+            return False, file_info
+        
+        file_info["sha256"] = self.hash_file(file_path)
+        if entry["sha256"] == file_info["sha256"]:
+            # Content unchanged, only the metadata moved; remember the new mtime
+            entry.update(size=file_info["size"], mtime=file_info["mtime"])
+            return False, file_info
+        
+        return True, file_info
+    
+    def get_chunk_ids(self, file_path: str) -> List[str]:
+        """Return the vector store IDs recorded for a file (empty if unknown)."""
+        entry = self.entries.get(self._key(file_path))
+        return list(entry["chunk_ids"]) if entry else []
+    
+    def record(self, file_path: str, file_info: Dict[str, Any], chunk_ids: List[str],
+               settings: Optional[str] = None):
+        """
+        Record a successfully ingested file, checkpointing it in the journal.
+        
+        Args:
+            file_path: Path to the file
+            file_info: Size/mtime/sha256 as returned by check()
+            chunk_ids: IDs of the chunks the file produced in the vector store
+            settings: Signature of the settings the file was ingested with (see check())
+        """
+        sha256 = file_info.get("sha256") or self.hash_file(file_path)
+        key = self._key(file_path)
+        self.entries[key] = {
+            "size": file_info["size"],
+            "mtime": file_info["mtime"],
+            "sha256": sha256,
+            "chunk_ids": list(chunk_ids),
+            "settings": settings
+        }
+        self._journal({"op": "record", "path": key, "entry": self.entries[key]})
+    
+    def remove(self, file_path: str) -> List[str]:
+        """Forget a file, returning the chunk IDs that were recorded for it."""
+        key = self._key(file_path)
+        entry = self.entries.pop(key, None)
+        if entry:
+            self._journal({"op": "remove", "path": key})
+        return list(entry["chunk_ids"]) if entry else []
+    
+    def files_under(self, directory_path: str) -> List[str]:
+        """Return the recorded file paths located under a directory (or the path itself, if it is a recorded file)."""
+        key = self._key(directory_path)
+        prefix = key + os.sep
+        return [path for path in self.entries if path == key or path.startswith(prefix)]
+    
+    def clear(self):
+        """Forget all files and persist the empty manifest."""
+        self.entries = {}
+        self.save()
+    
+    def save(self):
+        """Persist the manifest atomically (write to a temp file, then rename) and reset the journal."""
+        directory = os.path.dirname(self.manifest_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": 1, "files": self.entries}, f)
+        os.replace(tmp_path, self.manifest_path)
+        
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self.recovered = 0
@@ -0,0 +1,350 @@
+"""
+Ingestion Pipeline Module for RAG Chatbot
+Overlaps document extraction, embedding and vector store writes using bounded queues.
+"""
+
+import os
+import time
+import queue
+import threading
+import collections
+from concurrent.futures import Future
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator, Tuple, Union, BinaryIO
+
+from utils.document_processor import DocumentProcessor
+from utils.vector_store import VectorStore
+from utils.ingestion_report import IngestionReport
+from utils.text_splitter import get_token_counter
+
+
+class IngestionPipeline:
+    """
+    A three-stage ingestion pipeline: extract+split -> embed -> write.
+    
+    Each stage runs in its own thread and hands fixed-size batches of chunks to the
+    next through a bounded queue, so embedding requests (network bound) run while
+    the next files are parsed and split (CPU bound), and at most about
+    2 * queue_size * batch_size chunks are held in memory regardless of corpus size.
+    
+    Extraction and splitting are fused: with max_workers == 1 (and no per-file
+    timeout or memory limit) chunks stream from each file as its pages are read; otherwise whole files are processed in worker
+    processes and their chunks are fed into the pipeline as they complete.
+    
+    Runs can record an IngestionReport: per-file parse and split time (measured by
+    the DocumentProcessor, in worker processes where files are processed), embed
+    time (chunk lookup plus embedding requests), write time, and the chunks and
+    tokens sent to the embedding model.
+    """
+    
+    def __init__(self, document_processor: DocumentProcessor, vector_store: VectorStore,
+                 batch_size: int = 64, queue_size: int = 8, max_workers: Optional[int] = 1):
+        """
+        Initialize the pipeline.
+        
+        Args:
+            document_processor: Processor used to extract and split files
+            vector_store: Vector store the chunks are embedded with and written to
+            batch_size: Number of chunks per embedding request and write
+            queue_size: Maximum number of batches waiting between two stages
+            max_workers: Number of worker processes used to parse files
+                (None uses one per CPU)
+        """
+        if batch_size < 1 or queue_size < 1:
+            raise ValueError("batch_size and queue_size must be at least 1")
+        
+        self.document_processor = document_processor
+        self.vector_store = vector_store
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.max_workers = max_workers
+    
+    def run(self, file_paths: List[str], sources: Optional[Dict[str, str]] = None,
+            on_file_done: Optional[Callable[[str, List[str], Optional[str]], None]] = None,
+            report: Optional[IngestionReport] = None) -> int:
+        """
+        Ingest files through the pipeline.
+        
+        Chunks are written with content-addressed IDs, and chunks already stored with
+        the same text are not re-embedded. Quarantined files are recorded as skipped
+        in the report and are not passed to on_file_done. on_file_done is called from the calling
+        thread once all of a file's chunks have been written (or it has failed), in
+        file_paths order.
+        
+        Args:
+            file_paths: Paths of the files to ingest
+            sources: Optional mapping of file path to the source name stored in chunk
+                metadata (defaults to the file path)
+            on_file_done: Optional callback receiving (file_path, chunk_ids, error),
+                where error is None on success and chunk_ids are the IDs written
+                for the file so far
+            report: Optional IngestionReport updated with each file's statistics
+        
+        Returns:
+            Number of chunks ingested from files that succeeded
+        """
+        # Quarantined files are skipped rather than failed again
+        skipped = {file_path: self.document_processor.quarantine_reason(file_path) for file_path in file_paths}
+        for file_path, reason in skipped.items():
+            if reason and report is not None:
+                report.skip_file(file_path, reason)
+        file_paths = [file_path for file_path in file_paths if not skipped[file_path]]
+        
+        file_stats = {}
+        if report is not None:
+            for file_path in file_paths:
+                try:
+                    report.file(file_path)["bytes"] = os.path.getsize(file_path)
+                except OSError:
+                    pass
+        
+        results = self.document_processor.iter_process_files(
+            file_paths, max_workers=self.max_workers, with_metadata=True, lazy=True, file_stats=file_stats
+        )
+        return self._run(results, sources or {}, on_file_done, report, file_stats)
+    
+    def run_uploads(self, uploads: List[Tuple[str, Union[bytes, BinaryIO]]],
+                    on_file_done: Optional[Callable[[str, List[str], Optional[str]], None]] = None,
+                    report: Optional[IngestionReport] = None) -> int:
+        """
+        Ingest in-memory files (e.g. web uploads) through the pipeline, without temp files.
+        
+        Each upload's type is taken from its name's extension. Zip archives are
+        expanded in memory, and their members are named "{archive}/{member}".
+        
+        Args:
+            uploads: List of (name, data) pairs, where data is bytes or a binary
+                file-like object; the name is stored as the chunks' source, and the
+                chunks are tagged with origin "upload" so they can be told apart from
+                chunks of a file on disk with the same name
+            on_file_done: Optional callback receiving (name, chunk_ids, error), as in run()
+            report: Optional IngestionReport updated with each upload's statistics
+        
+        Returns:
+            Number of chunks ingested from uploads that succeeded
+        """
+        file_stats = {}
+        return self._run(self._iter_uploads(uploads, file_stats, report), {}, on_file_done, report, file_stats,
+                         metadata={"origin": "upload"})
+    
+    def _iter_uploads(self, uploads: List[Tuple[str, Union[bytes, BinaryIO]]], file_stats: Dict[str, Dict[str, float]],
+                      report: Optional[IngestionReport]) -> Iterator[Tuple[str, Optional[Iterator[Dict[str, Any]]], Optional[str]]]:
+        """Yield (name, records, error) for each upload, expanding zip archives."""
+        for name, data in uploads:
+            file_extension = os.path.splitext(name)[1].lower()
+            # Shared by an archive's members, which are read one after another
+            stats = {}
+            try:
+                if file_extension == ".zip":
+                    for member, records in self.document_processor.iter_zip_records(data, stats):
+                        member_name = f"{name}/{member}"
+                        yield member_name, self._collect_stats(member_name, records, stats, file_stats), None
+                else:
+                    if report is not None and isinstance(data, (bytes, bytearray)):
+                        report.file(name)["bytes"] = len(data)
+                    records = self.document_processor.iter_bytes_records(data, file_extension, name, stats)
+                    yield name, self._collect_stats(name, records, stats, file_stats), None
+            except Exception as e:
+                yield name, None, f"Error processing {name}: {str(e)}"
+    
+    def _collect_stats(self, name: str, records: Iterator[Dict[str, Any]], stats: Dict[str, Any],
+                       file_stats: Dict[str, Dict[str, float]]) -> Iterator[Dict[str, Any]]:
+        """Yield an upload's records, then fold the stats gathered for it into the processor and file_stats."""
+        try:
+            yield from records
+        finally:
+            self.document_processor.merge_file_stats(name, stats, file_stats)
+            stats.clear()
+    
+    def _run(self, results: Iterator[Tuple[str, Optional[Iterable[Dict[str, Any]]], Optional[str]]],
+             sources: Dict[str, str], on_file_done: Optional[Callable[[str, List[str], Optional[str]], None]],
+             report: Optional[IngestionReport], file_stats: Dict[str, Dict[str, float]],
+             metadata: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Run the pipeline stages over (file_path, records, error) extraction results.
+        
+        file_stats is filled with each file's FILE_STATS as its extraction finishes,
+        and metadata, if given, is added to every chunk's metadata.
+        """
+        embed_queue = queue.Queue(maxsize=self.queue_size)
+        write_queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        failures = []
+        
+        stages = [
+            threading.Thread(
+                target=self._run_stage,
+                args=(self._extract, (results, sources, metadata or {}, report, file_stats), embed_queue, stop, failures),
+                daemon=True
+            ),
+            threading.Thread(
+                target=self._run_stage,
+                args=(self._embed, (embed_queue, stop, report), write_queue, stop, failures),
+                daemon=True
+            )
+        ]
+        for stage in stages:
+            stage.start()
+        
+        num_chunks = 0
+        file_ids = {}
+        try:
+            for kind, file_path, payload in self._drain(write_queue, stop):
+                if kind == "batch":
+                    texts, embeddings, metadatas, ids, new_indexes = payload
+                    if new_indexes:
+                        start = time.perf_counter()
+                        self.vector_store.add_embeddings(
+                            [texts[i] for i in new_indexes],
+                            embeddings,
+                            [metadatas[i] for i in new_indexes],
+                            [ids[i] for i in new_indexes]
+                        )
+                        if report is not None:
+                            report.add_time(file_path, "write", time.perf_counter() - start)
+                    file_ids.setdefault(file_path, []).extend(ids)
+                    continue
+                
+                ids = file_ids.pop(file_path, [])
+                if payload is None:
+                    num_chunks += len(ids)
+                if report is not None:
+                    report.finish_file(file_path, len(ids), payload)
+                if on_file_done:
+                    on_file_done(file_path, ids, payload)
+        finally:
+            # Unblock the other stages if the writer stopped early
+            stop.set()
+            for stage in stages:
+                stage.join()
+            if report is not None:
+                report.finish()
+        
+        if failures:
+            raise failures[0]
+        
+        return num_chunks
+    
+    def _run_stage(self, stage: Callable, args: Tuple, output: queue.Queue,
+                   stop: threading.Event, failures: List[BaseException]):
+        """Run a stage, forwarding its items to the output queue and always ending with a sentinel."""
+        try:
+            for item in stage(*args):
+                if not self._put(output, item, stop):
+                    return
+        except BaseException as e:
+            failures.append(e)
+            stop.set()
+        finally:
+            self._put(output, None, stop)
+    
+    @staticmethod
+    def _put(output: queue.Queue, item: Any, stop: threading.Event) -> bool:
+        """Put an item on a queue, giving up once the pipeline is stopping."""
+        while not stop.is_set():
+            try:
+                output.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    @staticmethod
+    def _drain(input_queue: queue.Queue, stop: threading.Event) -> Iterator[Tuple[str, str, Any]]:
+        """Yield items from a queue until its sentinel arrives or the pipeline is stopping."""
+        while True:
+            try:
+                item = input_queue.get(timeout=0.1)
+            except queue.Empty:
+                if stop.is_set():
+                    return
+                continue
+            if item is None:
+                return
+            yield item
+    
+    def _extract(self, results: Iterator[Tuple[str, Optional[Iterable[Dict[str, Any]]], Optional[str]]],
+                 sources: Dict[str, str], metadata: Dict[str, Any], report: Optional[IngestionReport],
+                 file_stats: Dict[str, Dict[str, float]]) -> Iterator[Tuple[str, str, Any]]:
+        """
+        Split extraction results into batches of (texts, metadatas, ids).
+        
+        Yields ("batch", file_path, batch) items followed by one ("done", file_path,
+        error) item per file.
+        """
+        for file_path, records, error in results:
+            if error is None:
+                try:
+                    yield from self._batch_records(file_path, sources.get(file_path, file_path), records, metadata)
+                except Exception as e:
+                    error = str(e)
+            
+            stats = file_stats.pop(file_path, {})
+            if report is not None:
+                report.add_time(file_path, "parse", stats.get("parse_seconds", 0.0))
+                report.add_time(file_path, "split", stats.get("split_seconds", 0.0))
+                report.file(file_path)["retries"] += stats.get("retries", 0)
+            yield "done", file_path, error
+    
+    def _batch_records(self, file_path: str, source: str, records: Iterable[Dict[str, Any]],
+                       metadata: Dict[str, Any]) -> Iterator[Tuple[str, str, Any]]:
+        """Group a file's chunk records into ("batch", file_path, (texts, metadatas, ids)) items."""
+        texts, metadatas = [], []
+        for record in records:
+            texts.append(record["text"])
+            metadatas.append({**record["metadata"], **metadata, "source": source, "file_path": file_path})
+            if len(texts) >= self.batch_size:
+                yield "batch", file_path, (texts, metadatas, self.vector_store.make_ids(texts, metadatas))
+                texts, metadatas = [], []
+        if texts:
+            yield "batch", file_path, (texts, metadatas, self.vector_store.make_ids(texts, metadatas))
+    
+    def _embed(self, embed_queue: queue.Queue, stop: threading.Event,
+               report: Optional[IngestionReport]) -> Iterator[Tuple[str, str, Any]]:
+        """
+        Embed the batches coming from the extraction stage.
+        
+        Chunks already stored with identical text are skipped, so only new or changed
+        chunks are sent to the embedding model. Up to queue_size batches are embedded
+        concurrently (the vector store's embedding scheduler bounds the requests in
+        flight); results are passed on in order.
+        """
+        token_counter = get_token_counter() if report is not None else None
+        # (kind, file_path, payload, future, start) in arrival order
+        in_flight = collections.deque()
+        
+        for kind, file_path, payload in self._drain(embed_queue, stop):
+            future, start = None, time.perf_counter()
+            if kind == "batch":
+                texts, metadatas, ids = payload
+                new_indexes = self.vector_store.find_new(texts, ids)
+                new_texts = [texts[i] for i in new_indexes]
+                if new_texts:
+                    future = self.vector_store.submit_embeddings(new_texts)
+                payload = (texts, new_texts, metadatas, ids, new_indexes)
+            in_flight.append((kind, file_path, payload, future, start))
+            
+            while in_flight and (len(in_flight) > self.queue_size or in_flight[0][3] is None or in_flight[0][3].done()):
+                yield self._finish_embedding(in_flight.popleft(), report, token_counter)
+        
+        while in_flight:
+            yield self._finish_embedding(in_flight.popleft(), report, token_counter)
+    
+    @staticmethod
+    def _finish_embedding(item: Tuple[str, str, Any, Optional[Future], float], report: Optional[IngestionReport],
+                          token_counter) -> Tuple[str, str, Any]:
+        """Wait for a batch's embeddings and turn it into a ("batch", file_path, payload) item for the writer."""
+        kind, file_path, payload, future, start = item
+        if kind != "batch":
+            return kind, file_path, payload
+        
+        texts, new_texts, metadatas, ids, new_indexes = payload
+        embeddings = future.result() if future is not None else []
+        if report is not None:
+            report.add_time(file_path, "embed", time.perf_counter() - start)
+            entry = report.file(file_path)
+            entry["chunks_embedded"] += len(new_texts)
+            entry["cache_hits"] += getattr(future, "cache_hits", 0)
+            tokens = getattr(future, "tokens", None)
+            entry["tokens_embedded"] += sum(token_counter.count_batch(new_texts)) if tokens is None else tokens
+            entry["retries"] += getattr(future, "retries", 0)
+        return kind, file_path, (texts, embeddings, metadatas, ids, new_indexes)
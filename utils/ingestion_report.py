@@ -0,0 +1,154 @@
+"""
+Ingestion Report Module for RAG Chatbot
+Collects per-file and per-stage statistics for an ingestion run.
+"""
+
+import json
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+
+class IngestionReport:
+    """
+    Statistics for one ingestion run: what happened to each file and where the time went.
+    
+    Each file entry records its status ("ingested", "failed" or "skipped"), bytes,
+    chunks, chunks embedded (cache_hits of them served from the embedding cache),
+    tokens sent to the embedding model, retries, error, and the seconds spent in
+    each of STAGES. Stage times are busy time summed over files; with several
+    worker processes, or with stages overlapping in the pipeline, they can add up
+    to more than the run's wall_seconds.
+    
+    Entries are updated from the pipeline's stage threads; each stage only touches
+    its own fields.
+    """
+    
+    STAGES = ['parse', 'split', 'embed', 'write']
+    
+    def __init__(self):
+        """Initialize an empty report and start its wall clock."""
+        self.started_at = time.time()
+        self.wall_seconds = 0.0
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self._start = time.perf_counter()
+    
+    def file(self, file_path: str) -> Dict[str, Any]:
+        """Return a file's entry, creating it if needed."""
+        entry = self.files.get(file_path)
+        if entry is None:
+            entry = self.files.setdefault(file_path, {
+                "status": "pending",
+                "bytes": 0,
+                "chunks": 0,
+                "chunks_embedded": 0,
+                "cache_hits": 0,
+                "tokens_embedded": 0,
+                "retries": 0,
+                "error": None,
+                **{f"{stage}_seconds": 0.0 for stage in self.STAGES}
+            })
+        return entry
+    
+    def add_time(self, file_path: str, stage: str, seconds: float):
+        """Add time spent on a file in one of STAGES."""
+        self.file(file_path)[f"{stage}_seconds"] += seconds
+    
+    def finish_file(self, file_path: str, num_chunks: int, error: Optional[str] = None):
+        """
+        Record the outcome of a file.
+        
+        Args:
+            file_path: Path (or upload name) of the file
+            num_chunks: Number of chunks written for the file
+            error: Error message if the file failed, otherwise None
+        """
+        entry = self.file(file_path)
+        entry["chunks"] = num_chunks
+        entry["status"] = "ingested" if error is None else "failed"
+        entry["error"] = error
+    
+    def skip_file(self, file_path: str, reason: str):
+        """Record a file that was not processed, e.g. because it is unchanged."""
+        entry = self.file(file_path)
+        entry["status"] = "skipped"
+        entry["error"] = reason
+    
+    def finish(self):
+        """Stop the run's wall clock."""
+        self.wall_seconds = time.perf_counter() - self._start
+    
+    @property
+    def num_chunks(self) -> int:
+        """Number of chunks written for files that were ingested successfully."""
+        return sum(entry["chunks"] for entry in self.files.values() if entry["status"] == "ingested")
+    
+    @property
+    def failures(self) -> List[Tuple[str, str]]:
+        """(file_path, error) of each file that failed."""
+        return [(file_path, entry["error"]) for file_path, entry in self.files.items() if entry["status"] == "failed"]
+    
+    def totals(self) -> Dict[str, Any]:
+        """
+        Summarize the run.
+        
+        Returns:
+            Dictionary with file counts by status, bytes, chunks, chunks_embedded,
+            cache_hits, tokens_embedded, retries, wall_seconds, seconds per stage, and bytes and
+            chunks per second of wall time
+        """
+        entries = [entry for entry in self.files.values() if entry["status"] != "skipped"]
+        totals = {
+            "files_ingested": sum(1 for entry in entries if entry["status"] == "ingested"),
+            "files_failed": sum(1 for entry in entries if entry["status"] == "failed"),
+            "files_skipped": len(self.files) - len(entries),
+            "bytes": sum(entry["bytes"] for entry in entries),
+            "chunks": self.num_chunks,
+            "chunks_embedded": sum(entry["chunks_embedded"] for entry in entries),
+            "cache_hits": sum(entry["cache_hits"] for entry in entries),
+            "tokens_embedded": sum(entry["tokens_embedded"] for entry in entries),
+            "retries": sum(entry["retries"] for entry in entries),
+            "wall_seconds": self.wall_seconds
+        }
+        for stage in self.STAGES:
+            totals[f"{stage}_seconds"] = sum(entry[f"{stage}_seconds"] for entry in entries)
+        
+        wall_seconds = self.wall_seconds or 1e-9
+        totals["bytes_per_second"] = totals["bytes"] / wall_seconds
+        totals["chunks_per_second"] = totals["chunks"] / wall_seconds
+        return totals
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the report as a JSON-serializable dictionary."""
+        return {
+            "started_at": self.started_at,
+            "totals": self.totals(),
+            "files": {file_path: dict(entry) for file_path, entry in self.files.items()}
+        }
+    
+    def summary(self) -> str:
+        """Return a short human-readable summary of the run."""
+        totals = self.totals()
+        stages = ", ".join(f"{stage} {totals[f'{stage}_seconds']:.1f}s" for stage in self.STAGES)
+        return (
+            f"Ingested {totals['files_ingested']} files ({totals['files_failed']} failed, "
+            f"{totals['files_skipped']} skipped): {totals['chunks']} chunks, "
+            f"{totals['tokens_embedded']} tokens embedded ({totals['cache_hits']} chunks cached) in {totals['wall_seconds']:.1f}s "
+            f"({totals['bytes_per_second'] / 1e6:.2f} MB/s, {totals['chunks_per_second']:.1f} chunks/s); "
+            f"stage time: {stages}; retries: {totals['retries']}"
+        )
+    
+    def write_jsonl(self, path: str):
+        """
+        Append the report to a JSON lines file.
+        
+        One {"type": "file", ...} line is written per file, followed by a
+        {"type": "run", ...} line with the totals. Every line carries the run's
+        started_at timestamp, so several runs can share a file.
+        
+        Args:
+            path: Path of the JSON lines file
+        """
+        with open(path, "a") as f:
+            for file_path, entry in self.files.items():
+                f.write(json.dumps({"type": "file", "started_at": self.started_at, "file_path": file_path, **entry}) + "\n")
+            f.write(json.dumps({"type": "run", "started_at": self.started_at, **self.totals()}) + "\n")
@@ -0,0 +1,108 @@
+"""
+Quarantine Module for RAG Chatbot
+Remembers files that failed to process so they are skipped instead of retried on every run.
+"""
+
+import os
+import json
+from typing import Dict, Any, Optional
+
+
+class Quarantine:
+    """
+    A persisted list of files that failed to process (errors, timeouts, memory limits).
+    
+    Entries are keyed by absolute path and remember the file's size and mtime at the
+    time of the failure, so a quarantined file is retried automatically once it is
+    replaced or modified.
+    """
+    
+    FILENAME = "quarantine.json"
+    
+    # Longest failure reason kept per entry
+    MAX_REASON_LENGTH = 500
+    
+    def __init__(self, quarantine_path: str):
+        """
+        Initialize the quarantine, loading any existing entries from disk.
+        
+        Args:
+            quarantine_path: Path of the JSON file the quarantine is persisted to
+        """
+        self.quarantine_path = quarantine_path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        
+        if os.path.exists(quarantine_path):
+            with open(quarantine_path, "r") as f:
+                self.entries = json.load(f).get("files", {})
+    
+    @staticmethod
+    def _key(file_path: str) -> str:
+        """Normalize a file path into a quarantine key."""
+        return os.path.normpath(os.path.abspath(file_path))
+    
+    def get(self, file_path: str) -> Optional[str]:
+        """
+        Return why a file is quarantined, or None if it should be processed.
+        
+        Entries for files that have since changed or disappeared are dropped.
+        """
+        key = self._key(file_path)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            stat = None
+        if stat is None or stat.st_size != entry["size"] or stat.st_mtime != entry["mtime"]:
+            del self.entries[key]
+            self.save()
+            return None
+        
+        return entry["reason"]
+    
+    def add(self, file_path: str, reason: str):
+        """
+        Quarantine a file and persist the quarantine.
+        
+        Args:
+            file_path: Path to the file that failed
+            reason: Error message describing the failure
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            # Missing files are not quarantined; they are simply not found next time
+            return
+        
+        self.entries[self._key(file_path)] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "reason": reason[:self.MAX_REASON_LENGTH]
+        }
+        self.save()
+    
+    def remove(self, file_path: str) -> bool:
+        """Release a file from quarantine, returning whether it was quarantined."""
+        removed = self.entries.pop(self._key(file_path), None) is not None
+        if removed:
+            self.save()
+        return removed
+    
+    def clear(self):
+        """Release all files and persist the empty quarantine."""
+        self.entries = {}
+        self.save()
+    
+    def save(self):
+        """Persist the quarantine atomically (write to a temp file, then rename)."""
+        directory = os.path.dirname(self.quarantine_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        tmp_path = self.quarantine_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": 1, "files": self.entries}, f, indent=2)
+        os.replace(tmp_path, self.quarantine_path)
@@ -0,0 +1,141 @@
+"""
+Query Cache Module for RAG Chatbot
+Caches query embeddings so repeated questions skip the embedding API round trip.
+"""
+
+import re
+import time
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from utils.embedding_cache import EmbeddingCache
+
+
+class QueryEmbeddingCache(Embeddings):
+    """
+    An Embeddings wrapper that keeps an in-process LRU of query embeddings.
+    
+    Queries are normalized (Unicode NFKC, case-folded, whitespace collapsed) to form
+    the cache key, so "What is the PTO policy?" and "  what is the PTO policy? "
+    share one entry and one vector. The normalized text is only a key: on a miss the
+    query is embedded as it was written, so case and spacing still reach the model
+    for the first spelling of a question. Entries are keyed by model and dimensions
+    as well, so wrappers around different models never mix.
+    
+    With a disk_cache, queries missing from memory are looked up in (and added to)
+    an EmbeddingCache, which other processes using the same file share. Query
+    vectors are stored under their own model namespace (QUERY_NAMESPACE appended),
+    so a normalized query never collides with a chunk of the same text. Document
+    embeddings pass straight through to the wrapped model.
+    """
+    
+    # Suffix of the model name query vectors are stored under in the disk cache
+    QUERY_NAMESPACE = ":query"
+    
+    def __init__(self, embeddings: Embeddings, max_entries: int = 1024,
+                 disk_cache: Optional[EmbeddingCache] = None):
+        """
+        Initialize the cache.
+        
+        Args:
+            embeddings: Embedding model to wrap, e.g. an OpenAIEmbeddings instance
+            max_entries: Maximum number of query embeddings kept in memory
+            disk_cache: Optional EmbeddingCache shared with other processes
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        
+        self.embeddings = embeddings
+        self.max_entries = max_entries
+        self.disk_cache = disk_cache
+        self.model = getattr(embeddings, "model", type(embeddings).__name__)
+        self.dimensions = getattr(embeddings, "dimensions", None)
+        self.disk_namespace = self.model + self.QUERY_NAMESPACE
+        
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "miss_seconds": 0.0}
+    
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Normalize a query's Unicode form, case and whitespace."""
+        return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", query).casefold()).strip()
+    
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a query, from the cache when it was embedded before.
+        
+        Args:
+            text: Query text
+        
+        Returns:
+            Embedding of the query, or of the first query with the same normalized text
+        """
+        query = self.normalize(text)
+        with self._lock:
+            embedding = self._entries.get(query)
+            if embedding is not None:
+                self._entries.move_to_end(query)
+                self._stats["hits"] += 1
+                return list(embedding)
+        
+        if self.disk_cache is not None:
+            embedding = self.disk_cache.get_many(self.disk_namespace, self.dimensions, [query])[0]
+        if embedding is not None:
+            stat = "disk_hits"
+        else:
+            start = time.perf_counter()
+            embedding = self.embeddings.embed_query(text)
+            elapsed = time.perf_counter() - start
+            stat = "misses"
+            if self.disk_cache is not None:
+                self.disk_cache.put_many(self.disk_namespace, self.dimensions, [query], [embedding])
+        
+        with self._lock:
+            self._stats[stat] += 1
+            if stat == "misses":
+                self._stats["miss_seconds"] += elapsed
+            self._entries[query] = embedding
+            self._entries.move_to_end(query)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return list(embedding)
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents with the wrapped model, bypassing the cache."""
+        return self.embeddings.embed_documents(texts)
+    
+    def clear(self):
+        """Remove all in-memory entries."""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return cache statistics.
+        
+        Returns:
+            Dictionary with hits (in memory), disk_hits, misses, hit_rate, entries,
+            miss_seconds (time spent embedding misses) and saved_seconds (hits and
+            disk hits times the average miss latency)
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        average_miss = stats["miss_seconds"] / stats["misses"] if stats["misses"] else 0.0
+        stats["saved_seconds"] = (stats["hits"] + stats["disk_hits"]) * average_miss
+        return stats
+    
+    def summary(self) -> str:
+        """Return a one-line summary of the cache's hit rate and the time it saved."""
+        stats = self.stats()
+        return (
+            f"Query cache: {stats['hits']} hits, {stats['disk_hits']} disk hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate), ~{stats['saved_seconds']:.1f}s of embedding calls saved"
+        )
@@ -0,0 +1,112 @@
+"""
+Extracted Text Cache Module for RAG Chatbot
+Caches the page-level text extracted from documents so re-chunking does not re-run the parsers.
+"""
+
+import os
+import gzip
+import json
+import hashlib
+from typing import Callable, Iterator, Union, BinaryIO
+
+from langchain_core.documents import Document
+
+
+class ExtractedTextCache:
+    """
+    A disk cache of extracted documents, keyed by file content hash and extractor settings.
+    
+    Entries are gzip-compressed JSON lines, one LangChain Document per line. Because
+    the key does not include chunking parameters, changing chunk_size/chunk_overlap
+    only re-runs the splitter.
+    """
+    
+    def __init__(self, cache_dir: str):
+        """
+        Initialize the cache.
+        
+        Args:
+            cache_dir: Directory where cache entries are stored
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    @staticmethod
+    def make_key(file_path: Union[str, BinaryIO], extractor_signature: str, block_size: int = 1 << 20) -> str:
+        """
+        Build the cache key for a file.
+        
+        Args:
+            file_path: Path to the document file, or a seekable binary stream (which
+                is rewound afterwards)
+            extractor_signature: String identifying the loader version and any
+                settings that change the extracted text
+        
+        Returns:
+            Hex digest combining the file content hash and the extractor signature
+        """
+        digest = hashlib.sha256()
+        if isinstance(file_path, str):
+            with open(file_path, "rb") as f:
+                for block in iter(lambda: f.read(block_size), b""):
+                    digest.update(block)
+        else:
+            file_path.seek(0)
+            for block in iter(lambda: file_path.read(block_size), b""):
+                digest.update(block)
+            file_path.seek(0)
+        digest.update(b"\x00" + extractor_signature.encode("utf-8"))
+        return digest.hexdigest()
+    
+    def _entry_path(self, key: str) -> str:
+        """Return the path of a cache entry, sharded by key prefix."""
+        return os.path.join(self.cache_dir, key[:2], key + ".jsonl.gz")
+    
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._entry_path(key))
+    
+    def iter_documents(self, key: str, file_path: str, load: Callable[[], Iterator[Document]]) -> Iterator[Document]:
+        """
+        Yield a file's documents from the cache, or from the loader while filling the cache.
+        
+        Documents are streamed in both cases. A new entry is only committed once the
+        loader has been fully consumed, so partial extractions are never cached.
+        
+        Args:
+            key: Cache key from make_key()
+            file_path: Path to the document file, recorded as each document's source
+            load: Callable returning the loader's document iterator
+        
+        Yields:
+            LangChain Document objects
+        """
+        entry_path = self._entry_path(key)
+        
+        if os.path.exists(entry_path):
+            with gzip.open(entry_path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    metadata = record["metadata"]
+                    if "source" in metadata:
+                        metadata["source"] = file_path
+                    yield Document(page_content=record["page_content"], metadata=metadata)
+            return
+        
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+        try:
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                for doc in load():
+                    f.write(json.dumps({"page_content": doc.page_content, "metadata": doc.metadata}, default=str) + "\n")
+                    yield doc
+            os.replace(tmp_path, entry_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def clear(self):
+        """Remove all cache entries."""
+        for root, _, files in os.walk(self.cache_dir):
+            for filename in files:
+                if filename.endswith(".jsonl.gz"):
+                    os.remove(os.path.join(root, filename))
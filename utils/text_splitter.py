@@ -0,0 +1,351 @@
+"""
+Text Splitter Module for RAG Chatbot
+A single-pass drop-in replacement for LangChain's RecursiveCharacterTextSplitter,
+and a cached token counter for measuring chunks in tokens.
+"""
+
+import functools
+import collections
+from typing import List, Tuple, Iterator, Optional, Callable
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+
+class FastRecursiveSplitter(RecursiveCharacterTextSplitter):
+    """
+    RecursiveCharacterTextSplitter that produces identical chunks with far less work.
+    
+    With literal separators kept at the start of each piece (the LangChain
+    defaults), every piece the recursive algorithm produces is a contiguous slice of
+    the input, and so is every merged chunk. This class therefore tracks pieces as
+    (start, end) offsets instead of strings: separators are located with str.find
+    rather than re.split, piece lengths come from offsets when length_function is
+    len, chunks are built with one slice each instead of list joins, and the merge
+    window is a deque rather than a repeatedly copied list. Chunk offsets come for
+    free, so callers do not have to search for each chunk in the text.
+    
+    Other configurations (regex separators, keep_separator=False or "end") fall back
+    to the LangChain implementation.
+    
+    With a custom length_function, a batch_length_function measuring a list of
+    texts at once (e.g. TokenCounter.count_batch) can be given as well; all pieces
+    of a split level are then measured in one call.
+    """
+    
+    # Placements per chunk locate_chunks tries before falling back to a plain search
+    LOCATE_STEPS_PER_CHUNK = 32
+    
+    def __init__(self, batch_length_function: Optional[Callable[[List[str]], List[int]]] = None, **kwargs):
+        """
+        Initialize the splitter.
+        
+        Args:
+            batch_length_function: Optional function returning length_function of
+                each text in a list, used to measure pieces in batches
+            **kwargs: Arguments for RecursiveCharacterTextSplitter
+        """
+        super().__init__(**kwargs)
+        self._batch_length_function = batch_length_function
+    
+    def split_text(self, text: str) -> List[str]:
+        """Split text into chunks, exactly as RecursiveCharacterTextSplitter would."""
+        return [chunk for _, chunk in self.split_text_with_offsets(text)]
+    
+    def split_text_with_offsets(self, text: str) -> List[Tuple[int, str]]:
+        """
+        Split text into chunks together with their positions.
+        
+        Args:
+            text: Text to split
+        
+        Returns:
+            List of (start, chunk) pairs, where start is the offset of the chunk's
+            first character in text
+        """
+        if self._is_separator_regex or self._keep_separator not in (True, "start"):
+            max_overlap = self._chunk_overlap if self._length_function is len else None
+            return self.locate_chunks(text, super().split_text(text), max_overlap)
+        
+        chunks = []
+        self._split(text, 0, len(text), 0, chunks)
+        return chunks
+    
+    @staticmethod
+    def locate_chunks(text: str, chunks: List[str], max_overlap: Optional[int] = None) -> List[Tuple[int, str]]:
+        """
+        Locate chunks produced by another splitter in the text they were split from.
+        
+        In repetitive text a chunk can occur several times near where it belongs, so
+        positions are found by a backtracking search over the occurrences consistent
+        with how RecursiveCharacterTextSplitter emits chunks: each chunk starts no
+        earlier and ends no earlier than the previous one, overlaps it by at most
+        max_overlap characters, and only whitespace is left between chunks.
+        Occurrences reaching past the end of the previous chunk are tried first. The
+        search gives up after LOCATE_STEPS_PER_CHUNK placements per chunk and falls
+        back to taking the first occurrence after the previous chunk's overlap.
+        
+        Args:
+            text: Text that was split
+            chunks: The chunks, in order
+            max_overlap: Most characters a chunk can share with the previous one
+                (None when overlap is not measured in characters)
+        
+        Returns:
+            List of (start, chunk) pairs
+        """
+        if not chunks:
+            return []
+        
+        positions = []
+        # Untried candidate positions for each chunk placed so far and the next one
+        candidates = [iter(FastRecursiveSplitter._candidate_positions(text, chunks[0], None, max_overlap))]
+        # (chunk index, position) pairs the remaining chunks cannot follow, so that
+        # repetitive text does not make the search exponential
+        dead_ends = set()
+        budget = FastRecursiveSplitter.LOCATE_STEPS_PER_CHUNK * len(chunks)
+        while candidates and budget:
+            position = next(candidates[-1], None)
+            if position is None:
+                candidates.pop()
+                if positions:
+                    dead_ends.add((len(positions) - 1, positions.pop()))
+                continue
+            index = len(candidates) - 1
+            if (index, position) in dead_ends:
+                continue
+            
+            budget -= 1
+            del positions[index:]
+            positions.append(position)
+            end = position + len(chunks[index])
+            if index + 1 < len(chunks):
+                candidates.append(iter(FastRecursiveSplitter._candidate_positions(
+                    text, chunks[index + 1], (position, end), max_overlap
+                )))
+            elif not text[end:].strip():
+                return list(zip(positions, chunks))
+            else:
+                dead_ends.add((index, positions.pop()))
+        
+        # No consistent placement within the budget (e.g. the splitter rewrote the
+        # text, or highly periodic text): search in order
+        located = []
+        search_from = previous_end = 0
+        for chunk in chunks:
+            position = text.find(chunk, max(search_from, previous_end - len(chunk)))
+            if position < 0:
+                position = search_from
+            search_from = position + 1
+            previous_end = position + len(chunk)
+            if max_overlap is not None:
+                search_from = max(search_from, position + len(chunk) - max_overlap)
+            located.append((position, chunk))
+        return located
+    
+    @staticmethod
+    def _candidate_positions(text: str, chunk: str, previous: Optional[Tuple[int, int]],
+                             max_overlap: Optional[int]) -> List[int]:
+        """Return the positions chunk may start at after the chunk spanning previous, best first."""
+        previous_start, previous_end = previous or (0, 0)
+        search_from = max(previous_start, previous_end - len(chunk))
+        if max_overlap is not None:
+            search_from = max(search_from, previous_end - max_overlap)
+        # The chunk must start before any text that no chunk would otherwise cover
+        search_to = previous_end
+        while search_to < len(text) and text[search_to].isspace():
+            search_to += 1
+        
+        positions = []
+        position = text.find(chunk, search_from)
+        while 0 <= position <= search_to:
+            if previous is None or (position, position + len(chunk)) != previous:
+                positions.append(position)
+            position = text.find(chunk, position + 1)
+        if max_overlap is None:
+            # Without a bound on the overlap, prefer the smallest one so that periodic
+            # text does not pull the chunks back from the end of the text
+            positions.reverse()
+        return ([position for position in positions if position + len(chunk) > previous_end] +
+                [position for position in positions if position + len(chunk) <= previous_end])
+    
+    def _split(self, text: str, start: int, end: int, separator_index: int, chunks: List[Tuple[int, str]]):
+        """Split text[start:end] with the separators from separator_index on, appending to chunks."""
+        separators = self._separators
+        separator = separators[-1]
+        next_index = len(separators)
+        for i in range(separator_index, len(separators)):
+            if separators[i] == "":
+                separator = ""
+                break
+            if text.find(separators[i], start, end) != -1:
+                separator = separators[i]
+                next_index = i + 1
+                break
+        
+        chunk_size = self._chunk_size
+        measure = None if self._length_function is len else self._length_function
+        # Pieces are joined with "", which a custom length function may still count
+        joiner_length = 0 if measure is None else measure("")
+        
+        # Merge window of consecutive small pieces: (start, end, length)
+        window = collections.deque()
+        total = 0
+        
+        pieces = self._iter_pieces(text, start, end, separator)
+        if measure is None:
+            measured = ((piece_start, piece_end, piece_end - piece_start) for piece_start, piece_end in pieces)
+        elif self._batch_length_function is not None:
+            pieces = list(pieces)
+            lengths = self._batch_length_function([text[piece_start:piece_end] for piece_start, piece_end in pieces])
+            measured = ((piece_start, piece_end, length) for (piece_start, piece_end), length in zip(pieces, lengths))
+        else:
+            measured = ((piece_start, piece_end, measure(text[piece_start:piece_end])) for piece_start, piece_end in pieces)
+        
+        for piece_start, piece_end, length in measured:
+            
+            if length >= chunk_size:
+                # Too long to merge: flush the window and split the piece further
+                if window:
+                    self._emit(text, window[0][0], window[-1][1], chunks)
+                    window.clear()
+                    total = 0
+                if next_index == len(separators):
+                    chunks.append((piece_start, text[piece_start:piece_end]))
+                else:
+                    self._split(text, piece_start, piece_end, next_index, chunks)
+                continue
+            
+            if window and total + length + joiner_length > chunk_size:
+                self._emit(text, window[0][0], window[-1][1], chunks)
+                # Drop pieces from the front until what is left fits in the overlap
+                while total > self._chunk_overlap or (
+                    total + length + (joiner_length if window else 0) > chunk_size and total > 0
+                ):
+                    total -= window.popleft()[2] + (joiner_length if window else 0)
+            
+            total += length + (joiner_length if window else 0)
+            window.append((piece_start, piece_end, length))
+        
+        if window:
+            self._emit(text, window[0][0], window[-1][1], chunks)
+    
+    @staticmethod
+    def _iter_pieces(text: str, start: int, end: int, separator: str) -> Iterator[Tuple[int, int]]:
+        """Yield the (start, end) offsets of text[start:end] split before each separator occurrence."""
+        if separator == "":
+            for position in range(start, end):
+                yield position, position + 1
+            return
+        
+        step = len(separator)
+        piece_start = start
+        position = text.find(separator, start, end)
+        while position != -1:
+            if position > piece_start:
+                yield piece_start, position
+            piece_start = position
+            position = text.find(separator, position + step, end)
+        if end > piece_start:
+            yield piece_start, end
+    
+    def _emit(self, text: str, start: int, end: int, chunks: List[Tuple[int, str]]):
+        """Append text[start:end] as a chunk, stripped like TextSplitter._join_docs, unless it is blank."""
+        chunk = text[start:end]
+        if self._strip_whitespace:
+            stripped = chunk.lstrip()
+            start += len(chunk) - len(stripped)
+            chunk = stripped.rstrip()
+        if chunk:
+            chunks.append((start, chunk))
+
+
+class TokenCounter:
+    """
+    Counts tokens with a tiktoken encoding, for measuring chunks in tokens.
+    
+    Use get_token_counter() to share one counter, and its loaded encoding, per
+    encoding name. Short texts (the words and separators a splitter measures over
+    and over) are memoized, and longer texts are encoded in batches. When tiktoken
+    or its encoding files are unavailable, counts are estimated at
+    CHARS_PER_TOKEN characters per token instead.
+    """
+    
+    # Rough characters-per-token ratio used when tiktoken is unavailable
+    CHARS_PER_TOKEN = 4
+    
+    # Texts up to this many characters have their counts memoized
+    MEMO_MAX_LENGTH = 64
+    
+    # Number of memoized counts kept before the memo is reset
+    MEMO_SIZE = 100_000
+    
+    def __init__(self, encoding_name: str = "cl100k_base"):
+        """
+        Initialize the counter, loading the tiktoken encoding.
+        
+        Args:
+            encoding_name: Name of the tiktoken encoding (cl100k_base is used by
+                the OpenAI embedding and chat models)
+        """
+        self.encoding_name = encoding_name
+        try:
+            import tiktoken
+            self.encoding = tiktoken.get_encoding(encoding_name)
+        except Exception as e:
+            # tiktoken missing, or its encoding files cannot be downloaded
+            print(f"Warning: tiktoken encoding {encoding_name} unavailable ({type(e).__name__}); "
+                  f"estimating tokens at {self.CHARS_PER_TOKEN} characters per token")
+            self.encoding = None
+        self._memo = {}
+    
+    def __reduce__(self):
+        # Worker processes load (or reuse) their own cached counter instead of pickling the encoding
+        return get_token_counter, (self.encoding_name,)
+    
+    @property
+    def exact(self) -> bool:
+        """Whether counts come from the tokenizer rather than an estimate."""
+        return self.encoding is not None
+    
+    def __call__(self, text: str) -> int:
+        """Return the number of tokens in text."""
+        return self.count_batch([text])[0]
+    
+    def count_batch(self, texts: List[str]) -> List[int]:
+        """
+        Count the tokens of several texts at once.
+        
+        Args:
+            texts: Texts to count
+        
+        Returns:
+            Token count of each text, in order
+        """
+        if self.encoding is None:
+            return [-(-len(text) // self.CHARS_PER_TOKEN) for text in texts]
+        
+        memo = self._memo
+        counts = [memo.get(text) if len(text) <= self.MEMO_MAX_LENGTH else None for text in texts]
+        missing = [i for i, count in enumerate(counts) if count is None]
+        if not missing:
+            return counts
+        
+        if len(memo) > self.MEMO_SIZE:
+            memo.clear()
+        encoded = self.encoding.encode_ordinary_batch([texts[i] for i in missing], num_threads=1)
+        for i, tokens in zip(missing, encoded):
+            counts[i] = len(tokens)
+            if len(texts[i]) <= self.MEMO_MAX_LENGTH:
+                memo[texts[i]] = counts[i]
+        return counts
+
+
+def get_token_counter(encoding_name: str = "cl100k_base") -> TokenCounter:
+    """Return the shared TokenCounter for an encoding, loading it on first use."""
+    return _load_token_counter(encoding_name)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_token_counter(encoding_name: str) -> TokenCounter:
+    """Create the TokenCounter for an encoding; cached so each process loads it once."""
+    return TokenCounter(encoding_name)
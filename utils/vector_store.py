@@ -4,63 +4,249 @@ Handles document embedding storage and retrieval using Chroma.
 """
 
 import os
+import sqlite3
+from concurrent.futures import Future
 from typing import List, Dict, Any, Optional
-import uuid
+import hashlib
 
 # Updated imports for LangChain
-from langchain_openai import OpenAIEmbeddings
 from langchain_chroma import Chroma  # Changed from langchain_community.vectorstores
 from langchain_core.documents import Document
 
+from utils.embedding_scheduler import EmbeddingScheduler
+from utils.embedding_cache import EmbeddingCache
+from utils.query_cache import QueryEmbeddingCache
+from utils.embedding_providers import EMBEDDING_PROVIDERS, DEFAULT_EMBEDDING_MODELS, create_embeddings
+
 
 DEFAULT_RESULTS_NUM = 6
 
+# Collection LangChain's Chroma wrapper uses when none is named
+DEFAULT_COLLECTION_NAME = "langchain"
+
 class VectorStore:
     """
     A class for managing document embeddings using ChromaDB as the vector database.
     """
     
+    # Maximum number of IDs looked up per Chroma get() call
+    GET_BATCH_SIZE = 1000
+    
+    # Collection metadata keys that must match for vectors to be comparable
+    EMBEDDING_SETTINGS = ['embedding_provider', 'embedding_model', 'embedding_dimensions']
+    
     def __init__(self, 
                  persist_directory: str = "./chroma_db",
-                 embedding_model: str = "text-embedding-3-small",
-                 openai_api_key: Optional[str] = None):
+                 embedding_model: Optional[str] = None,
+                 openai_api_key: Optional[str] = None,
+                 embedding_batch_tokens: int = 100_000,
+                 embedding_concurrency: int = 4,
+                 tokens_per_minute: Optional[int] = None,
+                 embedding_cache_mb: Optional[float] = 1024,
+                 query_cache_size: Optional[int] = 1024,
+                 query_cache_on_disk: bool = False,
+                 embedding_provider: Optional[str] = None,
+                 collection_name: str = DEFAULT_COLLECTION_NAME,
+                 embedding_dimensions: Optional[int] = None):
         """
         Initialize the VectorStore with ChromaDB.
         
+        The embedding provider, model and dimensions are recorded in the collection's
+        metadata when it is created. Reopening the collection without naming them
+        uses the recorded ones, and naming different ones raises a ValueError while
+        the collection holds vectors, since vectors from different models or of
+        different lengths cannot be searched together.
+        
         Args:
             persist_directory: Directory to persist the ChromaDB database
-            embedding_model: OpenAI embedding model to use
-            openai_api_key: OpenAI API key (if None, will look for OPENAI_API_KEY env variable)
+            embedding_model: Embedding model to use (defaults to the collection's
+                model, or the provider's default for a new collection)
+            openai_api_key: OpenAI API key (if None, will look for OPENAI_API_KEY env variable);
+                only needed by the openai provider
+            embedding_batch_tokens: Maximum tokens per document embedding request
+            embedding_concurrency: Maximum number of document embedding requests in flight
+            tokens_per_minute: Optional embedding token budget per minute (e.g. the
+                account's TPM quota) that requests are paced to stay within
+            embedding_cache_mb: Size limit, in MB, of the embedding cache kept in
+                persist_directory (None disables the cache)
+            query_cache_size: Number of query embeddings kept in memory for searches
+                and retrievers (None disables the query cache)
+            query_cache_on_disk: Also look up and store query embeddings in the
+                embedding cache, sharing them with other processes
+            embedding_provider: One of EMBEDDING_PROVIDERS ("openai",
+                "sentence-transformers" for a local CPU model, or "hashing" for
+                dependency-free feature hashing); defaults to the collection's
+                provider, or "openai" for a new collection
+            collection_name: Chroma collection to use; collections in the same
+                persist_directory can use different providers
+            embedding_dimensions: Length of the stored vectors (defaults to the
+                collection's, or the model's full length for a new collection).
+                Shorter vectors cut index memory and search time at some cost in
+                recall; see create_embeddings for how each provider shortens them
         """
         self.persist_directory = persist_directory
+        self.collection_name = collection_name
         self.openai_api_key = openai_api_key or os.environ.get("OPENAI_API_KEY")
         
-        # Check if OpenAI API key is available
-        if not self.openai_api_key:
-            raise ValueError("OpenAI API key is required. Please provide it or set OPENAI_API_KEY environment variable.")
+        # Create directory if it doesn't exist
+        os.makedirs(persist_directory, exist_ok=True)
+        
+        # Use the provider, model and dimensions the collection was created with, unless told otherwise
+        self.collection_metadata = self._resolve_embedding_settings(embedding_provider, embedding_model,
+                                                                    embedding_dimensions)
+        self.embedding_provider = self.collection_metadata["embedding_provider"]
+        embedding_model = self.collection_metadata["embedding_model"]
+        self.embedding_dimensions = self.collection_metadata.get("embedding_dimensions")
         
         # Create embeddings instance
-        self.embeddings = OpenAIEmbeddings(
-            model=embedding_model,
-            openai_api_key=self.openai_api_key
+        self.embeddings = create_embeddings(self.embedding_provider, embedding_model, self.openai_api_key,
+                                            dimensions=self.embedding_dimensions)
+        
+        if self.embedding_provider == "openai":
+            # Documents are embedded through the scheduler, which does its own retries and
+            # backoff, so its client must surface rate limits instead of retrying them
+            embed_fn = create_embeddings("openai", embedding_model, self.openai_api_key,
+                                         dimensions=self.embedding_dimensions, max_retries=0).embed_documents
+        else:
+            # Local models are CPU-bound, so concurrent requests would not help
+            embed_fn = self.embeddings.embed_documents
+            embedding_concurrency = 1
+        self.embedding_scheduler = EmbeddingScheduler(
+            embed_fn,
+            max_batch_tokens=embedding_batch_tokens,
+            max_concurrency=embedding_concurrency,
+            tokens_per_minute=tokens_per_minute
         )
         
-        # Create directory if it doesn't exist
-        os.makedirs(persist_directory, exist_ok=True)
+        # Embeddings of texts seen before are reused across files, runs and clear()
+        self.embedding_cache = None
+        if embedding_cache_mb is not None:
+            self.embedding_cache = EmbeddingCache(
+                os.path.join(persist_directory, EmbeddingCache.FILENAME),
+                max_size_mb=embedding_cache_mb
+            )
+        
+        # Searches and retrievers embed queries through the query cache
+        self.query_cache = None
+        if query_cache_size:
+            self.query_cache = QueryEmbeddingCache(
+                self.embeddings,
+                max_entries=query_cache_size,
+                disk_cache=self.embedding_cache if query_cache_on_disk else None
+            )
         
         # Initialize Chroma vector store
-        self.vector_store = Chroma(
-            persist_directory=persist_directory,
-            embedding_function=self.embeddings
+        self.vector_store = self._open_collection()
+    
+    def _open_collection(self) -> Chroma:
+        """Open (or create) the Chroma collection and record its embedding settings."""
+        vector_store = Chroma(
+            collection_name=self.collection_name,
+            persist_directory=self.persist_directory,
+            embedding_function=self.query_cache or self.embeddings,
+            collection_metadata=self.collection_metadata
         )
+        if (vector_store._collection.metadata or {}) != self.collection_metadata:
+            # Chroma rejects metadata updates that mention the distance function
+            vector_store._collection.modify(
+                metadata={key: value for key, value in self.collection_metadata.items() if not key.startswith("hnsw:")}
+            )
+        return vector_store
+    
+    def _resolve_embedding_settings(self, embedding_provider: Optional[str], embedding_model: Optional[str],
+                                    embedding_dimensions: Optional[int]) -> Dict[str, Any]:
+        """
+        Work out the collection's embedding provider, model and dimensions from its metadata and the arguments.
+        
+        Returns:
+            Collection metadata including embedding_provider, embedding_model and,
+            unless the model's default is used, embedding_dimensions
+        
+        Raises:
+            ValueError: If they differ from the ones a non-empty collection was created with
+        """
+        collection = Chroma(collection_name=self.collection_name, persist_directory=self.persist_directory)._collection
+        stored = collection.metadata or {}
+        
+        provider = embedding_provider or stored.get("embedding_provider") or "openai"
+        if provider not in EMBEDDING_PROVIDERS:
+            raise ValueError(f"Unknown embedding provider: {provider}. Choose from {EMBEDDING_PROVIDERS}")
+        if embedding_model is None and provider == stored.get("embedding_provider"):
+            embedding_model = stored.get("embedding_model")
+        embedding_model = embedding_model or DEFAULT_EMBEDDING_MODELS[provider]
+        if embedding_dimensions is None and (provider, embedding_model) == (stored.get("embedding_provider"), stored.get("embedding_model")):
+            embedding_dimensions = stored.get("embedding_dimensions")
+        if embedding_dimensions is not None and embedding_dimensions < 1:
+            raise ValueError("embedding_dimensions must be at least 1")
+        
+        metadata = {key: value for key, value in stored.items() if key != "embedding_dimensions"}
+        metadata["embedding_provider"] = provider
+        metadata["embedding_model"] = embedding_model
+        if embedding_dimensions is not None:
+            metadata["embedding_dimensions"] = embedding_dimensions
+        
+        def describe(settings: Dict[str, Any]) -> str:
+            dimensions = settings.get("embedding_dimensions")
+            return (f"{settings.get('embedding_provider', 'openai')}/{settings.get('embedding_model', 'unknown model')}"
+                    + (f" at {dimensions} dimensions" if dimensions else ""))
+        
+        changed = any(stored.get(key) != metadata.get(key) for key in self.EMBEDDING_SETTINGS)
+        # Collections created before settings were recorded hold full-length OpenAI embeddings
+        legacy_compatible = "embedding_provider" not in stored and provider == "openai" and embedding_dimensions is None
+        if changed and collection.count() > 0 and not legacy_compatible:
+            raise ValueError(
+                f"Collection {self.collection_name} holds embeddings from {describe(stored)}; "
+                f"clear it or use another collection_name to use {describe(metadata)}"
+            )
+        
+        return metadata
     
-    def add_texts(self, texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None) -> List[str]:
+    @staticmethod
+    def make_chunk_id(source: str, position: int, text: str) -> str:
+        """
+        Derive a deterministic, content-addressed ID for a text chunk.
+        
+        Args:
+            source: Identity of the file the chunk came from (see make_ids), so that
+                same-named files with identical content get different IDs
+            position: Position of the chunk within its file
+            text: Chunk text
+            
+        Returns:
+            Hex digest identifying the chunk
+        """
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{source}\x00{position}\x00{text_hash}".encode("utf-8")).hexdigest()
+    
+    def make_ids(self, texts: List[str], metadatas: List[Dict[str, Any]]) -> List[str]:
+        """
+        Derive chunk IDs from each chunk's file, its position within that file and its text.
+        
+        A file is identified by its source name together with its file_path and origin
+        metadata, so two files with the same name in different directories (or a file
+        on disk and an upload) never share IDs.
+        """
+        positions = {}
+        ids = []
+        for text, metadata in zip(texts, metadatas):
+            identity = "\x00".join(str(metadata.get(key, "")) for key in ("source", "file_path", "origin"))
+            position = positions.get(identity, 0)
+            positions[identity] = position + 1
+            ids.append(self.make_chunk_id(identity, metadata.get("chunk_index", position), text))
+        return ids
+    
+    def add_texts(self, texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None,
+                  ids: Optional[List[str]] = None) -> List[str]:
         """
         Add text chunks to the vector store.
         
+        Chunks with an ID that already exists overwrite the stored chunk, so adding the
+        same chunk twice never produces duplicate vectors.
+        
         Args:
             texts: List of text chunks to add
             metadatas: Optional list of metadata dictionaries for each text chunk
+            ids: Optional list of IDs; derived with make_ids if omitted
             
         Returns:
             List of IDs for the added documents
@@ -68,69 +254,244 @@ class VectorStore:
         if not metadatas:
             metadatas = [{"source": f"doc_{i}"} for i in range(len(texts))]
         
-        # Generate IDs if not provided in metadata
-        ids = [str(uuid.uuid4()) for _ in range(len(texts))]
+        # Generate content-addressed IDs if not provided
+        if ids is None:
+            ids = self.make_ids(texts, metadatas)
         
-        # Add texts to vector store
-        self.vector_store.add_texts(
-            texts=texts,
+        # Embed through the scheduler (batched, concurrent, rate-limit aware), then write
+        self.add_embeddings(texts, self.embed_texts(texts), metadatas, ids)
+        
+        return ids
+    
+    def upsert_texts(self, texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None,
+                     ids: Optional[List[str]] = None) -> List[str]:
+        """
+        Add text chunks to the vector store, skipping chunks that are already stored.
+        
+        Chunks whose ID already exists with identical text are not re-embedded, so
+        re-ingesting unchanged content makes no embedding calls.
+        
+        Args:
+            texts: List of text chunks to add
+            metadatas: Optional list of metadata dictionaries for each text chunk
+            ids: Optional list of IDs; derived with make_ids if omitted
+            
+        Returns:
+            List of IDs for all given chunks, including skipped ones
+        """
+        if not metadatas:
+            metadatas = [{"source": f"doc_{i}"} for i in range(len(texts))]
+        
+        if ids is None:
+            ids = self.make_ids(texts, metadatas)
+        
+        new_indexes = self.find_new(texts, ids)
+        
+        if new_indexes:
+            self.add_texts(
+                [texts[i] for i in new_indexes],
+                [metadatas[i] for i in new_indexes],
+                ids=[ids[i] for i in new_indexes]
+            )
+        
+        return ids
+    
+    def find_new(self, texts: List[str], ids: List[str]) -> List[int]:
+        """
+        Find the chunks that are not yet stored with identical text.
+        
+        Args:
+            texts: List of text chunks
+            ids: List of IDs, one per text chunk
+            
+        Returns:
+            Indexes of the chunks that need to be embedded and written
+        """
+        existing = self.get_texts(ids)
+        return [i for i, chunk_id in enumerate(ids) if existing.get(chunk_id) != texts[i]]
+    
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed text chunks without writing them to the vector store.
+        
+        Args:
+            texts: List of text chunks
+            
+        Returns:
+            List of embedding vectors
+        """
+        return self.submit_embeddings(texts).result()
+    
+    def submit_embeddings(self, texts: List[str]) -> Future:
+        """
+        Start embedding text chunks in the background (see EmbeddingScheduler.submit).
+        
+        Texts found in the embedding cache are not sent to the API, and new
+        embeddings are added to the cache once they arrive.
+        
+        Args:
+            texts: List of text chunks
+            
+        Returns:
+            Future resolving to the list of embedding vectors. Its tokens and retries
+            attributes count the tokens sent to the API and the retried requests, and
+            its cache_hits attribute the texts served from the cache.
+        """
+        if self.embedding_cache is None:
+            future = self.embedding_scheduler.submit(texts)
+            future.cache_hits = 0
+            return future
+        
+        model, dimensions = self.embeddings.model, self.embeddings.dimensions
+        embeddings = self.embedding_cache.get_many(model, dimensions, texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        
+        future = Future()
+        future.retries = 0
+        future.tokens = 0
+        future.cache_hits = len(texts) - len(missing)
+        
+        def on_done(api_future: Future):
+            error = api_future.exception()
+            if error is not None:
+                future.set_exception(error)
+                return
+            new_embeddings = api_future.result()
+            try:
+                self.embedding_cache.put_many(model, dimensions, [texts[i] for i in missing], new_embeddings)
+            except sqlite3.Error as e:
+                print(f"Warning: could not write to the embedding cache ({e})")
+            for i, embedding in zip(missing, new_embeddings):
+                embeddings[i] = embedding
+            future.retries = api_future.retries
+            future.tokens = api_future.tokens
+            future.set_result(embeddings)
+        
+        self.embedding_scheduler.submit([texts[i] for i in missing]).add_done_callback(on_done)
+        return future
+    
+    def add_embeddings(self, texts: List[str], embeddings: List[List[float]],
+                       metadatas: List[Dict[str, Any]], ids: List[str]) -> List[str]:
+        """
+        Write pre-computed embeddings to the vector store, overwriting existing IDs.
+        
+        Args:
+            texts: List of text chunks
+            embeddings: Embedding vector for each text chunk
+            metadatas: Metadata dictionary for each text chunk
+            ids: ID for each text chunk
+            
+        Returns:
+            List of IDs for the written documents
+        """
+        self.vector_store._collection.upsert(
+            ids=ids,
+            embeddings=embeddings,
             metadatas=metadatas,
-            ids=ids
+            documents=texts
         )
+        return ids
+    
+    def get_texts(self, ids: List[str]) -> Dict[str, str]:
+        """
+        Look up stored chunk texts by ID.
         
-        # Note: Removed .persist() call as it's no longer needed in Chroma 0.4.x+
+        Args:
+            ids: List of document IDs
+            
+        Returns:
+            Dictionary mapping each ID found in the store to its text
+        """
+        texts = {}
+        for i in range(0, len(ids), self.GET_BATCH_SIZE):
+            result = self.vector_store.get(ids=ids[i:i + self.GET_BATCH_SIZE], include=["documents"])
+            texts.update(zip(result["ids"], result["documents"]))
+        return texts
+    
+    def get_ids(self, where: Dict[str, Any]) -> List[str]:
+        """
+        Look up the IDs of stored chunks whose metadata matches a Chroma where-filter.
         
-        return ids
+        Args:
+            where: Metadata filter, e.g. {"source": "report.pdf"}
+            
+        Returns:
+            List of matching document IDs
+        """
+        return self.vector_store.get(where=where, include=[])["ids"]
     
     def add_documents(self, documents: List[Document]) -> List[str]:
         """
         Add LangChain Document objects to the vector store.
         
+        Documents get the same content-addressed IDs as add_texts, so adding a
+        document twice overwrites it rather than storing a duplicate.
+        
         Args:
             documents: List of Document objects to add
             
         Returns:
             List of IDs for the added documents
         """
-        # Add documents to vector store
-        ids = self.vector_store.add_documents(documents)
+        texts = [doc.page_content for doc in documents]
+        metadatas = [doc.metadata for doc in documents]
         
-        # Note: Removed .persist() call as it's no longer needed in Chroma 0.4.x+
+        # Embed through the scheduler and embedding cache like any other chunks
+        return self.add_texts(texts, metadatas, ids=self.make_ids(texts, metadatas))
+    
+    def delete(self, ids: List[str]):
+        """
+        Delete documents from the vector store by ID.
         
-        return ids
+        Args:
+            ids: List of document IDs to delete
+        """
+        if ids:
+            self.vector_store.delete(ids=ids)
     
-    def similarity_search(self, query: str, k: int = DEFAULT_RESULTS_NUM) -> List[Document]:
+    def count(self) -> int:
+        """
+        Return the number of documents stored in the vector store.
+        """
+        return self.vector_store._collection.count()
+    
+    def similarity_search(self, query: str, k: int = DEFAULT_RESULTS_NUM,
+                          filter: Optional[Dict[str, Any]] = None) -> List[Document]:
         """
         Perform similarity search for a query.
         
         Args:
             query: Query text to search for
             k: Number of results to return
+            filter: Optional Chroma where-filter on chunk metadata, applied server-side
+                (e.g. {"sheet_name": "Q3"} or {"page": {"$lte": 10}})
             
         Returns:
             List of Document objects that are most similar to the query
         """
-        return self.vector_store.similarity_search(query, k=k)
+        return self.vector_store.similarity_search(query, k=k, filter=filter)
     
-    def similarity_search_with_score(self, query: str, k: int = DEFAULT_RESULTS_NUM) -> List[tuple[Document, float]]:
+    def similarity_search_with_score(self, query: str, k: int = DEFAULT_RESULTS_NUM,
+                                     filter: Optional[Dict[str, Any]] = None) -> List[tuple[Document, float]]:
         """
         Perform similarity search with relevance scores.
         
         Args:
             query: Query text to search for
             k: Number of results to return
+            filter: Optional Chroma where-filter on chunk metadata, applied server-side
             
         Returns:
             List of tuples containing (Document, score) pairs
         """
-        return self.vector_store.similarity_search_with_score(query, k=k)
+        return self.vector_store.similarity_search_with_score(query, k=k, filter=filter)
     
     def get_retriever(self, search_kwargs: Optional[Dict[str, Any]] = None):
         """
         Get a retriever for the vector store.
         
         Args:
-            search_kwargs: Optional search parameters
+            search_kwargs: Optional search parameters (e.g. {"k": 6, "filter": {...}})
             
         Returns:
             A retriever that can be used in a RetrievalQA chain
@@ -143,10 +504,7 @@ class VectorStore:
         Clear all documents from the vector store.
         """
         self.vector_store.delete_collection()
-        self.vector_store = Chroma(
-            persist_directory=self.persist_directory,
-            embedding_function=self.embeddings
-        )
+        self.vector_store = self._open_collection()
         # Note: Removed .persist() call as it's no longer needed in Chroma 0.4.x+
 
 
@@ -179,4 +537,4 @@ if __name__ == "__main__":
     for doc in results:
         print(f"Content: {doc.page_content}")
         print(f"Metadata: {doc.metadata}")
-        print("---")
\ No newline at end of file
+        print("---")